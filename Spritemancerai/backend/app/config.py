@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 from functools import lru_cache
+from typing import Literal
 import json
 
 
@@ -16,11 +17,14 @@ class Settings(BaseSettings):
     gemini_text_model: str = "gemini-3-pro-preview"
     gemini_image_model: str = "gemini-3-pro-image-preview"
     gemini_flash_model: str = "gemini-3-flash-preview"
+    # Tileset DNA extraction: per-attempt timeout (attempts follow GeminiClient.MAX_RETRIES)
+    gemini_dna_timeout_seconds: float = 15.0
     
     # Supabase
     supabase_url: str
     supabase_key: str
     supabase_storage_bucket: str = "sprites"
+    sprite_format: Literal["png", "webp"] = "png"  # Encoding for re-uploaded frames and lighting maps (webp = lossless, opt-in)
     
     # Redis
     redis_url: str = "redis://localhost:6379"
@@ -1,10 +1,11 @@
 """Database client modules."""
-from .supabase_client import supabase_service, get_supabase_client
+from .supabase_client import supabase_service, get_supabase_client, get_rest_client
 from .redis_client import redis_client, RedisClient
 
 __all__ = [
     "supabase_service",
     "get_supabase_client",
+    "get_rest_client",
     "redis_client",
     "RedisClient",
 ]
@@ -1,5 +1,6 @@
 import redis.asyncio as redis
 import asyncio
+import hashlib
 import json
 from typing import Optional
 from datetime import timedelta
@@ -9,6 +10,26 @@ from app.config import get_settings
 # Fast timeout for startup - don't block if Redis is unavailable
 REDIS_CONNECT_TIMEOUT = 3  # seconds
 
+# Project GET response cache; entries are dropped on every project write
+PROJECT_RESPONSE_TTL = 300  # seconds
+PROJECT_LIST_TTL = 60  # seconds
+PROJECT_LIST_KEY = "projects:list:body"
+PROJECT_LIST_GENERATION_KEY = "projects:list:gen"
+# Generation counters outlive any body they guard
+PROJECT_GENERATION_TTL = 86400  # seconds
+
+# SETEX KEYS[1] only if generation KEYS[2] still equals ARGV[1], so a reader
+# that raced a write can't re-cache the body it read before the write
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SETEX', KEYS[1], ARGV[2], ARGV[3])
+end
+"""
+
+# Reference images are immutable per storage URL; larger uploads are not cached
+REFERENCE_IMAGE_TTL = 86400  # seconds
+REFERENCE_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+
 
 class RedisClient:
     """Async Redis client for session and pipeline state management.
@@ -20,6 +41,8 @@ class RedisClient:
     def __init__(self):
         self.settings = get_settings()
         self._client: Optional[redis.Redis] = None
+        # Second client without response decoding, for binary values
+        self._bytes_client: Optional[redis.Redis] = None
         self._connected = False
     
     async def connect(self) -> None:
@@ -38,6 +61,11 @@ class RedisClient:
                     self._client.ping(),
                     timeout=REDIS_CONNECT_TIMEOUT
                 )
+                self._bytes_client = redis.from_url(
+                    self.settings.redis_url,
+                    socket_timeout=REDIS_CONNECT_TIMEOUT,
+                    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                )
                 self._connected = True
                 print("✅ Redis connected and verified")
             except asyncio.TimeoutError:
@@ -51,13 +79,15 @@ class RedisClient:
     
     async def disconnect(self) -> None:
         """Close Redis connection."""
-        if self._client:
-            try:
-                await self._client.close()
-            except Exception:
-                pass
-            self._client = None
-            self._connected = False
+        for client in (self._client, self._bytes_client):
+            if client:
+                try:
+                    await client.close()
+                except Exception:
+                    pass
+        self._client = None
+        self._bytes_client = None
+        self._connected = False
     
     @property
     def is_connected(self) -> bool:
@@ -127,6 +157,125 @@ class RedisClient:
             print(f"⚠️ Redis update_pipeline_stage failed: {e}")
             self._connected = False
     
+    # --- Project Response Cache ---
+    
+    def _project_key(self, project_id: str) -> str:
+        """Generate Redis key for a cached project response."""
+        return f"project:{project_id}"
+    
+    def _project_generation_key(self, project_id: str) -> str:
+        """Generate Redis key for a project's write counter."""
+        return f"project:{project_id}:gen"
+    
+    async def _get_generation(self, key: str) -> Optional[str]:
+        """Read a write counter ("0" if never written). None if Redis unavailable."""
+        if not self.is_connected:
+            return None
+        try:
+            return await self._client.get(key) or "0"
+        except Exception as e:
+            print(f"⚠️ Redis get {key} failed: {e}")
+            self._connected = False
+            return None
+    
+    async def _get_body(self, key: str) -> Optional[str]:
+        """Get a cached JSON response body. Returns None on miss or if Redis unavailable."""
+        if not self.is_connected:
+            return None
+        try:
+            return await self._client.get(key)
+        except Exception as e:
+            print(f"⚠️ Redis get {key} failed: {e}")
+            self._connected = False
+            return None
+    
+    async def _set_body(
+        self, key: str, generation_key: str, generation: Optional[str], body: bytes, ttl_seconds: int
+    ) -> None:
+        """
+        Cache an encoded JSON response body with TTL, unless a write bumped
+        generation_key since the caller read `generation` (taken before its
+        DB read). Silently skips if Redis unavailable.
+        """
+        if not self.is_connected or generation is None:
+            return
+        try:
+            await self._client.eval(_SET_IF_GENERATION, 2, key, generation_key, generation, ttl_seconds, body)
+        except Exception as e:
+            print(f"⚠️ Redis set {key} failed: {e}")
+            self._connected = False
+    
+    async def get_project_response(self, project_id: str) -> Optional[str]:
+        """Get the cached GET /projects/{id} JSON body."""
+        return await self._get_body(self._project_key(project_id))
+    
+    async def get_project_generation(self, project_id: str) -> Optional[str]:
+        """Get the project's write counter; read it before the DB on a cache miss."""
+        return await self._get_generation(self._project_generation_key(project_id))
+    
+    async def cache_project_response(self, project_id: str, body: bytes, generation: Optional[str]) -> None:
+        """Cache the GET /projects/{id} JSON body if the project wasn't written since `generation`."""
+        await self._set_body(
+            self._project_key(project_id), self._project_generation_key(project_id),
+            generation, body, PROJECT_RESPONSE_TTL,
+        )
+    
+    async def get_project_list(self) -> Optional[str]:
+        """Get the cached GET /projects JSON body."""
+        return await self._get_body(PROJECT_LIST_KEY)
+    
+    async def get_project_list_generation(self) -> Optional[str]:
+        """Get the project list's write counter; read it before the DB on a cache miss."""
+        return await self._get_generation(PROJECT_LIST_GENERATION_KEY)
+    
+    async def cache_project_list(self, body: bytes, generation: Optional[str]) -> None:
+        """Cache the GET /projects JSON body if no project was written since `generation`."""
+        await self._set_body(PROJECT_LIST_KEY, PROJECT_LIST_GENERATION_KEY, generation, body, PROJECT_LIST_TTL)
+    
+    async def invalidate_project(self, project_id: str) -> None:
+        """Bump the write counters and drop the cached responses after a project write."""
+        if not self.is_connected:
+            return
+        generation_key = self._project_generation_key(project_id)
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.incr(generation_key)
+                pipe.expire(generation_key, PROJECT_GENERATION_TTL)
+                pipe.incr(PROJECT_LIST_GENERATION_KEY)
+                pipe.expire(PROJECT_LIST_GENERATION_KEY, PROJECT_GENERATION_TTL)
+                pipe.delete(self._project_key(project_id), PROJECT_LIST_KEY)
+                await pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Redis invalidate_project failed: {e}")
+            self._connected = False
+    
+    # --- Reference Image Cache ---
+    
+    def _reference_key(self, url: str) -> str:
+        """Generate Redis key for a cached reference image, from its storage URL."""
+        return f"ref:{hashlib.blake2b(url.encode(), digest_size=16).hexdigest()}"
+    
+    async def get_reference_image(self, url: str) -> Optional[bytes]:
+        """Get cached reference image bytes. Returns None on miss or if Redis unavailable."""
+        if not self.is_connected or self._bytes_client is None:
+            return None
+        try:
+            return await self._bytes_client.get(self._reference_key(url))
+        except Exception as e:
+            print(f"⚠️ Redis get_reference_image failed: {e}")
+            self._connected = False
+            return None
+    
+    async def cache_reference_image(self, url: str, data: bytes) -> None:
+        """Cache reference image bytes by URL. Skips uploads over REFERENCE_IMAGE_MAX_BYTES."""
+        if not self.is_connected or self._bytes_client is None or len(data) > REFERENCE_IMAGE_MAX_BYTES:
+            return
+        try:
+            await self._bytes_client.setex(self._reference_key(url), REFERENCE_IMAGE_TTL, data)
+        except Exception as e:
+            print(f"⚠️ Redis cache_reference_image failed: {e}")
+            self._connected = False
+    
     # --- Session Operations ---
     
     def _session_key(self, session_id: str) -> str:
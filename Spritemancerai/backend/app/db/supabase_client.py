@@ -1,15 +1,119 @@
-from supabase import create_client, Client
+import asyncio
+import weakref
+
+import httpx
+import orjson
+from cachetools import TTLCache
+from pydantic import BaseModel
+from supabase import create_client, Client, ClientOptions
 from functools import lru_cache
-from typing import Optional
+from typing import AsyncIterator, Optional, Union
 
 from app.config import get_settings
+from app.db.redis_client import redis_client
+
+# Connection pool shared by every PostgREST/Storage call
+SUPABASE_MAX_CONNECTIONS = 60
+SUPABASE_MAX_KEEPALIVE = 40
+SUPABASE_KEEPALIVE_EXPIRY = 60.0  # seconds
+SUPABASE_RETRIES = 3
+SUPABASE_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Project rows are reused for this long so back-to-back reads within one flow (and
+# concurrent pollers) share a round-trip; every write below drops the cached row
+PROJECT_CACHE_TTL = 2.0  # seconds
+PROJECT_CACHE_MAX = 2048
+
+# Storage Cache-Control max-age: write-once objects vs. overwritable (upsert) ones
+IMMUTABLE_CACHE_SECONDS = 31536000  # one year
+UPSERT_CACHE_SECONDS = 3600  # Supabase default
+
+# Storage uploads are streamed from the caller's buffer in slices of this size
+UPLOAD_CHUNK_SIZE = 65536
+
+# Columns the dual pipeline status endpoint reads
+DUAL_STATUS_COLUMNS = (
+    "id,generation_mode,character_dna,responder_dna,"
+    "interaction_constraints,animation_script,responder_animation_script,"
+    "frame_urls,responder_frame_urls,spritesheet_url,responder_spritesheet_url,"
+    "suggested_responder_actions,responder_action_type,"
+    "action_type,difficulty_tier,perspective,animations"
+)
+
+# Columns update_frame_urls may write
+FRAME_URL_FIELDS = ("frame_urls", "responder_frame_urls")
+
+
+def _json_default(value):
+    """Splice pydantic models in as their pydantic-core JSON, skipping the dict round-trip."""
+    if isinstance(value, BaseModel):
+        return orjson.Fragment(value.model_dump_json())
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _encode_json(data) -> bytes:
+    """Encode a PostgREST request body with orjson."""
+    return orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _pool_limits() -> httpx.Limits:
+    """Bounded keep-alive pool so calls reuse TCP/TLS connections."""
+    return httpx.Limits(
+        max_connections=SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+    )
 
 
 @lru_cache
 def get_supabase_client() -> Client:
-    """Get cached Supabase client instance."""
+    """Get cached Supabase client instance backed by a pooled HTTP client."""
+    settings = get_settings()
+    http_client = httpx.Client(
+        timeout=SUPABASE_TIMEOUT,
+        transport=httpx.HTTPTransport(limits=_pool_limits(), retries=SUPABASE_RETRIES),
+    )
+    return create_client(
+        settings.supabase_url,
+        settings.supabase_key,
+        options=ClientOptions(httpx_client=http_client),
+    )
+
+
+@lru_cache
+def get_rest_client() -> httpx.AsyncClient:
+    """Get cached async client for direct PostgREST calls."""
     settings = get_settings()
-    return create_client(settings.supabase_url, settings.supabase_key)
+    return httpx.AsyncClient(
+        base_url=f"{settings.supabase_url}/rest/v1",
+        headers={
+            "apikey": settings.supabase_key,
+            "Authorization": f"Bearer {settings.supabase_key}",
+        },
+        timeout=SUPABASE_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(limits=_pool_limits(), retries=SUPABASE_RETRIES),
+    )
+
+
+@lru_cache
+def get_storage_client() -> httpx.AsyncClient:
+    """Get cached async client for direct Storage API calls."""
+    settings = get_settings()
+    return httpx.AsyncClient(
+        base_url=f"{settings.supabase_url}/storage/v1",
+        headers={
+            "apikey": settings.supabase_key,
+            "Authorization": f"Bearer {settings.supabase_key}",
+        },
+        timeout=SUPABASE_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(limits=_pool_limits(), retries=SUPABASE_RETRIES),
+    )
+
+
+async def _iter_chunks(data: memoryview) -> AsyncIterator[memoryview]:
+    """Yield zero-copy slices of a buffer for a streamed request body."""
+    for start in range(0, len(data), UPLOAD_CHUNK_SIZE):
+        yield data[start:start + UPLOAD_CHUNK_SIZE]
 
 
 class SupabaseService:
@@ -18,16 +122,56 @@ class SupabaseService:
     def __init__(self):
         self.client = get_supabase_client()
         self.settings = get_settings()
+        self._rest = get_rest_client()
+        self._storage = get_storage_client()
+        self._project_cache: TTLCache = TTLCache(maxsize=PROJECT_CACHE_MAX, ttl=PROJECT_CACHE_TTL)
+        # DUAL_STATUS_COLUMNS projections, kept apart so they're never served as full rows
+        self._dual_status_cache: TTLCache = TTLCache(maxsize=PROJECT_CACHE_MAX, ttl=PROJECT_CACHE_TTL)
+        self._project_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+    
+    async def _forget_project(self, project_id: str) -> None:
+        """Drop the cached row (and cached API responses) after a write."""
+        self._project_cache.pop(project_id, None)
+        self._dual_status_cache.pop(project_id, None)
+        await redis_client.invalidate_project(project_id)
+    
+    async def close(self) -> None:
+        """Close pooled connections (call on app shutdown)."""
+        await self._rest.aclose()
+        await self._storage.aclose()
+        self.client.postgrest.session.close()
     
     # --- Storage Operations ---
     
-    async def upload_image(self, bucket: str, path: str, file_bytes: bytes, content_type: str = "image/png", upsert: bool = False) -> str:
-        """Upload an image to Supabase Storage."""
-        self.client.storage.from_(bucket).upload(
-            path=path,
-            file=file_bytes,
-            file_options={"content-type": content_type, "upsert": str(upsert).lower()}
+    async def upload_image(
+        self,
+        bucket: str,
+        path: str,
+        file_bytes: Union[bytes, bytearray, memoryview],
+        content_type: str = "image/png",
+        upsert: bool = False,
+    ) -> str:
+        """
+        Upload an image to Supabase Storage on the async client.
+        
+        Any buffer works (e.g. the array cv2.imencode returns): the body is sent as
+        a raw stream of slices of it, so it is never copied into a multipart form.
+        Without upsert a path can never be overwritten, so its public URL is served
+        with a one-year max-age and CDNs/browsers skip revalidation entirely.
+        """
+        data = memoryview(file_bytes).cast("B")
+        cache_seconds = UPSERT_CACHE_SECONDS if upsert else IMMUTABLE_CACHE_SECONDS
+        response = await self._storage.post(
+            f"/object/{bucket}/{path}",
+            content=_iter_chunks(data),
+            headers={
+                "Content-Type": content_type,
+                "Content-Length": str(len(data)),
+                "Cache-Control": f"max-age={cache_seconds}",
+                "x-upsert": str(upsert).lower(),
+            },
         )
+        response.raise_for_status()
         return self.get_public_url(bucket, path)
     
     def get_public_url(self, bucket: str, path: str) -> str:
@@ -48,18 +192,101 @@ class SupabaseService:
             "description": description,
             "status": "created",
         }
-        result = self.client.table("projects").insert(data).execute()
-        return result.data[0] if result.data else None
+        return await self.insert_project(data)
+    
+    async def insert_project(self, row: dict) -> Optional[dict]:
+        """Insert a project row on the async REST client; returns the stored row."""
+        response = await self._rest.post(
+            "/projects",
+            content=_encode_json(row),
+            headers={"Content-Type": "application/json", "Prefer": "return=representation"},
+        )
+        response.raise_for_status()
+        rows = orjson.loads(response.content)
+        if not rows:
+            return None
+        await self._forget_project(rows[0]["id"])
+        return rows[0]
     
-    async def get_project(self, project_id: str) -> Optional[dict]:
-        """Get project by ID."""
-        result = self.client.table("projects").select("*").eq("id", project_id).single().execute()
-        return result.data
+    async def insert_project_if_missing(self, row: dict) -> bool:
+        """
+        Insert a project row unless one with the same id exists (ON CONFLICT DO NOTHING).
+        Single round-trip with no check-then-insert race; returns True if inserted.
+        """
+        response = await self._rest.post(
+            "/projects",
+            params={"on_conflict": "id"},
+            content=_encode_json(row),
+            headers={
+                "Content-Type": "application/json",
+                "Prefer": "resolution=ignore-duplicates,return=representation",
+            },
+        )
+        response.raise_for_status()
+        await self._forget_project(row["id"])
+        return bool(orjson.loads(response.content))
+    
+    async def get_project(self, project_id: str, fresh: bool = False) -> Optional[dict]:
+        """
+        Get project by ID.
+        
+        Served from a short-lived cache; concurrent misses for one project share a
+        single query. Pass fresh=True for read-modify-write callers that mutate the row.
+        """
+        if fresh:
+            return await self.select_project(project_id)
+        
+        project = self._project_cache.get(project_id)
+        if project is not None:
+            return project
+        
+        lock = self._project_locks.get(project_id)
+        if lock is None:
+            lock = self._project_locks[project_id] = asyncio.Lock()
+        async with lock:
+            project = self._project_cache.get(project_id)
+            if project is None:
+                project = await self.select_project(project_id)
+                if project is not None:
+                    self._project_cache[project_id] = project
+        return project
+    
+    async def select_project(self, project_id: str, columns: str = "*") -> Optional[dict]:
+        """
+        Read one project row (uncached) on the pooled async PostgREST client.
+        Returns None when no row matches.
+        """
+        response = await self._rest.get(
+            "/projects", params={"select": columns, "id": f"eq.{project_id}"}
+        )
+        response.raise_for_status()
+        rows = orjson.loads(response.content)
+        return rows[0] if rows else None
+    
+    async def select_projects(self, columns: str = "*") -> list[dict]:
+        """Read every project row, newest first, on the pooled async PostgREST client."""
+        response = await self._rest.get(
+            "/projects", params={"select": columns, "order": "created_at.desc"}
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
     
     async def update_project(self, project_id: str, updates: dict) -> Optional[dict]:
-        """Update project fields."""
-        result = self.client.table("projects").update(updates).eq("id", project_id).execute()
-        return result.data[0] if result.data else None
+        """
+        Update project fields in a single round-trip on the async PostgREST client.
+        
+        Values may be pydantic models; the body is encoded once with orjson.
+        """
+        response = await self._rest.patch(
+            "/projects",
+            params={"id": f"eq.{project_id}"},
+            content=_encode_json(updates),
+            headers={"Content-Type": "application/json", "Prefer": "return=representation"},
+        )
+        response.raise_for_status()
+        await self._forget_project(project_id)
+        rows = orjson.loads(response.content)
+        return rows[0] if rows else None
     
     async def list_projects(self, user_id: str, limit: int = 50) -> list[dict]:
         """List projects for a user."""
@@ -81,6 +308,7 @@ class SupabaseService:
             "character_dna": dna,
             "status": "dna_extracted"
         }).eq("id", project_id).execute()
+        await self._forget_project(project_id)
     
     async def get_character_dna(self, project_id: str) -> Optional[dict]:
         """Get Character DNA for a project."""
@@ -101,6 +329,7 @@ class SupabaseService:
             "animation_script": script,
             "status": "script_generated"
         }).eq("id", project_id).execute()
+        await self._forget_project(project_id)
     
     async def get_animation_script(self, project_id: str) -> Optional[dict]:
         """Get animation script for a project."""
@@ -121,7 +350,28 @@ class SupabaseService:
         }
         if spritesheet_url:
             update_data["spritesheet_url"] = spritesheet_url
-        self.client.table("projects").update(update_data).eq("id", project_id).execute()
+        await asyncio.to_thread(
+            lambda: self.client.table("projects").update(update_data).eq("id", project_id).execute()
+        )
+        await self._forget_project(project_id)
+    
+    async def update_frame_urls(self, project_id: str, field: str, frame_urls: list) -> None:
+        """
+        Overwrite one character's frame URL list.
+        
+        Single PATCH on the pooled async PostgREST client; return=minimal means
+        no row is serialized back.
+        """
+        if field not in FRAME_URL_FIELDS:
+            raise ValueError(f"Unknown frame URL field: {field}")
+        response = await self._rest.patch(
+            "/projects",
+            params={"id": f"eq.{project_id}"},
+            json={field: frame_urls},
+            headers={"Prefer": "return=minimal"},
+        )
+        response.raise_for_status()
+        await self._forget_project(project_id)
     
     async def get_frame_urls(self, project_id: str) -> Optional[dict]:
         """Get frame URLs for a project (including responder frames for dual mode)."""
@@ -169,12 +419,14 @@ class SupabaseService:
             "interaction_constraints": interaction_constraints,
             "status": "dna_extracted"
         }).eq("id", project_id).execute()
+        await self._forget_project(project_id)
     
     async def save_responder_script(self, project_id: str, script: dict) -> None:
         """Save responder animation script."""
         self.client.table("projects").update({
             "responder_animation_script": script,
         }).eq("id", project_id).execute()
+        await self._forget_project(project_id)
     
     async def save_dual_frame_urls(
         self, 
@@ -195,23 +447,30 @@ class SupabaseService:
         if responder_spritesheet:
             update_data["responder_spritesheet_url"] = responder_spritesheet
         self.client.table("projects").update(update_data).eq("id", project_id).execute()
+        await self._forget_project(project_id)
     
     async def get_dual_project_data(self, project_id: str) -> Optional[dict]:
-        """Get all dual-related fields for a project."""
-        result = (
-            self.client.table("projects")
-            .select(
-                "id, generation_mode, character_dna, responder_dna, "
-                "interaction_constraints, animation_script, responder_animation_script, "
-                "frame_urls, responder_frame_urls, spritesheet_url, responder_spritesheet_url, "
-                "suggested_responder_actions, responder_action_type, "
-                "action_type, difficulty_tier, perspective, animations"
-            )
-            .eq("id", project_id)
-            .single()
-            .execute()
-        )
-        return result.data
+        """
+        Get all dual-related fields for a project, or None if it doesn't exist.
+        
+        A full row already in the project cache is reused; otherwise only
+        DUAL_STATUS_COLUMNS are fetched. The projection is cached like a row
+        (same TTL, dropped on writes) and concurrent pollers share one query.
+        """
+        project = self._project_cache.get(project_id) or self._dual_status_cache.get(project_id)
+        if project is not None:
+            return project
+        
+        lock = self._project_locks.get(project_id)
+        if lock is None:
+            lock = self._project_locks[project_id] = asyncio.Lock()
+        async with lock:
+            project = self._project_cache.get(project_id) or self._dual_status_cache.get(project_id)
+            if project is None:
+                project = await self.select_project(project_id, DUAL_STATUS_COLUMNS)
+                if project is not None:
+                    self._dual_status_cache[project_id] = project
+        return project
     
     # --- Animation-Specific Storage (Multiple Animations per Project) ---
     
@@ -230,7 +489,7 @@ class SupabaseService:
         from datetime import datetime
         
         # Get existing animations dict
-        project = await self.get_project(project_id)
+        project = await self.get_project(project_id, fresh=True)
         animations = project.get("animations") or {} if project else {}
         
         # Update this animation type
@@ -245,6 +504,7 @@ class SupabaseService:
         self.client.table("projects").update({
             "animations": animations
         }).eq("id", project_id).execute()
+        await self._forget_project(project_id)
     
     async def get_animation_frames(
         self, 
@@ -298,7 +558,7 @@ class SupabaseService:
     
     async def approve_animation(self, project_id: str, animation_type: str) -> bool:
         """Mark an animation as approved by user."""
-        project = await self.get_project(project_id)
+        project = await self.get_project(project_id, fresh=True)
         if not project:
             return False
         
@@ -312,6 +572,7 @@ class SupabaseService:
         self.client.table("projects").update({
             "animations": animations
         }).eq("id", project_id).execute()
+        await self._forget_project(project_id)
         
         return True
 
@@ -0,0 +1,34 @@
+"""
+Shared outbound HTTP client.
+
+One process-wide httpx.AsyncClient for downloads (storage objects, reference
+images): HTTP/2 multiplexes concurrent GETs over a single TLS session and the
+keep-alive pool is reused across requests instead of reconnecting per handler.
+"""
+from functools import lru_cache
+
+import httpx
+
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE = 50
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+
+@lru_cache
+def get_http_client() -> httpx.AsyncClient:
+    """Get the cached app-wide async client (closed by close_http_client on shutdown)."""
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        ),
+    )
+
+
+async def close_http_client() -> None:
+    """Close the shared client's pooled connections, if it was ever created."""
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
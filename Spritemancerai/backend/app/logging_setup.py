@@ -0,0 +1,49 @@
+"""
+Non-blocking logging for the app.* logger namespace.
+
+Request handlers only enqueue log records; a background QueueListener thread
+does the formatting and the blocking stdout write, so log I/O never runs on
+the event loop.
+"""
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+def start_logging(level: int = logging.INFO) -> None:
+    """Attach a QueueHandler to the app logger and start the listener thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(level)
+    app_logger.addHandler(_queue_handler)
+    app_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush pending records and stop the listener thread."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger("app").removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
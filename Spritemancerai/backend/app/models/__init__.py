@@ -4,6 +4,7 @@ from .animation_script import AnimationScript, AnimationFrame, FrameBudget
 from .pipeline_state import PipelineState, PipelineStage
 from .project import Project, ProjectListItem
 from .dual_character_dna import (
+    DualPipelineErrorCode,
     DualCharacterDNA,
     InteractionConstraints,
     ResponderSuggestion,
@@ -36,6 +37,7 @@ __all__ = [
     "PipelineStage",
     "Project",
     "ProjectListItem",
+    "DualPipelineErrorCode",
     "DualCharacterDNA",
     "InteractionConstraints",
     "ResponderSuggestion",
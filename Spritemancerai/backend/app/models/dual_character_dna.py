@@ -1,10 +1,25 @@
 """Dual-character DNA models for relational animations."""
+from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Literal, Optional
 
 from .character_dna import CharacterDNA
 
 
+class DualPipelineErrorCode(str, Enum):
+    """Error codes specific to dual-character pipeline."""
+    MISSING_INSTIGATOR_IMAGE = "MISSING_INSTIGATOR_IMAGE"
+    MISSING_RESPONDER_IMAGE = "MISSING_RESPONDER_IMAGE"
+    INSTIGATOR_DNA_FAILED = "INSTIGATOR_DNA_FAILED"
+    RESPONDER_DNA_FAILED = "RESPONDER_DNA_FAILED"
+    INSTIGATOR_SCRIPT_FAILED = "INSTIGATOR_SCRIPT_FAILED"
+    RESPONDER_SCRIPT_FAILED = "RESPONDER_SCRIPT_FAILED"
+    TEMPORAL_BINDING_MISMATCH = "TEMPORAL_BINDING_MISMATCH"
+    RESPONDER_ACTION_NOT_CONFIRMED = "RESPONDER_ACTION_NOT_CONFIRMED"
+    INSTIGATOR_SPRITE_FAILED = "INSTIGATOR_SPRITE_FAILED"
+    RESPONDER_SPRITE_FAILED = "RESPONDER_SPRITE_FAILED"
+
+
 class InteractionConstraints(BaseModel):
     """
     Physics-based interaction constraints between two characters.
@@ -11,9 +11,12 @@ Specialized DNA schemas for different tile types:
 
 Each schema is optimized for its specific use case to generate game-ready assets.
 """
+import weakref
 from enum import Enum
+from functools import cached_property, lru_cache
 from typing import Optional, Literal
-from pydantic import BaseModel, Field
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 # ============================================================================
@@ -85,13 +88,48 @@ class TilesetFormat(str, Enum):
     RPG_MAKER = "rpg_maker"     # RPG Maker A2 format
 
 
-class TerrainTilesetDNA(BaseModel):
+# ============================================================================
+# Palette Helpers
+# ============================================================================
+
+@lru_cache(maxsize=256)
+def hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
+    """Parse "#RRGGBB" (or "RRGGBB") into an (r, g, b) tuple; presets share a few dozen colors."""
+    hex_color = hex_color.lstrip('#')
+    return int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+
+
+class PaletteMixin:
+    """Cached views of a frozen palette DNA, computed once per DNA object."""
+    
+    @cached_property
+    def json_dict(self) -> dict:
+        """model_dump(mode="json"), shared by every response for this DNA; don't mutate."""
+        return self.model_dump(mode="json")
+
+
+# Live palette DNAs keyed by (class, field values). Entries vanish with their last user.
+_dna_pool: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+
+def intern_dna(dna: PaletteMixin) -> PaletteMixin:
+    """
+    Return the live DNA equal to dna (e.g. the matching preset), registering dna if none.
+    Equal DNAs then share one object, along with its cached json_dict.
+    """
+    key = (type(dna), *(getattr(dna, name) for name in type(dna).model_fields))
+    return _dna_pool.setdefault(key, dna)
+
+
+class TerrainTilesetDNA(PaletteMixin, BaseModel):
     """
     DNA for complete terrain tileset generation.
     
     Generates a full set of tiles with edges, corners, and fill tiles
     ready for autotiling in Godot/Unity.
     """
+    model_config = ConfigDict(frozen=True)  # hashable; preset instances are shared
+
     terrain_type: TerrainType = Field(
         description="Type of terrain (grass, dirt, stone, brick, etc.)"
     )
@@ -103,7 +141,7 @@ class TerrainTilesetDNA(BaseModel):
         default=32,
         description="Size of each tile in pixels (16, 32, 64)"
     )
-    color_palette: list[str] = Field(
+    color_palette: tuple[str, ...] = Field(
         min_length=2,
         max_length=6,
         description="3-6 hex colors for the terrain"
@@ -167,7 +205,7 @@ class PlatformStyle(str, Enum):
     ORGANIC = "organic"         # Natural, uneven edges
 
 
-class PlatformTileDNA(BaseModel):
+class PlatformTileDNA(PaletteMixin, BaseModel):
     """
     DNA for platformer platform tiles.
     
@@ -178,6 +216,8 @@ class PlatformTileDNA(BaseModel):
     - Single block
     - Optional slopes
     """
+    model_config = ConfigDict(frozen=True)  # hashable; preset instances are shared
+
     platform_type: PlatformType = Field(
         description="Type of platform behavior"
     )
@@ -192,7 +232,7 @@ class PlatformTileDNA(BaseModel):
         default=32,
         description="Size of each tile in pixels"
     )
-    color_palette: list[str] = Field(
+    color_palette: tuple[str, ...] = Field(
         min_length=2,
         max_length=5,
         description="2-5 hex colors for the platform"
@@ -240,7 +280,7 @@ class WallStyle(str, Enum):
     ANCIENT = "ancient"         # Very old, worn
 
 
-class WallTilesetDNA(BaseModel):
+class WallTilesetDNA(PaletteMixin, BaseModel):
     """
     DNA for wall tileset generation.
     
@@ -251,6 +291,8 @@ class WallTilesetDNA(BaseModel):
     - Left/right edges
     - Corners
     """
+    model_config = ConfigDict(frozen=True)  # hashable; preset instances are shared
+
     wall_type: WallType = Field(
         description="Type of wall (castle, dungeon, cave, etc.)"
     )
@@ -262,7 +304,7 @@ class WallTilesetDNA(BaseModel):
         default=32,
         description="Size of each tile in pixels"
     )
-    color_palette: list[str] = Field(
+    color_palette: tuple[str, ...] = Field(
         min_length=2,
         max_length=5,
         description="2-5 hex colors"
@@ -323,13 +365,15 @@ class SeamlessMode(str, Enum):
     LOOP_ONLY = "loop_only"     # Only animation loops, not spatial
 
 
-class AnimatedTileDNA(BaseModel):
+class AnimatedTileDNA(PaletteMixin, BaseModel):
     """
     Enhanced DNA for animated environment tiles.
     
     Generates seamless animated tile strips for environmental effects
     like water, lava, fire, etc.
     """
+    model_config = ConfigDict(frozen=True)  # hashable; preset instances are shared
+
     tile_type: AnimatedTileType = Field(
         description="Type of animated tile"
     )
@@ -346,7 +390,7 @@ class AnimatedTileDNA(BaseModel):
         default=32,
         description="Size of each tile in pixels"
     )
-    color_palette: list[str] = Field(
+    color_palette: tuple[str, ...] = Field(
         min_length=2,
         max_length=5,
         description="2-5 hex colors"
@@ -390,12 +434,14 @@ class DecorationType(str, Enum):
     CUSTOM = "custom"
 
 
-class DecorationTileDNA(BaseModel):
+class DecorationTileDNA(PaletteMixin, BaseModel):
     """
     DNA for decoration and prop sprites.
     
     Generates single static sprites for environmental decoration.
     """
+    model_config = ConfigDict(frozen=True)  # hashable; preset instances are shared
+
     decoration_type: DecorationType = Field(
         description="Type of decoration/prop"
     )
@@ -403,7 +449,7 @@ class DecorationTileDNA(BaseModel):
         default="32x32",
         description="Sprite size (e.g., '32x32', '64x32')"
     )
-    color_palette: list[str] = Field(
+    color_palette: tuple[str, ...] = Field(
         min_length=2,
         max_length=4,
         description="2-4 hex colors"
@@ -15,6 +15,8 @@ from PIL import Image
 
 from app.services.gemini_client import gemini_client
 from app.db.supabase_client import supabase_service
+from app.db.redis_client import redis_client
+from app.http_client import get_http_client
 from app.models import (
     EffectDNA, TileDNA, UIElementDNA, BackgroundDNA,
     EFFECT_DNA_SCHEMA, TILE_DNA_SCHEMA, UI_ELEMENT_DNA_SCHEMA, BACKGROUND_DNA_SCHEMA,
@@ -723,6 +725,7 @@ Generate a single static idle pose that can be used as a reference for generatin
                 if response.data:
                     db_project_id = response.data[0]['id']
                     project_id = db_project_id  # Use database ID as the canonical ID
+                    await redis_client.invalidate_project(project_id)
                     print(f"📁 Project created in DB: {project_id}")
                     break
             except Exception as db_error:
@@ -1698,14 +1701,12 @@ Generate a single static idle pose as a reference for animation frames."""
         spritesheet_base64 = None
         if pipeline.state.spritesheet_url:
             try:
-                import httpx
-                async with httpx.AsyncClient() as client:
-                    resp = await client.get(pipeline.state.spritesheet_url, timeout=30)
-                    if resp.status_code == 200:
-                        ss_bytes = resp.content
-                        if request.remove_background:
-                            ss_bytes = apply_background_removal(ss_bytes, method="white")
-                        spritesheet_base64 = base64.b64encode(ss_bytes).decode('utf-8')
+                resp = await get_http_client().get(pipeline.state.spritesheet_url, timeout=30)
+                if resp.status_code == 200:
+                    ss_bytes = resp.content
+                    if request.remove_background:
+                        ss_bytes = apply_background_removal(ss_bytes, method="white")
+                    spritesheet_base64 = base64.b64encode(ss_bytes).decode('utf-8')
             except Exception as e:
                 print(f"⚠️ Could not fetch spritesheet: {e}")
         
@@ -4,9 +4,9 @@ from typing import Literal
 import io
 import json
 import zipfile
-import httpx
 
 from app.db.supabase_client import supabase_service
+from app.http_client import get_http_client
 
 router = APIRouter()
 
@@ -22,10 +22,14 @@ class ExportRequest(BaseModel):
 
 async def download_image(url: str) -> bytes:
     """Download image from URL."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        return resp.content
+    resp = await get_http_client().get(url)
+    resp.raise_for_status()
+    return resp.content
+
+
+def is_png(image_bytes: bytes) -> bool:
+    """Check the PNG signature (stored frames may be WebP, see SPRITE_FORMAT)."""
+    return image_bytes[:8] == b"\x89PNG\r\n\x1a\n"
 
 
 def convert_image(image_bytes: bytes, target_format: str, transparent: bool = True) -> bytes:
@@ -148,7 +152,7 @@ async def export_spritesheet(request: ExportRequest):
         image_bytes = await download_image(spritesheet_url)
         
         # Convert format if needed
-        if request.format != "png" or not request.transparent:
+        if request.format != "png" or not request.transparent or not is_png(image_bytes):
             image_bytes = convert_image(image_bytes, request.format, request.transparent)
         
         # Upload converted file
@@ -249,7 +253,7 @@ async def export_individual_frames(request: ExportRequest):
         with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
             for i, frame_bytes in enumerate(frame_images):
                 # Convert format if needed
-                if request.format != "png" or not request.transparent:
+                if request.format != "png" or not request.transparent or not is_png(frame_bytes):
                     frame_bytes = convert_image(frame_bytes, request.format, request.transparent)
                 
                 # Add to ZIP
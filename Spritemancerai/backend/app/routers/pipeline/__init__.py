@@ -10,15 +10,20 @@ from .repair import router as repair_router
 from .utils import router as utils_router
 from .lighting import router as lighting_router
 
+# Lives with the dual models so services can raise it
+from app.models import DualPipelineErrorCode
+
 # Re-export schemas for backward compatibility
 from .schemas import (
-    DualPipelineErrorCode,
     PipelineStartRequest,
     FrameBudgetRequest,
     DNAEditRequest,
     IntentConfirmRequest,
     RepairRequest,
+    Pivot,
     PivotUpdateRequest,
+    ScriptFrame,
+    ScriptUpdate,
     ScriptUpdateRequest,
     DualPipelineRequest,
     ResponderConfirmRequest,
@@ -45,7 +50,10 @@ __all__ = [
     "DNAEditRequest",
     "IntentConfirmRequest",
     "RepairRequest",
+    "Pivot",
     "PivotUpdateRequest",
+    "ScriptFrame",
+    "ScriptUpdate",
     "ScriptUpdateRequest",
     "DualPipelineRequest",
     "ResponderConfirmRequest",
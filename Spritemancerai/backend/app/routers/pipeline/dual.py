@@ -2,16 +2,22 @@
 Dual-character pipeline endpoints.
 Handles /dual/* endpoints for two-character animations.
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request
 
 from app.db.supabase_client import supabase_service
+from app.models import CharacterDNA, AnimationScript, InteractionConstraints, DualPipelineErrorCode
+from app.services.dual_pipeline_orchestrator import DualPipelineError, DualPipelineOrchestrator
+from app.services.stages import compute_frame_budget, generate_biomech_script, generate_responder_script
 from app.routers.websocket import send_stage_update, send_pipeline_complete
 
 from .schemas import DualPipelineRequest, ResponderConfirmRequest
 from .helpers import (
     get_project_or_404,
-    download_image,
-    handle_pipeline_error,
+    fetch_images_cached,
+    report_pipeline_errors,
+    conditional_json_response,
 )
 
 router = APIRouter(prefix="/dual")
@@ -23,8 +29,6 @@ async def generate_dual_script(request: DualPipelineRequest):
     Generate animation scripts for both instigator and responder (Dual Stages 1-7).
     Requires two reference images uploaded to the project.
     """
-    from app.services.dual_pipeline_orchestrator import DualPipelineOrchestrator
-    
     project_id = request.project_id
     
     project = await get_project_or_404(project_id)
@@ -37,12 +41,13 @@ async def generate_dual_script(request: DualPipelineRequest):
         )
     
     # Download both reference images
-    instigator_image = await download_image(project["reference_image_url"])
-    responder_image = await download_image(project["responder_reference_url"])
+    instigator_image, responder_image = await fetch_images_cached(
+        [project["reference_image_url"], project["responder_reference_url"]]
+    )
     
     pipeline = DualPipelineOrchestrator(project_id)
     
-    try:
+    async with report_pipeline_errors(project_id, "Dual Script Generation"):
         # Stage 1: Dual DNA Extraction
         await send_stage_update(project_id, 1, "Dual DNA Extraction", "start")
         dual_dna = await pipeline.run_stage_1(instigator_image, responder_image)
@@ -75,8 +80,8 @@ async def generate_dual_script(request: DualPipelineRequest):
             "action_type": request.action_type,
             "difficulty_tier": request.difficulty_tier,
             "perspective": request.perspective,
-            "character_dna": pipeline.state.character_dna.model_dump() if pipeline.state.character_dna else None,
-            "responder_dna": pipeline.state.responder_dna.model_dump() if pipeline.state.responder_dna else None,
+            "character_dna": pipeline.state.character_dna,
+            "responder_dna": pipeline.state.responder_dna,
             "interaction_constraints": pipeline.state.interaction_constraints,
             "suggested_responder_actions": pipeline.state.suggested_responder_actions,
         })
@@ -90,9 +95,6 @@ async def generate_dual_script(request: DualPipelineRequest):
             "frame_budget": frame_budget.model_dump(),
             "suggested_responder_actions": suggestions.model_dump(),
         }
-    except Exception as e:
-        await handle_pipeline_error(e, project_id, "Dual Script Generation")
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/confirm-responder")
@@ -100,9 +102,6 @@ async def confirm_responder(request: ResponderConfirmRequest):
     """
     Confirm user-selected responder action and generate both scripts.
     """
-    from app.models import CharacterDNA, InteractionConstraints
-    from app.services.stages import compute_frame_budget, generate_biomech_script, generate_responder_script
-    
     project_id = request.project_id
     
     project = await get_project_or_404(project_id)
@@ -114,7 +113,7 @@ async def confirm_responder(request: ResponderConfirmRequest):
     responder_dna = CharacterDNA(**project["responder_dna"])
     interaction = InteractionConstraints(**project["interaction_constraints"])
     
-    try:
+    async with report_pipeline_errors(project_id, "Dual Script Confirmation"):
         # Compute frame budget
         frame_budget = compute_frame_budget(
             action_type=project.get("action_type") or "Attack",
@@ -154,8 +153,8 @@ async def confirm_responder(request: ResponderConfirmRequest):
         
         # Save scripts
         await supabase_service.update_project(project_id, {
-            "animation_script": instigator_script.model_dump(),
-            "responder_animation_script": responder_script.model_dump(),
+            "animation_script": instigator_script,
+            "responder_animation_script": responder_script,
             "responder_action_type": request.responder_action,
         })
         
@@ -166,9 +165,6 @@ async def confirm_responder(request: ResponderConfirmRequest):
             "responder_script": responder_script.model_dump(),
             "frame_count": len(instigator_script.frames),
         }
-    except Exception as e:
-        await handle_pipeline_error(e, project_id, "Dual Script Confirmation")
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-sprites")
@@ -177,10 +173,6 @@ async def generate_dual_sprites(request: DualPipelineRequest):
     Generate sprite images for both characters (Dual Stages 8-10).
     Requires both animation scripts to exist.
     """
-    from app.services.dual_pipeline_orchestrator import DualPipelineOrchestrator
-    from app.models import CharacterDNA, AnimationScript
-    from app.services.stages import compute_frame_budget
-    
     project_id = request.project_id
     
     project = await get_project_or_404(project_id)
@@ -190,8 +182,9 @@ async def generate_dual_sprites(request: DualPipelineRequest):
         raise HTTPException(status_code=400, detail="No responder script. Run /dual/confirm-responder first.")
     
     # Download reference images
-    instigator_image = await download_image(project["reference_image_url"])
-    responder_image = await download_image(project["responder_reference_url"])
+    instigator_image, responder_image = await fetch_images_cached(
+        [project["reference_image_url"], project["responder_reference_url"]]
+    )
     
     # Setup pipeline
     pipeline = DualPipelineOrchestrator(project_id)
@@ -212,16 +205,29 @@ async def generate_dual_sprites(request: DualPipelineRequest):
         perspective=project.get("perspective") or request.perspective,
     )
     
-    try:
-        # Stage 8: Instigator Image Generation
-        await send_stage_update(project_id, 8, "Instigator Sprites", "start")
-        ins_spritesheet = await pipeline.run_stage_8(instigator_image)
-        await send_stage_update(project_id, 8, "Instigator Sprites", "complete")
+    async with report_pipeline_errors(project_id, "Dual Sprite Generation"):
+        # Stages 8 + 9: Instigator and Responder Image Generation run concurrently;
+        # they read separate DNA/scripts and write separate spritesheet URLs
+        async def generate_sprites(stage: int, stage_name: str, run_stage, image: bytes) -> bytes:
+            spritesheet = await run_stage(image)
+            await send_stage_update(project_id, stage, stage_name, "complete")
+            return spritesheet
         
-        # Stage 9: Responder Image Generation
+        await send_stage_update(project_id, 8, "Instigator Sprites", "start")
         await send_stage_update(project_id, 9, "Responder Sprites", "start")
-        resp_spritesheet = await pipeline.run_stage_9(responder_image)
-        await send_stage_update(project_id, 9, "Responder Sprites", "complete")
+        # return_exceptions lets the sibling stage settle before the request
+        # fails, so nothing keeps uploading or reporting after the 500
+        ins_spritesheet, resp_spritesheet = await asyncio.gather(
+            generate_sprites(8, "Instigator Sprites", pipeline.run_stage_8, instigator_image),
+            generate_sprites(9, "Responder Sprites", pipeline.run_stage_9, responder_image),
+            return_exceptions=True,
+        )
+        for branch_result, code in (
+            (ins_spritesheet, DualPipelineErrorCode.INSTIGATOR_SPRITE_FAILED),
+            (resp_spritesheet, DualPipelineErrorCode.RESPONDER_SPRITE_FAILED),
+        ):
+            if isinstance(branch_result, BaseException):
+                raise DualPipelineError(code, str(branch_result)) from branch_result
         
         # Stage 10: Post-Processing (both)
         await send_stage_update(project_id, 10, "Post-Processing", "start")
@@ -257,19 +263,22 @@ async def generate_dual_sprites(request: DualPipelineRequest):
                 "frame_count": len(pipeline.state.responder_frame_urls),
             },
         }
-    except Exception as e:
-        await handle_pipeline_error(e, project_id, "Dual Sprite Generation")
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{project_id}/status")
-async def get_dual_pipeline_status(project_id: str):
-    """Get current dual pipeline status for a project."""
-    project = await get_project_or_404(project_id)
+async def get_dual_pipeline_status(project_id: str, request: Request):
+    """
+    Get current dual pipeline status for a project.
+    Carries an ETag so unchanged polls get an empty 304.
+    """
+    # Projected, briefly cached read: only the columns returned below, not select *
+    project = await supabase_service.get_dual_project_data(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
     
     is_dual = project.get("generation_mode") == "dual"
     
-    return {
+    return conditional_json_response(request, {
         "project_id": project_id,
         "generation_mode": project.get("generation_mode", "single"),
         "is_dual": is_dual,
@@ -296,4 +305,4 @@ async def get_dual_pipeline_status(project_id: str):
         "action_type": project.get("action_type"),
         "difficulty_tier": project.get("difficulty_tier"),
         "perspective": project.get("perspective"),
-    }
+    })
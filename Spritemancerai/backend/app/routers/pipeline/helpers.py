@@ -2,17 +2,32 @@
 Common helper utilities for pipeline endpoints.
 Reduces code duplication across pipeline submodules.
 """
-import traceback
-from typing import Optional
+import asyncio
+import hashlib
+import logging
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Optional, Union
 
 import httpx
 import cv2
 import numpy as np
-from fastapi import HTTPException
+import orjson
+from cachetools import TTLCache
+from fastapi import HTTPException, Request, Response
 
+from app.config import get_settings
 from app.db.supabase_client import supabase_service
+from app.http_client import get_http_client
+from app.services.bbox_numba import alpha_bbox
 from app.routers.websocket import send_stage_update
 
+logger = logging.getLogger(__name__)
+
+# Polled GETs: browsers may reuse a response for a second, then must revalidate
+POLL_CACHE_CONTROL = "private, max-age=1, must-revalidate"
+
 
 async def get_project_or_404(project_id: str) -> dict:
     """Get project or raise 404 HTTPException."""
@@ -43,42 +58,150 @@ async def require_animation_script(project: dict) -> None:
         )
 
 
+# Chunk size for streamed downloads (64 KiB)
+DOWNLOAD_CHUNK_SIZE = 65536
+# Images downloaded-and-decoded at once by download_decoded_images; bounds open
+# streams and in-progress decodes per request (bodies still land in image_cache)
+DECODE_CONCURRENCY = 8
+
+
+async def _stream_into(client: httpx.AsyncClient, url: str) -> bytearray:
+    """Stream a response body into a single growable buffer."""
+    buf = bytearray()
+    async with client.stream("GET", url) as resp:
+        async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+            buf.extend(chunk)
+    return buf
+
+
+async def fetch_buffer(url: str) -> bytearray:
+    """
+    Download URL into a mutable buffer.
+    Use when the result is only decoded (np.frombuffer accepts it without a copy).
+    """
+    return await _stream_into(get_http_client(), url)
+
+
+async def fetch_bytes(url: str) -> bytes:
+    """Download URL by streaming chunks instead of buffering the full response."""
+    return bytes(await fetch_buffer(url))
+
+
+# Downloaded images keyed by URL hash -> (etag, bytes, fetched_at). Entries younger than
+# IMAGE_CACHE_FRESH_SECONDS are served without a request; older ones are revalidated with
+# If-None-Match, so an unchanged object costs a 304 instead of a full download.
+# Bounded by total size (256 MiB) rather than entry count.
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+IMAGE_CACHE_FRESH_SECONDS = 600
+IMAGE_CACHE_TTL = 3600  # seconds an entry is kept for revalidation
+image_cache: TTLCache = TTLCache(
+    maxsize=IMAGE_CACHE_MAX_BYTES, ttl=IMAGE_CACHE_TTL, getsizeof=lambda entry: len(entry[1])
+)
+
+
+def url_cache_key(url: str) -> str:
+    """Fixed-size cache key for a (possibly long, signed) URL."""
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+async def _fetch_revalidated(client: httpx.AsyncClient, url: str) -> bytes:
+    """Fetch through image_cache, sending If-None-Match for stale entries."""
+    key = url_cache_key(url)
+    entry = image_cache.get(key)
+    if entry is not None and time.monotonic() - entry[2] < IMAGE_CACHE_FRESH_SECONDS:
+        return entry[1]
+    
+    headers = {"If-None-Match": entry[0]} if entry is not None and entry[0] else None
+    buf = bytearray()
+    async with client.stream("GET", url, headers=headers) as resp:
+        if resp.status_code == 304 and entry is not None:
+            data = entry[1]
+        else:
+            async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                buf.extend(chunk)
+            data = bytes(buf)
+        etag = resp.headers.get("etag") or (entry[0] if resp.status_code == 304 else None)
+        if resp.status_code in (200, 304) and len(data) <= IMAGE_CACHE_MAX_BYTES:
+            image_cache[key] = (etag, data, time.monotonic())
+    return data
+
+
+async def fetch_image_cached(url: str) -> bytes:
+    """Download an image, reusing (or revalidating) bytes fetched by earlier requests."""
+    return (await fetch_images_cached([url]))[0]
+
+
+async def fetch_images_cached(urls: list[str]) -> list[bytes]:
+    """Like fetch_image_cached for several URLs, fetched concurrently on the shared client."""
+    client = get_http_client()
+    return await asyncio.gather(*(_fetch_revalidated(client, url) for url in urls))
+
+
 async def download_image(url: str) -> bytes:
     """Download image from URL and return bytes."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url)
-        return resp.content
+    return await fetch_bytes(url)
 
 
 async def download_images(urls: list[str]) -> list[bytes]:
     """Download multiple images concurrently."""
-    async with httpx.AsyncClient() as client:
-        results = []
-        for url in urls:
-            resp = await client.get(url)
-            results.append(resp.content)
-        return results
+    client = get_http_client()
+    buffers = await asyncio.gather(*(_stream_into(client, url) for url in urls))
+    return [bytes(buf) for buf in buffers]
+
+
+async def download_decoded_images(
+    urls: list[str], with_alpha: bool = True
+) -> list[Optional[np.ndarray]]:
+    """
+    Download and decode multiple images concurrently, preserving order.
+    Downloads go through image_cache; each image is decoded in a worker thread
+    as soon as its bytes arrive, so decoding overlaps the remaining downloads.
+    At most DECODE_CONCURRENCY images are downloading or decoding at once.
+    Encoded bodies are kept in image_cache (up to IMAGE_CACHE_MAX_BYTES across
+    requests) and the decoded arrays are all returned, so memory still grows
+    with the frame count; the window only limits open streams and decode threads.
+    """
+    slots = asyncio.Semaphore(DECODE_CONCURRENCY)
+    
+    async def fetch_and_decode(client: httpx.AsyncClient, url: str) -> Optional[np.ndarray]:
+        async with slots:
+            data = await _fetch_revalidated(client, url)
+            return await asyncio.to_thread(decode_image, data, with_alpha)
+    
+    client = get_http_client()
+    return await asyncio.gather(*(fetch_and_decode(client, url) for url in urls))
 
 
-def decode_image(image_bytes: bytes, with_alpha: bool = True) -> np.ndarray:
+def decode_image(image_bytes: Union[bytes, bytearray], with_alpha: bool = True) -> np.ndarray:
     """Decode image bytes to numpy array."""
     nparr = np.frombuffer(image_bytes, np.uint8)
     flag = cv2.IMREAD_UNCHANGED if with_alpha else cv2.IMREAD_COLOR
     return cv2.imdecode(nparr, flag)
 
 
+@lru_cache(maxsize=32)
+def white_mask_png(height: int, width: int) -> bytes:
+    """
+    Full-white (entire frame editable) repair mask as PNG.
+    A solid image gains nothing from heavy zlib, so encode at level 1; frames
+    share a handful of sizes, so the encoded bytes are cached per shape.
+    """
+    white_mask = np.full((height, width), 255, dtype=np.uint8)
+    _, mask_encoded = cv2.imencode('.png', white_mask, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    return mask_encoded.tobytes()
+
+
 def get_sprite_bounds(img: np.ndarray) -> tuple[int, int, int, int]:
     """Get bounding box of sprite content (x, y, w, h)."""
     if len(img.shape) == 3 and img.shape[2] == 4:
-        alpha = img[:, :, 3]
-        coords = cv2.findNonZero(alpha)
+        mask = img[:, :, 3]
     else:
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        _, binary = cv2.threshold(gray, 250, 255, cv2.THRESH_BINARY_INV)
-        coords = cv2.findNonZero(binary)
+        _, mask = cv2.threshold(gray, 250, 255, cv2.THRESH_BINARY_INV)
     
-    if coords is not None:
-        return cv2.boundingRect(coords)
+    bounds = alpha_bbox(mask)
+    if bounds is not None:
+        return bounds
     return (0, 0, img.shape[1], img.shape[0])
 
 
@@ -108,28 +231,84 @@ async def get_character_frame_urls(
     return frame_urls, result
 
 
-async def handle_pipeline_error(
-    e: Exception, 
-    project_id: str, 
-    context: str = "Pipeline"
-) -> None:
-    """Log error and send error stage update."""
-    print(f"❌ {context} Error: {e}")
-    traceback.print_exc()
-    await send_stage_update(project_id, 0, "Error", "error", {"message": str(e)})
+async def replace_character_frame(
+    project_id: str,
+    character: str,
+    frame_urls: list[str],
+    frame_index: int,
+    path: str,
+    image_bytes: bytes,
+) -> str:
+    """
+    Upload a replacement frame, then point the frame list at it.
+    
+    The DB write only runs once the upload succeeded, so the stored list never
+    references a missing object. Mutates frame_urls in place and returns the new URL.
+    """
+    new_url = await supabase_service.upload_image("sprites", path, image_bytes)
+    frame_urls[frame_index] = new_url
+    
+    field = "responder_frame_urls" if character == "responder" else "frame_urls"
+    await supabase_service.update_frame_urls(project_id, field, frame_urls)
+    return new_url
 
 
-async def save_responder_frame_urls(project_id: str, frame_urls: list[str]) -> None:
-    """Save responder frame URLs (uses sync call internally)."""
-    supabase_service.client.table("projects").update({
-        "responder_frame_urls": frame_urls
-    }).eq("id", project_id).execute()
+@asynccontextmanager
+async def report_pipeline_errors(
+    project_id: str,
+    context: str = "Pipeline",
+    notify: bool = True,
+):
+    """
+    Turn any failure inside the block into a logged 500 HTTPException.
+    HTTPExceptions pass through untouched; with notify, an error stage
+    update is also pushed to the project's WebSocket.
+    """
+    try:
+        yield
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("%s error (project=%s)", context, project_id)
+        if notify:
+            await send_stage_update(project_id, 0, "Error", "error", {"message": str(e)})
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+def resolve_image_format(requested: Optional[str]) -> str:
+    """Upload format for generated images: the requested one, else the configured default."""
+    return requested or get_settings().sprite_format
 
 
 def validate_frame_index(frame_index: int, frame_urls: list[str]) -> None:
     """Validate frame index is in range."""
-    if frame_index >= len(frame_urls):
+    if frame_index < 0 or frame_index >= len(frame_urls):
         raise HTTPException(
             status_code=400, 
             detail=f"Frame index {frame_index} out of range"
         )
+
+
+def conditional_json_response(request: Request, payload: dict) -> Response:
+    """
+    JSON response with a content ETag; answers 304 with no body when the
+    client's If-None-Match already names it. Keeps status polling cheap.
+    """
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return conditional_body_response(request, body)
+
+
+def conditional_body_response(request: Request, body: Union[bytes, str]) -> Response:
+    """Like conditional_json_response for a body that is already encoded JSON."""
+    if isinstance(body, str):
+        body = body.encode()
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": POLL_CACHE_CONTROL}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -2,88 +2,189 @@
 Lighting map generation endpoints (Stage 7b).
 Handles Normal Map and Specular Map generation.
 """
+import asyncio
+import hashlib
 import math
-import uuid
+import threading
+from functools import lru_cache
+from typing import Optional
 
-import cv2
 import numpy as np
-from fastapi import APIRouter, HTTPException
+from cachetools import LRUCache
+from fastapi import APIRouter, HTTPException, Query, Request
 
 from app.db.supabase_client import supabase_service
+from app.services.stages.stage_7b_generate_maps import (
+    generate_lighting_maps_stacked,
+    stack_frames,
+    encode_lighting_map,
+)
+from app.services.stages.stage_7_post_processing import IMAGE_CONTENT_TYPES
 
-from .helpers import get_project_or_404, download_image, decode_image
+from .schemas import ImageFormat
+from .helpers import (
+    get_project_or_404,
+    download_decoded_images,
+    resolve_image_format,
+    conditional_json_response,
+)
 
 router = APIRouter()
 
+# Spritesheet buffers kept between requests, keyed by sheet size; each entry is
+# a free list of (normal, specular) pairs that no render is currently using
+LIGHTING_SHEET_SIZES = 4
+LIGHTING_SHEETS_PER_SIZE = 2
+_sheet_buffers: LRUCache = LRUCache(maxsize=LIGHTING_SHEET_SIZES)
+_sheet_buffers_lock = threading.Lock()
+
+
+@lru_cache(maxsize=64)
+def _grid_dim(frame_count: int) -> int:
+    """Smallest square grid that holds frame_count frames."""
+    return math.ceil(math.sqrt(frame_count))
+
+
+def _take_sheet_buffers(sheet_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Check out a (normal, specular) sheet pair, allocating only on a miss."""
+    with _sheet_buffers_lock:
+        free = _sheet_buffers.get(sheet_size)
+        if free:
+            return free.pop()
+    return (
+        np.empty((sheet_size, sheet_size, 3), dtype=np.uint8),
+        np.empty((sheet_size, sheet_size), dtype=np.uint8),
+    )
+
+
+def _return_sheet_buffers(sheet_size: int, buffers: tuple[np.ndarray, np.ndarray]) -> None:
+    """Hand a sheet pair back for the next render of the same size."""
+    with _sheet_buffers_lock:
+        free = _sheet_buffers.get(sheet_size)
+        if free is None:
+            _sheet_buffers[sheet_size] = [buffers]
+        elif len(free) < LIGHTING_SHEETS_PER_SIZE:
+            free.append(buffers)
+
+
+def _lighting_map_key(frame_urls: list[str], image_format: str) -> str:
+    """
+    Digest of the inputs a lighting-map render depends on.
+    
+    Frame uploads always get fresh paths, so the same URL list means the same
+    pixels and the previously rendered maps can be reused as-is.
+    """
+    digest = hashlib.sha256(image_format.encode())
+    for url in frame_urls:
+        digest.update(b"\0" + url.encode())
+    return digest.hexdigest()[:16]
+
+
+def _render_lighting_maps(
+    images: list[np.ndarray], indices: list[int], image_format: str
+) -> tuple[bytes, bytes]:
+    """CPU part of lighting-map generation: returns encoded (normal, specular) sheets."""
+    frame_width = max(img.shape[1] for img in images)
+    frame_height = max(img.shape[0] for img in images)
+    
+    # One contiguous (N, H, W, 4) tensor
+    stack = stack_frames(images, frame_width, frame_height)
+    
+    # Determine grid dimension
+    grid_dim = _grid_dim(len(indices))
+    sheet_size = grid_dim * max(frame_width, frame_height)
+    
+    # Sheets are reused across requests; they only need to live until encoded
+    sheets = _take_sheet_buffers(sheet_size)
+    try:
+        lighting_result = generate_lighting_maps_stacked(
+            stack,
+            indices,
+            grid_dim=grid_dim,
+            normal_strength=1.0,
+            out=sheets,
+        )
+        
+        return (
+            encode_lighting_map(lighting_result.normal_spritesheet, image_format),
+            encode_lighting_map(lighting_result.specular_spritesheet, image_format),
+        )
+    finally:
+        _return_sheet_buffers(sheet_size, sheets)
+
 
 @router.post("/{project_id}/generate-lighting-maps")
-async def generate_lighting_maps_endpoint(project_id: str):
+async def generate_lighting_maps_endpoint(
+    project_id: str,
+    image_format: Optional[ImageFormat] = Query(None, alias="format"),
+):
     """
     Generate Normal Maps and Specular Maps for all frames.
     Uses Stage 7b to create lighting textures from sprite luminance.
+    Maps are stored as SPRITE_FORMAT (PNG by default) unless ?format= overrides it.
+    Maps already rendered from the current frames are returned without
+    downloading or decoding anything.
     """
-    from app.services.stages.stage_7b_generate_maps import (
-        generate_lighting_maps,
-        encode_lighting_map_png,
-    )
-    from app.services.stages.stage_7_post_processing import ExtractedFrame
+    image_format = resolve_image_format(image_format)
     
     # Get project frames
-    result = await supabase_service.get_frame_urls(project_id)
-    if not result or not result.get("frame_urls"):
+    project = await get_project_or_404(project_id)
+    frame_urls = project.get("frame_urls")
+    if not frame_urls:
         raise HTTPException(status_code=404, detail="No frames found. Generate sprites first.")
     
-    frame_urls = result["frame_urls"]
+    map_key = _lighting_map_key(frame_urls, image_format)
+    normal_path = f"{project_id}/normal_map_{map_key}.{image_format}"
+    specular_path = f"{project_id}/specular_map_{map_key}.{image_format}"
+    
+    # Fast path: stored maps were rendered from exactly these frames
+    normal_url = project.get("normal_map_url") or ""
+    specular_url = project.get("specular_map_url") or ""
+    if (
+        normal_url.split("?", 1)[0].endswith(normal_path)
+        and specular_url.split("?", 1)[0].endswith(specular_path)
+    ):
+        return {
+            "project_id": project_id,
+            "status": "success",
+            "frame_count": len(frame_urls),
+            "normal_map_url": normal_url,
+            "specular_map_url": specular_url,
+        }
     
-    # Download each frame and convert to ExtractedFrame
-    extracted_frames: list[ExtractedFrame] = []
-    frame_width = 0
-    frame_height = 0
+    # Download all frames concurrently
+    images = await download_decoded_images(frame_urls)
     
-    for idx, url in enumerate(frame_urls):
-        frame_bytes = await download_image(url)
-        img = decode_image(frame_bytes)
-        
-        if img is not None:
-            h, w = img.shape[:2]
-            frame_width = max(frame_width, w)
-            frame_height = max(frame_height, h)
-            
-            extracted_frames.append(ExtractedFrame(
-                index=idx,
-                image=img,
-                x=0,
-                y=0,
-                width=w,
-                height=h,
-                pivot_x=0.5,
-                pivot_y=1.0,
-            ))
-    
-    if not extracted_frames:
+    indices = [idx for idx, img in enumerate(images) if img is not None]
+    loaded = [images[idx] for idx in indices]
+    
+    if not loaded:
         raise HTTPException(status_code=500, detail="Failed to load any frames")
     
-    # Determine grid dimension
-    grid_dim = math.ceil(math.sqrt(len(extracted_frames)))
-    
-    # Generate lighting maps
-    lighting_result = generate_lighting_maps(
-        frames=extracted_frames,
-        frame_width=frame_width,
-        frame_height=frame_height,
-        grid_dim=grid_dim,
-        normal_strength=1.0,
+    # Stack, generate and encode in a worker thread (OpenCV releases the GIL),
+    # keeping the event loop free for other requests
+    normal_bytes, specular_bytes = await asyncio.to_thread(
+        _render_lighting_maps, loaded, indices, image_format
     )
     
-    # Encode and upload spritesheets
-    normal_bytes = encode_lighting_map_png(lighting_result.normal_spritesheet)
-    specular_bytes = encode_lighting_map_png(lighting_result.specular_spritesheet)
-    
-    normal_path = f"{project_id}/normal_map_{uuid.uuid4().hex[:8]}.png"
-    specular_path = f"{project_id}/specular_map_{uuid.uuid4().hex[:8]}.png"
-    
-    normal_url = await supabase_service.upload_image("sprites", normal_path, normal_bytes)
-    specular_url = await supabase_service.upload_image("sprites", specular_path, specular_bytes)
+    if len(indices) < len(frame_urls):
+        # Key partial renders by the frames they actually contain so a later
+        # call with every frame loaded does not take the fast path
+        map_key = _lighting_map_key([frame_urls[idx] for idx in indices], image_format)
+        normal_path = f"{project_id}/normal_map_{map_key}.{image_format}"
+        specular_path = f"{project_id}/specular_map_{map_key}.{image_format}"
+    content_type = IMAGE_CONTENT_TYPES[image_format]
+    
+    # Map paths are derived from the frames, so a re-render (format switch,
+    # retry, concurrent request) targets an existing object: overwrite it
+    normal_url, specular_url = await asyncio.gather(
+        supabase_service.upload_image(
+            "sprites", normal_path, normal_bytes, content_type=content_type, upsert=True
+        ),
+        supabase_service.upload_image(
+            "sprites", specular_path, specular_bytes, content_type=content_type, upsert=True
+        ),
+    )
     
     # Save URLs to project
     await supabase_service.update_project(project_id, {
@@ -96,17 +197,18 @@ async def generate_lighting_maps_endpoint(project_id: str):
     return {
         "project_id": project_id,
         "status": "success",
-        "frame_count": len(extracted_frames),
+        "frame_count": len(indices),
         "normal_map_url": normal_url,
         "specular_map_url": specular_url,
     }
 
 
 @router.get("/{project_id}/lighting-maps")
-async def get_lighting_maps(project_id: str):
+async def get_lighting_maps(project_id: str, request: Request):
     """
     Get existing lighting maps for a project.
-    Returns URLs to Normal Map and Specular Map spritesheets.
+    Returns URLs to Normal Map and Specular Map spritesheets, with an ETag so
+    unchanged polls get an empty 304.
     """
     project = await get_project_or_404(project_id)
     
@@ -114,16 +216,16 @@ async def get_lighting_maps(project_id: str):
     specular_url = project.get("specular_map_url")
     
     if not normal_url or not specular_url:
-        return {
+        return conditional_json_response(request, {
             "project_id": project_id,
             "has_lighting_maps": False,
             "normal_map_url": None,
             "specular_map_url": None,
-        }
+        })
     
-    return {
+    return conditional_json_response(request, {
         "project_id": project_id,
         "has_lighting_maps": True,
         "normal_map_url": normal_url,
         "specular_map_url": specular_url,
-    }
+    })
@@ -2,29 +2,52 @@
 Repair and edit endpoints for pipeline.
 Handles /repair, /save-edited-frame, /reprocess endpoints.
 """
+import asyncio
 import base64
+import logging
 import uuid
 import time
+from typing import Optional
 
-import cv2
-import numpy as np
-from fastapi import APIRouter, HTTPException, Form, File, UploadFile
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Form, File, UploadFile, Query
 
 from app.db.supabase_client import supabase_service
+from app.services.stages.stage_7_post_processing import (
+    extract_frames,
+    normalize_frames,
+    encode_frame,
+    IMAGE_CONTENT_TYPES,
+)
+from app.services.stages.stage_8_repair_loop import repair_frame as do_repair
 
-from .schemas import RepairRequest, ReprocessRequest
+from .schemas import RepairRequest, ReprocessRequest, ImageFormat
 from .helpers import (
     get_project_or_404,
     get_character_frame_urls,
     download_image,
+    fetch_buffer,
+    fetch_image_cached,
     decode_image,
     get_sprite_bounds,
     validate_frame_index,
-    save_responder_frame_urls,
+    white_mask_png,
+    replace_character_frame,
+    report_pipeline_errors,
+    resolve_image_format,
 )
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
+# Frame-1 metrics (target_width, target_height, canonical_height) keyed by frame URL.
+# Repaired frames get a new URL, so sequential repairs of one animation reuse this.
+frame1_metrics_cache: TTLCache = TTLCache(maxsize=1024, ttl=600)
+
+# Frames encoded/uploaded at once by /reprocess
+REPROCESS_UPLOAD_CONCURRENCY = 8
+
 
 @router.post("/repair")
 async def repair_frame(request: RepairRequest):
@@ -33,8 +56,6 @@ async def repair_frame(request: RepairRequest):
     Now includes previous frames AND animation script as context for better repairs.
     Supports dual mode with character selection (instigator or responder).
     """
-    from app.services.stages.stage_8_repair_loop import repair_frame as do_repair
-    
     is_responder = request.character == "responder"
     char_label = "responder" if is_responder else "instigator"
     
@@ -66,36 +87,49 @@ async def repair_frame(request: RepairRequest):
             frames = animation_script["frames"]
             if request.frame_index < len(frames):
                 frame_script = frames[request.frame_index]
-                print(f"📜 {char_label.capitalize()} Frame {request.frame_index} script: {frame_script.get('phase', 'N/A')} - {frame_script.get('pose_description', 'N/A')[:50]}...")
+                logger.debug(
+                    "%s frame=%d script phase=%s pose=%.50s",
+                    char_label, request.frame_index,
+                    frame_script.get("phase", "N/A"), frame_script.get("pose_description", "N/A"),
+                )
     except Exception as e:
-        print(f"⚠️ Could not get animation script: {e}")
+        logger.warning("Could not get animation script: %s", e)
     
     # Download images
     frame_bytes = await download_image(frame_urls[request.frame_index])
-    reference_bytes = await download_image(reference_url)
+    reference_bytes = await fetch_image_cached(reference_url)
+    
+    # Get current frame bounds
+    current_frame_bounds = None
+    current_img = decode_image(frame_bytes)
+    if current_img is not None:
+        _, _, w, h = get_sprite_bounds(current_img)
+        current_frame_bounds = (w, h)
+        logger.debug("frame=%d bounds=%dx%d", request.frame_index, w, h)
     
     # Get canonical height and target dimensions from frame 1
     canonical_height = None
     target_width = None
     target_height = None
     
-    if len(frame_urls) > 0:
-        frame1_bytes = await download_image(frame_urls[0])
-        frame1_img = decode_image(frame1_bytes)
+    frame1_metrics = frame1_metrics_cache.get(frame_urls[0])
+    if frame1_metrics is None:
+        if request.frame_index == 0:
+            # Repairing frame 1 itself: reuse the decode above instead of a second GET
+            frame1_img = current_img
+        else:
+            # Frame 1 is only decoded, so keep the raw buffer and skip the bytes copy
+            frame1_img = decode_image(await fetch_buffer(frame_urls[0]))
         if frame1_img is not None:
-            target_height, target_width = frame1_img.shape[:2]
-            print(f"📐 Target dimensions from frame 1: {target_width}x{target_height}px")
-            
-            _, _, _, canonical_height = get_sprite_bounds(frame1_img)
-            print(f"📏 Canonical height from frame 1: {canonical_height}px")
+            frame1_height, frame1_width = frame1_img.shape[:2]
+            _, _, _, frame1_canonical = get_sprite_bounds(frame1_img)
+            frame1_metrics = (frame1_width, frame1_height, frame1_canonical)
+            frame1_metrics_cache[frame_urls[0]] = frame1_metrics
     
-    # Get current frame bounds
-    current_frame_bounds = None
-    current_img = decode_image(frame_bytes)
-    if current_img is not None:
-        _, _, w, h = get_sprite_bounds(current_img)
-        current_frame_bounds = (w, h)
-        print(f"📐 Current frame {request.frame_index} bounds: {w}x{h}px")
+    if frame1_metrics is not None:
+        target_width, target_height, canonical_height = frame1_metrics
+        logger.debug("frame=0 target=%dx%d", target_width, target_height)
+        logger.debug("frame=0 canonical_height=%d", canonical_height)
     
     # Download previous 1-2 frames for context
     context_frames = []
@@ -105,19 +139,17 @@ async def repair_frame(request: RepairRequest):
             context_frames.append(prev_bytes)
     
     if context_frames:
-        print(f"📚 Providing {len(context_frames)} previous frames as context for frame {request.frame_index}")
+        logger.debug("frame=%d context_frames=%d", request.frame_index, len(context_frames))
     
     # Create mask from provided data or generate full-white mask
     if request.mask_data:
         mask_bytes = base64.b64decode(request.mask_data)
     else:
-        img = decode_image(frame_bytes)
-        white_mask = np.ones((img.shape[0], img.shape[1]), dtype=np.uint8) * 255
-        _, mask_encoded = cv2.imencode('.png', white_mask)
-        mask_bytes = mask_encoded.tobytes()
+        # Reuse the already-decoded frame for its size instead of decoding again
+        mask_bytes = white_mask_png(current_img.shape[0], current_img.shape[1])
     
     # Run repair with context frames AND animation script
-    try:
+    async with report_pipeline_errors(request.project_id, "Repair", notify=False):
         repaired = await do_repair(
             frame_image=frame_bytes,
             mask_bytes=mask_bytes,
@@ -133,17 +165,12 @@ async def repair_frame(request: RepairRequest):
             target_height=target_height,
         )
         
-        # Upload repaired frame
+        # Upload repaired frame and update frame URLs for the correct character
         char_prefix = "responder_" if is_responder else ""
         path = f"{request.project_id}/{char_prefix}repaired_frame_{request.frame_index}_{uuid.uuid4().hex[:8]}.png"
-        new_url = await supabase_service.upload_image("sprites", path, repaired)
-        
-        # Update frame URLs for the correct character
-        frame_urls[request.frame_index] = new_url
-        if is_responder:
-            await save_responder_frame_urls(request.project_id, frame_urls)
-        else:
-            await supabase_service.save_frame_urls(request.project_id, frame_urls)
+        new_url = await replace_character_frame(
+            request.project_id, request.character, frame_urls, request.frame_index, path, repaired
+        )
         
         return {
             "status": "repaired",
@@ -153,10 +180,6 @@ async def repair_frame(request: RepairRequest):
             "context_frames_used": len(context_frames),
             "frame_script_used": frame_script is not None,
         }
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/save-edited-frame")
@@ -178,23 +201,18 @@ async def save_edited_frame(
     frame_urls, _ = await get_character_frame_urls(project_id, character)
     validate_frame_index(frame_index, frame_urls)
     
-    try:
+    async with report_pipeline_errors(project_id, "Save Edited Frame", notify=False):
         # Read the uploaded image
         image_bytes = await image.read()
         
-        # Upload to Supabase storage
+        # Upload to Supabase storage and update frame URLs for the correct character
         char_prefix = "responder_" if is_responder else ""
         path = f"{project_id}/{char_prefix}edited_frame_{frame_index}_{uuid.uuid4().hex[:8]}.png"
-        new_url = await supabase_service.upload_image("sprites", path, image_bytes)
-        
-        # Update frame URLs for the correct character
-        frame_urls[frame_index] = new_url
-        if is_responder:
-            await save_responder_frame_urls(project_id, frame_urls)
-        else:
-            await supabase_service.save_frame_urls(project_id, frame_urls)
+        new_url = await replace_character_frame(
+            project_id, character, frame_urls, frame_index, path, image_bytes
+        )
         
-        print(f"✅ Saved manually edited {char_label} frame {frame_index} for project {project_id}")
+        logger.info("Saved edited %s frame=%d project=%s", char_label, frame_index, project_id)
         
         return {
             "status": "saved",
@@ -202,23 +220,19 @@ async def save_edited_frame(
             "new_url": new_url,
             "character": char_label,
         }
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/reprocess")
-async def reprocess_spritesheet(request: ReprocessRequest):
+async def reprocess_spritesheet(
+    request: ReprocessRequest,
+    image_format: Optional[ImageFormat] = Query(None, alias="format"),
+):
     """
     Re-extract frames from spritesheet with manual grid parameters.
     Use this when automatic extraction produces wrong results.
+    Frames are stored as SPRITE_FORMAT (PNG by default) unless ?format= overrides it.
     """
-    from app.services.stages.stage_7_post_processing import (
-        extract_frames,
-        normalize_frames,
-        encode_frame_png,
-    )
+    image_format = resolve_image_format(image_format)
     
     project = await get_project_or_404(request.project_id)
     
@@ -255,18 +269,19 @@ async def reprocess_spritesheet(request: ReprocessRequest):
         detail = "No responder spritesheet found" if is_responder else "No spritesheet found"
         raise HTTPException(status_code=404, detail=detail)
     
-    try:
+    async with report_pipeline_errors(request.project_id, "Reprocess", notify=False):
         print(f"🔄 Reprocessing {request.character} spritesheet with grid {request.grid_rows}x{request.grid_cols}")
         
-        # Download the spritesheet
-        spritesheet_bytes = await download_image(spritesheet_url)
-        img = decode_image(spritesheet_bytes, with_alpha=False)
+        # Download the spritesheet (decode in a worker thread, off the event loop)
+        spritesheet_bytes = await fetch_image_cached(spritesheet_url)
+        img = await asyncio.to_thread(decode_image, spritesheet_bytes, False)
         
         if img is None:
             raise HTTPException(status_code=400, detail="Failed to decode spritesheet image")
         
         # Extract frames with manual grid parameters
-        result = extract_frames(
+        result = await asyncio.to_thread(
+            extract_frames,
             grid_image=img,
             expected_count=request.frame_count,
             grid_rows=request.grid_rows,
@@ -275,7 +290,8 @@ async def reprocess_spritesheet(request: ReprocessRequest):
         )
         
         # Normalize frames
-        normalized = normalize_frames(
+        normalized = await asyncio.to_thread(
+            normalize_frames,
             result.frames,
             result.frame_width,
             result.frame_height,
@@ -284,15 +300,24 @@ async def reprocess_spritesheet(request: ReprocessRequest):
         # Upload new frames with unique timestamp
         batch_id = f"{int(time.time())}_{uuid.uuid4().hex[:6]}"
         
-        new_frame_urls = []
         char_prefix = "responder_" if is_responder else ""
+        upload_slots = asyncio.Semaphore(REPROCESS_UPLOAD_CONCURRENCY)
         
-        for i, frame in enumerate(normalized):
-            frame_bytes = encode_frame_png(frame)
-            path = f"{request.project_id}/{char_prefix}reprocess_{batch_id}_frame_{i:02d}.png"
-            url = await supabase_service.upload_image("sprites", path, frame_bytes)
-            new_frame_urls.append(url)
+        async def encode_and_upload(i: int, frame) -> str:
+            # Encoding frame i+1 overlaps the upload of frame i
+            async with upload_slots:
+                frame_bytes = await asyncio.to_thread(encode_frame, frame, image_format)
+                path = f"{request.project_id}/{char_prefix}reprocess_{batch_id}_frame_{i:02d}.{image_format}"
+                url = await supabase_service.upload_image(
+                    "sprites", path, frame_bytes, content_type=IMAGE_CONTENT_TYPES[image_format]
+                )
             print(f"  ✅ Uploaded {request.character} frame {i}")
+            return url
+        
+        # gather preserves frame order
+        new_frame_urls = list(await asyncio.gather(
+            *(encode_and_upload(i, frame) for i, frame in enumerate(normalized))
+        ))
         
         # Determine animation_type to save to
         animation_type = request.animation_type
@@ -309,9 +334,7 @@ async def reprocess_spritesheet(request: ReprocessRequest):
                         break
         
         # Update database with new frame URLs
-        if is_responder:
-            await save_responder_frame_urls(request.project_id, new_frame_urls)
-        elif animation_type:
+        if animation_type and not is_responder:
             # Save to new animations dict
             await supabase_service.save_animation_frames(
                 request.project_id,
@@ -321,8 +344,13 @@ async def reprocess_spritesheet(request: ReprocessRequest):
             )
             print(f"✅ Saved reprocessed frames to animations.{animation_type}")
         else:
-            # Fall back to legacy frame_urls
-            await supabase_service.save_frame_urls(request.project_id, new_frame_urls)
+            # Responder or legacy frame_urls: one batched write either way
+            updates = (
+                {"responder_frame_urls": new_frame_urls}
+                if is_responder
+                else {"frame_urls": new_frame_urls, "status": "completed"}
+            )
+            await supabase_service.update_project(request.project_id, updates)
         
         print(f"✅ Reprocessed {len(new_frame_urls)} {request.character} frames successfully")
         
@@ -334,8 +362,3 @@ async def reprocess_spritesheet(request: ReprocessRequest):
             "animation_type": animation_type,
             "grid": f"{request.grid_rows}x{request.grid_cols}",
         }
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
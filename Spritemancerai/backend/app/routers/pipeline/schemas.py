@@ -1,24 +1,17 @@
 """
 Pydantic models and request schemas for pipeline endpoints.
 """
-from enum import Enum
 from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
+# Output encoding clients may request for generated images (?format=)
+ImageFormat = Literal["webp", "png"]
 
-class DualPipelineErrorCode(str, Enum):
-    """Error codes specific to dual-character pipeline."""
-    MISSING_INSTIGATOR_IMAGE = "MISSING_INSTIGATOR_IMAGE"
-    MISSING_RESPONDER_IMAGE = "MISSING_RESPONDER_IMAGE"
-    INSTIGATOR_DNA_FAILED = "INSTIGATOR_DNA_FAILED"
-    RESPONDER_DNA_FAILED = "RESPONDER_DNA_FAILED"
-    INSTIGATOR_SCRIPT_FAILED = "INSTIGATOR_SCRIPT_FAILED"
-    RESPONDER_SCRIPT_FAILED = "RESPONDER_SCRIPT_FAILED"
-    TEMPORAL_BINDING_MISMATCH = "TEMPORAL_BINDING_MISMATCH"
-    RESPONDER_ACTION_NOT_CONFIRMED = "RESPONDER_ACTION_NOT_CONFIRMED"
-    INSTIGATOR_SPRITE_FAILED = "INSTIGATOR_SPRITE_FAILED"
-    RESPONDER_SPRITE_FAILED = "RESPONDER_SPRITE_FAILED"
+
+class RequestModel(BaseModel):
+    """Base for request bodies: unknown keys are dropped and nothing re-validates after parsing."""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False, arbitrary_types_allowed=False)
 
 
 class PipelineStartRequest(BaseModel):
@@ -38,6 +31,10 @@ class FrameBudgetRequest(BaseModel):
     perspective: Literal["side", "front", "isometric", "top_down"] = "side"
 
 
+# Built once at import; /compute-budget validates its raw body with this directly
+frame_budget_request_adapter = TypeAdapter(FrameBudgetRequest)
+
+
 class DNAEditRequest(BaseModel):
     """Request to edit Character DNA."""
     project_id: str
@@ -61,19 +58,42 @@ class RepairRequest(BaseModel):
     character: Optional[str] = "instigator"  # "instigator" or "responder" for dual mode
 
 
-class PivotUpdateRequest(BaseModel):
+class Pivot(BaseModel):
+    """Normalized (0-1) frame pivot; extra keys are kept and stored as sent."""
+    model_config = ConfigDict(extra="allow")
+    
+    x: float = Field(ge=0, le=1)
+    y: float = Field(ge=0, le=1)
+
+
+class PivotUpdateRequest(RequestModel):
     """Request to update frame pivots."""
     project_id: str
-    pivots: list[dict]  # [{x: float, y: float}, ...]
+    pivots: list[Pivot]
+
+
+class ScriptFrame(BaseModel):
+    """User-edited script frame: the required fields, other keys kept as sent."""
+    model_config = ConfigDict(extra="allow")
+    
+    frame_index: int
+    phase: str
+    pose_description: str
+    visual_focus: str
+
+
+class ScriptUpdate(BaseModel):
+    """Edited animation script body."""
+    frames: list[ScriptFrame] = Field(min_length=1)
 
 
-class ScriptUpdateRequest(BaseModel):
+class ScriptUpdateRequest(RequestModel):
     """Request to update animation script."""
     project_id: str
-    script: dict  # {frames: [...]}
+    script: ScriptUpdate
 
 
-class DualPipelineRequest(BaseModel):
+class DualPipelineRequest(RequestModel):
     """Request for dual-character animation pipeline."""
     project_id: str
     action_type: str
@@ -81,13 +101,13 @@ class DualPipelineRequest(BaseModel):
     perspective: Literal["side", "front", "isometric", "top_down"] = "side"
 
 
-class ResponderConfirmRequest(BaseModel):
+class ResponderConfirmRequest(RequestModel):
     """Request to confirm responder action selection."""
     project_id: str
     responder_action: str
 
 
-class ReprocessRequest(BaseModel):
+class ReprocessRequest(RequestModel):
     """Request to reprocess spritesheet with manual grid parameters."""
     project_id: str
     grid_rows: int
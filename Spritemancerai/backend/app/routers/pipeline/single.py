@@ -2,47 +2,94 @@
 Single-character pipeline endpoints.
 Handles /start, /generate-script, /generate-sprites, /run endpoints.
 """
-from fastapi import APIRouter, HTTPException
+from functools import lru_cache
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
 from app.db.supabase_client import supabase_service
+from app.models import CharacterDNA, AnimationScript, FrameBudget
+from app.services.pipeline_orchestrator import PipelineOrchestrator
 from app.services.stages import compute_frame_budget
 from app.routers.websocket import send_stage_update, send_pipeline_complete
 
-from .schemas import PipelineStartRequest, FrameBudgetRequest
+from .schemas import PipelineStartRequest, FrameBudgetRequest, frame_budget_request_adapter
 from .helpers import (
     get_project_or_404,
     require_reference_image,
     require_dna,
     require_animation_script,
-    download_image,
-    handle_pipeline_error,
+    fetch_image_cached,
+    report_pipeline_errors,
 )
 
 router = APIRouter()
 
 
-@router.post("/compute-budget")
-async def compute_budget(request: FrameBudgetRequest):
+@lru_cache(maxsize=1024)
+def _budget_and_summary(
+    action_type: str,
+    difficulty_tier: str,
+    weapon_mass: str,
+    perspective: str,
+    archetype: str,
+) -> tuple[FrameBudget, str]:
+    """
+    Frame budget + intent summary for a set of inputs.
+    Pure function of its arguments, so results are memoized; callers must only
+    read (model_dump) the cached FrameBudget, never mutate it.
+    """
+    budget = compute_frame_budget(
+        action_type=action_type,
+        difficulty_tier=difficulty_tier,
+        weapon_mass=weapon_mass,
+        perspective=perspective,
+    )
+    intent_summary = (
+        f"Generate a {budget.final_frame_count}-frame {perspective}-view "
+        f"{difficulty_tier} {action_type} animation for a {archetype}."
+    )
+    return budget, intent_summary
+
+
+@router.post(
+    "/compute-budget",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": FrameBudgetRequest.model_json_schema()}},
+        }
+    },
+)
+async def compute_budget(http_request: Request):
     """
     Compute frame budget based on action, difficulty, and project DNA.
     Returns the computed frame budget with justification.
+    
+    Hot path: the body is parsed and validated in one pass by the prebuilt
+    TypeAdapter instead of FastAPI's per-request body dependency.
     """
+    try:
+        request = frame_budget_request_adapter.validate_json(await http_request.body())
+    except ValidationError as e:
+        # Same error shape FastAPI produces for a body model
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+    
     project = await get_project_or_404(request.project_id)
     
     dna = project.get("character_dna")
     weapon_mass = dna.get("weapon_mass", "medium") if dna else "medium"
-    
-    budget = compute_frame_budget(
-        action_type=request.action_type,
-        difficulty_tier=request.difficulty_tier,
-        weapon_mass=weapon_mass,
-        perspective=request.perspective,
-    )
-    
     archetype = dna.get("archetype", "character") if dna else "character"
-    intent_summary = (
-        f"Generate a {budget.final_frame_count}-frame {request.perspective}-view "
-        f"{request.difficulty_tier} {request.action_type} animation for a {archetype}."
+    
+    budget, intent_summary = _budget_and_summary(
+        request.action_type,
+        request.difficulty_tier,
+        weapon_mass,
+        request.perspective,
+        archetype,
     )
     
     return {
@@ -75,20 +122,17 @@ async def generate_script(request: PipelineStartRequest):
     Generate animation script (Stages 1-5) for user review.
     This does NOT generate images - user must confirm script first.
     """
-    from app.services.pipeline_orchestrator import PipelineOrchestrator
-    from app.models import CharacterDNA
-    
     project_id = request.project_id
     
     project = await get_project_or_404(project_id)
     await require_reference_image(project)
     await require_dna(project)
     
-    reference_image = await download_image(project["reference_image_url"])
+    reference_image = await fetch_image_cached(project["reference_image_url"])
     
     pipeline = PipelineOrchestrator(project_id)
     
-    try:
+    async with report_pipeline_errors(project_id, "Script Generation"):
         # Stage 1: DNA Extraction (uses cached DNA from project)
         await send_stage_update(project_id, 1, "DNA Extraction", "start")
         pipeline.state.character_dna = project.get("character_dna")
@@ -140,9 +184,6 @@ async def generate_script(request: PipelineStartRequest):
             "frame_budget": pipeline.state.frame_budget.model_dump() if pipeline.state.frame_budget else None,
             "intent_summary": pipeline.state.intent_summary,
         }
-    except Exception as e:
-        await handle_pipeline_error(e, project_id, "Script Generation")
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-sprites")
@@ -151,17 +192,13 @@ async def generate_sprites(request: PipelineStartRequest):
     Generate sprite images (Stages 6-7).
     Requires animation script to already exist from /generate-script.
     """
-    from app.services.pipeline_orchestrator import PipelineOrchestrator
-    from app.models import CharacterDNA, AnimationScript
-    from app.services.stages import compute_frame_budget as compute_budget_func
-    
     project_id = request.project_id
     
     project = await get_project_or_404(project_id)
     await require_reference_image(project)
     await require_animation_script(project)
     
-    reference_image = await download_image(project["reference_image_url"])
+    reference_image = await fetch_image_cached(project["reference_image_url"])
     
     pipeline = PipelineOrchestrator(project_id)
     
@@ -177,14 +214,14 @@ async def generate_sprites(request: PipelineStartRequest):
     
     # Compute frame budget from script
     weapon_mass = pipeline.state.character_dna.weapon_mass if pipeline.state.character_dna else "medium"
-    pipeline.state.frame_budget = compute_budget_func(
+    pipeline.state.frame_budget = compute_frame_budget(
         action_type=script_data.get("action_type", request.action_type),
         difficulty_tier=script_data.get("difficulty_tier", request.difficulty_tier),
         weapon_mass=weapon_mass,
         perspective=request.perspective,
     )
     
-    try:
+    async with report_pipeline_errors(project_id, "Sprite Generation"):
         # Stage 6: Image Generation
         await send_stage_update(project_id, 6, "Image Generation", "start", {
             "action": request.action_type,
@@ -222,9 +259,6 @@ async def generate_sprites(request: PipelineStartRequest):
             "spritesheet_url": pipeline.state.spritesheet_url,
             "frame_count": len(pipeline.state.frame_urls) if pipeline.state.frame_urls else 0,
         }
-    except Exception as e:
-        await handle_pipeline_error(e, project_id, "Sprite Generation")
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/run")
@@ -234,13 +268,11 @@ async def run_full_pipeline(request: PipelineStartRequest):
     This is for backward compatibility and testing.
     For production, use /generate-script then /generate-sprites.
     """
-    from app.services.pipeline_orchestrator import PipelineOrchestrator
-    
     project = await get_project_or_404(request.project_id)
     await require_reference_image(project)
     await require_dna(project)
     
-    reference_image = await download_image(project["reference_image_url"])
+    reference_image = await fetch_image_cached(project["reference_image_url"])
     
     # Create callback function to send WebSocket updates
     async def stage_callback(project_id: str, stage: int, stage_name: str, status: str, data: dict = None):
@@ -249,7 +281,7 @@ async def run_full_pipeline(request: PipelineStartRequest):
     
     pipeline = PipelineOrchestrator(request.project_id, on_stage_update=stage_callback)
     
-    try:
+    async with report_pipeline_errors(request.project_id, "Pipeline"):
         # Send initial stage update
         await send_stage_update(request.project_id, 1, "DNA Extraction", "start")
         
@@ -301,11 +333,6 @@ async def run_full_pipeline(request: PipelineStartRequest):
             "frame_urls": pipeline.state.frame_urls,
             "spritesheet_url": pipeline.state.spritesheet_url,
         }
-    except Exception as e:
-        import traceback
-        print(f"❌ Pipeline Error: {e}")
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 # --- Animation Management Endpoints ---
@@ -5,9 +5,12 @@ Handles status, frames, animation script, DNA edit, pivots, etc.
 from fastapi import APIRouter, HTTPException
 
 from app.db.supabase_client import supabase_service
+from app.models import CharacterDNA
+from app.services.stages.stage_2_dna_verification import verify_dna_edit, apply_verified_edit
+from app.services.stages.stage_3a_action_suggestion import suggest_actions as get_suggestions
 
 from .schemas import DNAEditRequest, IntentConfirmRequest, PivotUpdateRequest, ScriptUpdateRequest
-from .helpers import get_project_or_404, download_image
+from .helpers import get_project_or_404, fetch_image_cached, report_pipeline_errors
 
 router = APIRouter()
 
@@ -77,9 +80,6 @@ async def edit_dna(request: DNAEditRequest):
     Triggers Stage 2 DNA Verification.
     Supports both instigator and responder characters for dual mode.
     """
-    from app.services.stages.stage_2_dna_verification import verify_dna_edit, apply_verified_edit
-    from app.models import CharacterDNA
-    
     project_id = request.project_id
     project = await get_project_or_404(project_id)
     
@@ -102,7 +102,7 @@ async def edit_dna(request: DNAEditRequest):
     
     # Download reference image for verification
     try:
-        reference_image = await download_image(image_url)
+        reference_image = await fetch_image_cached(image_url)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch reference image: {e}")
     
@@ -116,7 +116,7 @@ async def edit_dna(request: DNAEditRequest):
             
             # Save to database
             await supabase_service.update_project(project_id, {
-                dna_field: updated_dna.model_dump()
+                dna_field: updated_dna
             })
             
             return {
@@ -163,24 +163,18 @@ async def suggest_actions(project_id: str):
     Get AI-suggested animation actions based on character DNA.
     Uses Stage 3a Action Suggestion logic.
     """
-    from app.services.stages.stage_3a_action_suggestion import suggest_actions as get_suggestions
-    
     project = await get_project_or_404(project_id)
     
     dna = project.get("character_dna")
     if not dna:
         raise HTTPException(status_code=400, detail="Project has no DNA. Extract DNA first.")
     
-    try:
+    async with report_pipeline_errors(project_id, "Action Suggestion", notify=False):
         suggestions = await get_suggestions(dna)
         return {
             "project_id": project_id,
             "suggestions": suggestions,
         }
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/update-pivots")
@@ -191,23 +185,10 @@ async def update_pivots(request: PivotUpdateRequest):
     """
     project = await get_project_or_404(request.project_id)
     
-    # Validate pivots format
-    for i, pivot in enumerate(request.pivots):
-        if "x" not in pivot or "y" not in pivot:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Pivot {i} missing x or y coordinate"
-            )
-        if not (0 <= pivot["x"] <= 1 and 0 <= pivot["y"] <= 1):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Pivot {i} coordinates must be between 0 and 1"
-            )
-    
-    # Save pivots to project
+    # Save pivots to project (ranges already checked by the Pivot model)
     try:
         await supabase_service.update_project(request.project_id, {
-            "custom_pivots": request.pivots,
+            "custom_pivots": [pivot.model_dump() for pivot in request.pivots],
         })
         
         return {
@@ -234,20 +215,8 @@ async def update_script(request: ScriptUpdateRequest):
             detail="No existing script to update. Generate a script first."
         )
     
-    # Validate and merge script updates
-    frames = request.script.get("frames", [])
-    if not frames:
-        raise HTTPException(status_code=400, detail="Script must contain frames")
-    
-    # Validate frame structure
-    for i, frame in enumerate(frames):
-        required = ["frame_index", "phase", "pose_description", "visual_focus"]
-        for field in required:
-            if field not in frame:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Frame {i} missing required field: {field}"
-                )
+    # Frames were validated by ScriptUpdate (non-empty, required fields present)
+    frames = [frame.model_dump() for frame in request.script.frames]
     
     # Update the script
     updated_script = {
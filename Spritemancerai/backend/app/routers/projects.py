@@ -1,10 +1,61 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import base64
+import traceback
 import uuid
 
+import orjson
+
+from app.db.redis_client import redis_client
+from app.db.supabase_client import supabase_service
+from app.http_client import get_http_client
+from app.routers.pipeline.helpers import conditional_body_response
+from app.routers.websocket import send_dna_extracted
+from app.services.stages.stage_1_dna_extraction import extract_character_dna
+
 router = APIRouter()
 
+# Reference image uploads are read in chunks and rejected past this size
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 65536
+
+
+async def _read_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Read an uploaded file in chunks, answering 413 as soon as it exceeds max_bytes.
+    Oversized uploads are refused before they are copied into memory.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes // (1024 * 1024)} MB limit")
+    
+    buf = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        buf.extend(chunk)
+        if len(buf) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes // (1024 * 1024)} MB limit")
+    return bytes(buf)
+
+
+async def _fetch_reference_bytes(url: str) -> Optional[bytes]:
+    """
+    Get a stored reference image, from Redis when an earlier DNA extraction fetched it.
+    Storage objects never change under a URL, so cached bytes need no revalidation.
+    Returns None if storage does not answer 200.
+    """
+    content = await redis_client.get_reference_image(url)
+    if content is not None:
+        return content
+    
+    img_response = await get_http_client().get(url)
+    if img_response.status_code != 200:
+        return None
+    content = img_response.content
+    await redis_client.cache_reference_image(url, content)
+    return content
+
 
 class ProjectCreate(BaseModel):
     """Request model for creating a new project."""
@@ -39,6 +90,13 @@ class ProjectResponse(BaseModel):
     perspective: Optional[str] = None
 
 
+# Columns actually read back for each endpoint; ProjectResponse fields are column names
+PROJECT_DETAIL_COLUMNS = ",".join(ProjectResponse.model_fields)
+PROJECT_LIST_COLUMNS = "id,name,description,status,reference_image_url,character_dna,created_at"
+# List rows are emitted as plain dicts; unselected ProjectResponse fields stay null
+_PROJECT_LIST_DEFAULTS = dict.fromkeys(ProjectResponse.model_fields)
+
+
 @router.post("/", response_model=ProjectResponse)
 async def create_project(project: ProjectCreate):
     """Create a new sprite generation project."""
@@ -46,11 +104,6 @@ async def create_project(project: ProjectCreate):
     # In a real app, this comes from auth.jwt()
     fake_user_id = "00000000-0000-0000-0000-000000000000"
     
-    # ... (imports)
-    from app.db.supabase_client import supabase_service
-    from app.models.project import Project
-    from datetime import datetime
-    
     data = {
         "user_id": fake_user_id,
         "name": project.name,
@@ -69,6 +122,7 @@ async def create_project(project: ProjectCreate):
             raise HTTPException(status_code=500, detail="Failed to create project in database")
             
         record = response.data[0]
+        await redis_client.invalidate_project(record['id'])
         return ProjectResponse(
             id=record['id'],
             name=record['name'],
@@ -76,7 +130,7 @@ async def create_project(project: ProjectCreate):
             status=record['status'],
             reference_image_url=record['reference_image_url'],
             character_dna=record['character_dna'],
-            created_at=record['created_at'].split("T")[0], # simplified
+            created_at=(record['created_at'] or '')[:10],  # ISO-8601 date prefix
         )
     except Exception as e:
         print(f"DB Error: {e}")
@@ -84,23 +138,31 @@ async def create_project(project: ProjectCreate):
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: str):
-    """Get project details by ID."""
-    from app.db.supabase_client import supabase_service
+async def get_project(project_id: str, request: Request):
+    """
+    Get project details by ID.
+    Served from the Redis response cache when warm; project writes drop the entry.
+    The encoded body is cached, so hits skip model validation and re-encoding;
+    pollers sending a matching If-None-Match get a 304 with no body.
+    """
+    cached = await redis_client.get_project_response(project_id)
+    if cached is not None:
+        return conditional_body_response(request, cached)
+    generation = await redis_client.get_project_generation(project_id)
+    
     try:
-        response = supabase_service.client.table("projects").select("*").eq("id", project_id).execute()
-        if not response.data:
+        record = await supabase_service.select_project(project_id, PROJECT_DETAIL_COLUMNS)
+        if not record:
             raise HTTPException(status_code=404, detail="Project not found")
-            
-        record = response.data[0]
-        return ProjectResponse(
+        
+        project = ProjectResponse(
             id=record['id'],
             name=record['name'],
             description=record.get('description'),
             status=record['status'],
             reference_image_url=record.get('reference_image_url'),
             character_dna=record.get('character_dna'),
-            created_at=record['created_at'].split("T")[0],
+            created_at=(record['created_at'] or '')[:10],
             # Dual-mode fields
             generation_mode=record.get('generation_mode'),
             responder_reference_url=record.get('responder_reference_url'),
@@ -118,6 +180,9 @@ async def get_project(project_id: str):
             difficulty_tier=record.get('difficulty_tier'),
             perspective=record.get('perspective'),
         )
+        body = project.model_dump_json().encode()
+        await redis_client.cache_project_response(project_id, body, generation)
+        return conditional_body_response(request, body)
     except Exception as e:
         print(f"DB Error: {e}")
         raise HTTPException(status_code=404, detail="Project not found")
@@ -129,46 +194,49 @@ async def upload_reference_image(project_id: str, file: UploadFile = File(...)):
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # 1. Read file content
-    content = await file.read()
+    # 1. Read file content (size-capped)
+    content = await _read_upload(file)
     
-    # 2. Upload to Supabase Storage
-    from app.db.supabase_client import supabase_service
-    file_path = f"{project_id}/reference_{uuid.uuid4()}.png"
+    file_path = f"{project_id}/reference_{uuid.uuid4().hex}.png"
     
-    try:
-        # Check if bucket exists, if not create (simplified check by just trying upload)
+    # 2. Upload to Supabase Storage
+    async def store_reference() -> str:
         # Note: In production, ensure bucket 'sprites' exists or handle error
         public_url = await supabase_service.upload_image("sprites", file_path, content, file.content_type)
         
         # Update project with reference URL
         await supabase_service.update_project(project_id, {"reference_image_url": public_url})
-        
-    except Exception as e:
-        print(f"❌ Storage Error: {e}")
-        # Continue? No, we need the image for DNA
-        raise HTTPException(status_code=500, detail=f"Failed to upload image: {e}")
-
-    # 3. Trigger Gemini DNA Extraction
-    from app.services.stages.stage_1_dna_extraction import extract_character_dna
+        return public_url
+    
+    # 3. Gemini DNA Extraction only needs the bytes, so it runs alongside the upload
+    print(f"🧬 Starting DNA Extraction for project {project_id}...")
+    public_url, dna = await asyncio.gather(
+        store_reference(), extract_character_dna(content), return_exceptions=True
+    )
+    
+    if isinstance(public_url, BaseException):
+        print(f"❌ Storage Error: {public_url}")
+        # The image must be stored for the rest of the pipeline, even if DNA succeeded
+        raise HTTPException(status_code=500, detail=f"Failed to upload image: {public_url}")
+    
     try:
-        print(f"🧬 Starting DNA Extraction for project {project_id}...")
-        dna = await extract_character_dna(content)
+        if isinstance(dna, BaseException):
+            raise dna
         
         # 4. Save DNA to DB
-        await supabase_service.save_character_dna(project_id, dna.dict())
+        dna_dict = dna.model_dump(mode="json")
+        await supabase_service.save_character_dna(project_id, dna_dict)
         print(f"✅ DNA Extracted and Saved: {dna.archetype}")
         
         # 5. Send WebSocket notification to trigger UI refresh
-        from app.routers.websocket import send_dna_extracted
-        await send_dna_extracted(project_id, dna.dict())
+        await send_dna_extracted(project_id, dna_dict)
         
         return {
             "project_id": project_id,
             "filename": file.filename,
             "status": "dna_extracted",
             "url": public_url,
-            "dna": dna.dict()
+            "dna": dna_dict
         }
     except Exception as e:
         print(f"❌ Gemini/DNA Error: {e}")
@@ -181,16 +249,14 @@ async def extract_dna_from_reference(project_id: str):
     Re-extract DNA from an already-uploaded reference image.
     Use this when initial DNA extraction failed or needs to be retried.
     """
-    from app.db.supabase_client import supabase_service
-    import httpx
     
     # 1. Get project to find reference image URL
     try:
-        response = supabase_service.client.table("projects").select("reference_image_url").eq("id", project_id).execute()
-        if not response.data:
+        record = await supabase_service.select_project(project_id, "reference_image_url")
+        if not record:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        reference_url = response.data[0].get("reference_image_url")
+        reference_url = record.get("reference_image_url")
         if not reference_url:
             raise HTTPException(status_code=400, detail="No reference image uploaded. Upload image first.")
     except Exception as e:
@@ -199,33 +265,30 @@ async def extract_dna_from_reference(project_id: str):
     
     # 2. Download the image from storage
     try:
-        async with httpx.AsyncClient() as client:
-            img_response = await client.get(reference_url)
-            if img_response.status_code != 200:
-                raise HTTPException(status_code=500, detail="Failed to fetch reference image from storage")
-            content = img_response.content
+        content = await _fetch_reference_bytes(reference_url)
+        if content is None:
+            raise HTTPException(status_code=500, detail="Failed to fetch reference image from storage")
     except Exception as e:
         print(f"❌ Image fetch error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch image: {e}")
     
     # 3. Run DNA extraction using Gemini
-    from app.services.stages.stage_1_dna_extraction import extract_character_dna
     try:
         print(f"🧬 Re-extracting DNA for project {project_id}...")
         dna = await extract_character_dna(content)
         
         # 4. Save DNA to DB
-        await supabase_service.save_character_dna(project_id, dna.dict())
+        dna_dict = dna.model_dump(mode="json")
+        await supabase_service.save_character_dna(project_id, dna_dict)
         print(f"✅ DNA Re-extracted and Saved: {dna.archetype}")
         
         # 5. Send WebSocket notification to trigger UI refresh
-        from app.routers.websocket import send_dna_extracted
-        await send_dna_extracted(project_id, dna.dict())
+        await send_dna_extracted(project_id, dna_dict)
         
         return {
             "project_id": project_id,
             "status": "dna_extracted",
-            "dna": dna.dict()
+            "dna": dna_dict
         }
     except Exception as e:
         print(f"❌ Gemini/DNA Error: {e}")
@@ -252,59 +315,60 @@ async def sync_reference_image(project_id: str, request: SyncReferenceRequest):
     This creates the project if it doesn't exist, uploads the image,
     and optionally extracts DNA.
     """
-    from app.db.supabase_client import supabase_service
-    import base64
     
+    dna_task = None
     try:
-        # Decode base64 image
-        image_bytes = base64.b64decode(request.image_base64)
+        # Decode base64 image off the event loop (a 10 MB image is ~13 MB of base64);
+        # a data: URL prefix is accepted and skipped
+        payload = request.image_base64
+        if payload.startswith("data:"):
+            payload = payload.partition(",")[2]
+        image_bytes = await asyncio.to_thread(base64.b64decode, payload)
         print(f"📥 Sync request: project={project_id}, image size={len(image_bytes)} bytes")
         
-        # Check if project exists
-        existing = supabase_service.client.table("projects").select("id").eq("id", project_id).execute()
-        
-        if not existing.data:
-            # Create the project
-            fake_user_id = "00000000-0000-0000-0000-000000000000"
-            data = {
-                "id": project_id,  # Use the provided project_id
-                "user_id": fake_user_id,
-                "name": (request.description or "Synced character")[:50],
-                "description": request.description,
-                "status": "reference_generated",
-                "reference_image_url": None,
-                "character_dna": request.character_dna,
-                "latest_spritesheet_url": None,
-                "generation_count": 0
-            }
-            response = supabase_service.client.table("projects").insert(data).execute()
-            if not response.data:
-                raise HTTPException(status_code=500, detail="Failed to create project")
-            print(f"📁 Project created via sync: {project_id}")
+        # Extract DNA if not provided; it only needs the bytes, so it runs
+        # while the storage upload is in flight
+        dna = request.character_dna
+        if not dna:
+            print(f"🧬 Extracting DNA for synced project...")
+            dna_task = asyncio.create_task(extract_character_dna(image_bytes))
         
         # Upload image to storage
-        file_path = f"{project_id}/reference_{uuid.uuid4()}.png"
+        file_path = f"{project_id}/reference_{uuid.uuid4().hex}.png"
         public_url = await supabase_service.upload_image(
             "sprites", file_path, image_bytes, "image/png"
         )
         print(f"📤 Reference uploaded: {public_url}")
         
-        # Update project with reference URL
-        await supabase_service.update_project(project_id, {"reference_image_url": public_url})
-        
-        # Extract DNA if not provided
-        dna = request.character_dna
-        if not dna:
-            from app.services.stages.stage_1_dna_extraction import extract_character_dna
+        updates = {"reference_image_url": public_url}
+        if dna_task is not None:
             try:
-                print(f"🧬 Extracting DNA for synced project...")
-                extracted_dna = await extract_character_dna(image_bytes)
-                dna = extracted_dna.dict()
-                await supabase_service.save_character_dna(project_id, dna)
+                extracted_dna = await dna_task
+                dna = extracted_dna.model_dump(mode="json")
+                updates.update(character_dna=dna, status="dna_extracted")
                 print(f"✅ DNA extracted: {dna.get('archetype')}")
             except Exception as e:
                 print(f"⚠️ DNA extraction failed during sync: {e}")
         
+        # One write creates the project with everything; only an existing
+        # project needs a second write to fill in the new fields
+        fake_user_id = "00000000-0000-0000-0000-000000000000"
+        created = await supabase_service.insert_project_if_missing({
+            "id": project_id,  # Use the provided project_id
+            "user_id": fake_user_id,
+            "name": (request.description or "Synced character")[:50],
+            "description": request.description,
+            "status": "reference_generated",
+            "character_dna": request.character_dna,
+            "latest_spritesheet_url": None,
+            "generation_count": 0,
+            **updates,
+        })
+        if created:
+            print(f"📁 Project created via sync: {project_id}")
+        else:
+            await supabase_service.update_project(project_id, updates)
+        
         return {
             "success": True,
             "project_id": project_id,
@@ -314,33 +378,37 @@ async def sync_reference_image(project_id: str, request: SyncReferenceRequest):
         }
         
     except Exception as e:
+        if dna_task is not None:
+            dna_task.cancel()
         print(f"❌ Sync failed: {e}")
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/")
 async def list_projects():
-    """List all projects for the current user."""
-    from app.db.supabase_client import supabase_service
+    """
+    List all projects for the current user.
+    Served from the Redis response cache when warm; project writes drop the entry.
+    """
+    cached = await redis_client.get_project_list()
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    generation = await redis_client.get_project_list_generation()
+    
     try:
-        response = supabase_service.client.table("projects").select("*").order("created_at", desc=True).execute()
+        records = await supabase_service.select_projects(PROJECT_LIST_COLUMNS)
         
-        # Transform for response
-        projects = []
-        for record in response.data:
-            projects.append(ProjectResponse(
-                id=record['id'],
-                name=record['name'],
-                description=record['description'],
-                status=record['status'],
-                reference_image_url=record['reference_image_url'],
-                character_dna=record['character_dna'],
-                created_at=record['created_at'].split("T")[0]
-            ))
-            
-        return {"projects": projects}
+        # Transform for response; rows already have exactly the list columns, so
+        # they are merged over the defaults instead of validated one by one
+        projects = [
+            {**_PROJECT_LIST_DEFAULTS, **record, "created_at": (record["created_at"] or "")[:10]}
+            for record in records
+        ]
+        
+        body = orjson.dumps({"projects": projects})
+        await redis_client.cache_project_list(body, generation)
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         print(f"DB Error: {e}")
         return {"projects": []}
@@ -355,12 +423,11 @@ async def upload_responder_image(project_id: str, file: UploadFile = File(...)):
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # 1. Read file content
-    content = await file.read()
+    # 1. Read file content (size-capped)
+    content = await _read_upload(file)
     
     # 2. Upload to Supabase Storage
-    from app.db.supabase_client import supabase_service
-    file_path = f"{project_id}/responder_{uuid.uuid4()}.png"
+    file_path = f"{project_id}/responder_{uuid.uuid4().hex}.png"
     
     try:
         public_url = await supabase_service.upload_image("sprites", file_path, content, file.content_type)
@@ -386,16 +453,14 @@ async def extract_responder_dna(project_id: str):
     Extract DNA from the already-uploaded responder reference image.
     This should be called after upload_responder_image.
     """
-    from app.db.supabase_client import supabase_service
-    import httpx
     
     # 1. Get project to find responder image URL
     try:
-        response = supabase_service.client.table("projects").select("responder_reference_url").eq("id", project_id).execute()
-        if not response.data:
+        record = await supabase_service.select_project(project_id, "responder_reference_url")
+        if not record:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        responder_url = response.data[0].get("responder_reference_url")
+        responder_url = record.get("responder_reference_url")
         if not responder_url:
             raise HTTPException(status_code=400, detail="No responder image uploaded. Upload image first.")
     except Exception as e:
@@ -404,29 +469,27 @@ async def extract_responder_dna(project_id: str):
     
     # 2. Download the image from storage
     try:
-        async with httpx.AsyncClient() as client:
-            img_response = await client.get(responder_url)
-            if img_response.status_code != 200:
-                raise HTTPException(status_code=500, detail="Failed to fetch responder image from storage")
-            content = img_response.content
+        content = await _fetch_reference_bytes(responder_url)
+        if content is None:
+            raise HTTPException(status_code=500, detail="Failed to fetch responder image from storage")
     except Exception as e:
         print(f"❌ Image fetch error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch image: {e}")
     
     # 3. Run DNA extraction using Gemini
-    from app.services.stages.stage_1_dna_extraction import extract_character_dna
     try:
         print(f"🧬 Starting Responder DNA Extraction for project {project_id}...")
         dna = await extract_character_dna(content)
         
         # 4. Save responder DNA to DB
-        await supabase_service.update_project(project_id, {"responder_dna": dna.dict()})
+        dna_dict = dna.model_dump(mode="json")
+        await supabase_service.update_project(project_id, {"responder_dna": dna_dict})
         print(f"✅ Responder DNA Extracted and Saved: {dna.archetype}")
         
         return {
             "project_id": project_id,
             "status": "dna_extracted",
-            "responder_dna": dna.dict()
+            "responder_dna": dna_dict
         }
     except Exception as e:
         print(f"❌ Gemini/DNA Error: {e}")
@@ -11,14 +11,21 @@ Specialized endpoints for game-ready tile generation:
 
 Each endpoint produces production-ready assets for game engines.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Response
 from pydantic import BaseModel
-from typing import Optional, Literal
-import base64
+from typing import Optional, Literal, Union
+import asyncio
+import json
+import logging
 import uuid
 import os
-import cv2
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from types import MappingProxyType
 import numpy as np
+import orjson
+from cachetools import TTLCache
 
 from app.models.tileset_dna import (
     TerrainTilesetDNA, TerrainType, TilesetFormat, TextureStyle, OutlineStyle, Perspective,
@@ -28,6 +35,7 @@ from app.models.tileset_dna import (
     DecorationTileDNA, DecorationType,
     TransitionTileDNA, TransitionStyle,
     TERRAIN_TILESET_DNA_SCHEMA, PLATFORM_TILE_DNA_SCHEMA, ANIMATED_TILE_DNA_SCHEMA,
+    intern_dna,
 )
 from app.services.tileset_generation.terrain_generator import (
     generate_terrain_tileset, encode_tileset_png,
@@ -48,14 +56,18 @@ from app.services.tileset_generation.animated_generator import (
     generate_animated_tile, encode_animation_strip_png,
 )
 from app.services.tileset_generation.tileset_exporter import (
-    export_tileset_tres, get_tileset_type_from_string,
+    export_tileset_tres, get_tileset_type_from_string, image_dimensions,
     TerrainConfig, TileSetType, encode_tres_base64,
 )
+from app.services.tileset_generation.png_codec import b64decode, b64encode_str
+from app.config import get_settings
 from app.services.gemini_client import gemini_client
 from app.db.supabase_client import supabase_service
 
 router = APIRouter(tags=["Tileset Generation"])
 
+logger = logging.getLogger(__name__)
+
 
 # ============================================================================
 # Request Models
@@ -196,7 +208,8 @@ class TileSetExportRequest(BaseModel):
 # Preset Libraries
 # ============================================================================
 
-TERRAIN_PRESETS = {
+# Read-only tables: every request that picks a preset shares the same DNA object
+TERRAIN_PRESETS = MappingProxyType({
     "grass_meadow": TerrainTilesetDNA(
         terrain_type=TerrainType.GRASS,
         color_palette=["#4A7023", "#5D8A31", "#7CB342", "#90A955"],
@@ -246,9 +259,9 @@ TERRAIN_PRESETS = {
         texture_style=TextureStyle.NOISY,
         outline_style=OutlineStyle.DARK,
     ),
-}
+})
 
-PLATFORM_PRESETS = {
+PLATFORM_PRESETS = MappingProxyType({
     "grass_platform": PlatformTileDNA(
         platform_type=PlatformType.GROUND,
         material=PlatformMaterial.GRASS,
@@ -286,9 +299,9 @@ PLATFORM_PRESETS = {
         color_palette=["#4A4A4A", "#6B6B6B", "#8B8B8B", "#2F2F2F"],
         platform_style=PlatformStyle.ANGULAR,
     ),
-}
+})
 
-ANIMATED_TILE_PRESETS = {
+ANIMATED_TILE_PRESETS = MappingProxyType({
     "calm_water": AnimatedTileDNA(
         tile_type=AnimatedTileType.WATER,
         animation_style=AnimationStyle.WAVE,
@@ -331,9 +344,9 @@ ANIMATED_TILE_PRESETS = {
         frame_count=4,
         glow_intensity=0.0,
     ),
-}
+})
 
-WALL_PRESETS = {
+WALL_PRESETS = MappingProxyType({
     "dungeon_walls": WallTilesetDNA(
         wall_type=WallType.DUNGEON,
         wall_style=WallStyle.WEATHERED,
@@ -364,9 +377,9 @@ WALL_PRESETS = {
         wall_style=WallStyle.PRISTINE,
         color_palette=["#ADD8E6", "#87CEEB", "#B0E0E6", "#E0FFFF"],
     ),
-}
+})
 
-DECORATION_PRESETS = {
+DECORATION_PRESETS = MappingProxyType({
     "wooden_crate": DecorationTileDNA(
         decoration_type=DecorationType.CRATE,
         color_palette=["#8B4513", "#A0522D", "#CD853F", "#6B3A12"],
@@ -409,51 +422,311 @@ DECORATION_PRESETS = {
         size="32x48",
         variation_count=3,
     ),
+})
+
+# Register presets so request-built DNAs equal to one resolve to the shared preset
+for _table in (TERRAIN_PRESETS, PLATFORM_PRESETS, ANIMATED_TILE_PRESETS, WALL_PRESETS, DECORATION_PRESETS):
+    for _preset in _table.values():
+        intern_dna(_preset)
+
+# Preset names never change, so the listing is built once
+PRESET_NAMES = {
+    "terrain_presets": list(TERRAIN_PRESETS),
+    "platform_presets": list(PLATFORM_PRESETS),
+    "wall_presets": list(WALL_PRESETS),
+    "decoration_presets": list(DECORATION_PRESETS),
+    "animated_presets": list(ANIMATED_TILE_PRESETS),
 }
+PRESET_NAMES_BODY = orjson.dumps(PRESET_NAMES)
+
+# Fallback palettes when neither the request nor DNA extraction supplies one
+TERRAIN_DEFAULT_PALETTE = ("#4A7023", "#5D8A31", "#7CB342", "#90A955")
+PLATFORM_DEFAULT_PALETTE = ("#696969", "#808080", "#A9A9A9", "#505050")
+ANIMATED_DEFAULT_PALETTE = ("#1E90FF", "#4169E1", "#00BFFF", "#87CEEB")
+WALL_DEFAULT_PALETTE = ("#404040", "#505050", "#606060", "#303030")
+DECORATION_DEFAULT_PALETTE = ("#808080", "#696969", "#A9A9A9", "#505050")
+NEUTRAL_PALETTE = ("#808080", "#707070", "#909090", "#606060")
+DARK_NEUTRAL_PALETTE = ("#505050", "#404040", "#606060", "#303030")
+
+# DNA-extraction prompts for free-text requests; {prompt} is the user's description
+TERRAIN_DNA_PROMPT = """Analyze this terrain description and extract terrain DNA.
+
+Terrain: {prompt}
+
+Extract:
+- terrain_type: grass, dirt, stone, brick, sand, snow, wood, cave, dungeon, castle
+- color_palette: 3-5 hex colors for this terrain type
+- texture_style: flat, smooth, noisy, detailed
+
+Return valid JSON only."""
+
+PLATFORM_DNA_PROMPT = """Analyze this platform description and extract platform DNA.
+
+Platform: {prompt}
+
+Extract:
+- platform_type: ground, floating, one_way, ice, bouncy
+- material: grass, stone, wood, metal, ice, brick, cloud
+- color_palette: 3-4 hex colors
+- has_grass_top: true if platform should have grass on top
+
+Return valid JSON only."""
+
+ANIMATED_DNA_PROMPT = """Analyze this animated tile description and extract DNA.
+
+Tile: {prompt}
+
+Extract:
+- tile_type: water, lava, fire, crystal, waterfall, smoke, electricity, torch, grass_wind
+- animation_style: wave, flicker, pulse, flow, bubble, sway, sparkle
+- color_palette: 3-4 hex colors
+- glow_intensity: 0-1 for glowing tiles
+
+Return valid JSON only."""
+
+# Transition palettes by terrain name
+TRANSITION_PALETTES = MappingProxyType({
+    "grass": TERRAIN_DEFAULT_PALETTE,
+    "dirt": ("#8B4513", "#A0522D", "#CD853F", "#D2B48C"),
+    "stone": ("#696969", "#808080", "#A9A9A9", "#C0C0C0"),
+    "sand": ("#EDC9AF", "#D4A574", "#C49A6B", "#B08B5D"),
+    "snow": ("#FFFFFF", "#E8E8E8", "#D0D0D0", "#B0E0E6"),
+    "water": ANIMATED_DEFAULT_PALETTE,
+})
 
 
 # ============================================================================
 # Helper Functions
 # ============================================================================
 
+# value -> member tables for the enums built from request strings, so
+# conversions skip EnumMeta.__call__
+_ENUM_MAPS = {
+    cls: MappingProxyType({member.value: member for member in cls})
+    for cls in (
+        TerrainType, TilesetFormat, TextureStyle, OutlineStyle,
+        PlatformType, PlatformStyle, AnimatedTileType, AnimationStyle,
+        WallType, WallStyle, DecorationType, TransitionStyle,
+    )
+}
+
+
+def _enum(cls, value):
+    """cls(value) via _ENUM_MAPS; unknown values still raise cls's ValueError."""
+    try:
+        return _ENUM_MAPS[cls][value]
+    except KeyError:
+        return cls(value)
+
+
+# Preset DNA is fixed, so a preset render is reused instead of regenerated
+GENERATION_CACHE_MAX = 64
+GENERATION_CACHE_TTL = 3600
+_generation_cache: TTLCache = TTLCache(maxsize=GENERATION_CACHE_MAX, ttl=GENERATION_CACHE_TTL)
+
+
+async def _generate_preset_cached(generate, dna, reuse: bool, **options):
+    """
+    Run generate(dna, **options); with reuse, serve an earlier render of the
+    same DNA from _generation_cache instead. Generation is not deterministic,
+    so this is opt-in per request (?reuse_cached=true, presets only): callers
+    that ask for it accept getting the same image as everyone else.
+    Returns (result, cache_hit); renders that failed validation are not kept.
+    """
+    if not reuse:
+        return await generate(dna, **options), False
+    key = (generate.__name__, dna, tuple(sorted(options.items())))
+    if (cached := _generation_cache.get(key)) is not None:
+        return cached, True
+    result = await generate(dna, **options)
+    if getattr(result, "validation_passed", True):
+        _generation_cache[key] = result
+    return result, False
+
+
+# Owner of generated assets until auth is wired in
+ANON_USER_ID = "00000000-0000-0000-0000-000000000000"
+
+
+@lru_cache(maxsize=None)
+def _asset_display_name(asset_type: str) -> str:
+    """Project name for a saved asset type (e.g. "wall_tileset" -> "Wall Tileset")."""
+    return asset_type.replace('_', ' ').title()
+
+
+GENERATED_DIR = "/tmp/spritemancer_generated"
+os.makedirs(GENERATED_DIR, exist_ok=True)
+
+# PNG zlib, base64 and the local write are CPU/disk-bound; keep them off the event loop
+_image_executor = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 2),
+    thread_name_prefix="tileset-image",
+)
+
+
+def _write_generated(path: str, content: Union[bytes, str]) -> None:
+    """
+    Write a generated file (PNG bytes or .tres text) under GENERATED_DIR.
+    Raw os.open/os.write: just openat, write and close, without the fstat/ioctl
+    probes and buffer setup of a Python file object.
+    """
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    try:
+        fd = os.open(path, flags, 0o644)
+    except FileNotFoundError:
+        # GENERATED_DIR is made at import; recreate it if /tmp was cleaned since
+        os.makedirs(GENERATED_DIR, exist_ok=True)
+        fd = os.open(path, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _write_generated_files(files) -> None:
+    """Write several (path, content) pairs under GENERATED_DIR in one call."""
+    for path, content in files:
+        _write_generated(path, content)
+
+
+def _encode_png_base64(encode, image: np.ndarray) -> tuple[bytes, str]:
+    """Encode an image to PNG and base64 it."""
+    image_bytes = encode(image)
+    return image_bytes, b64encode_str(image_bytes)
+
+
+def _finalize_image_sync(
+    encode, image: np.ndarray, name: str, with_base64: bool = True
+) -> tuple[bytes, Optional[str], str]:
+    """Encode an image to PNG, base64 it (unless skipped) and save a copy under GENERATED_DIR."""
+    image_bytes = encode(image)
+    image_base64 = b64encode_str(image_bytes) if with_base64 else None
+    local_path = f"{GENERATED_DIR}/{name}_{secrets.token_hex(4)}.png"
+    _write_generated(local_path, image_bytes)
+    return image_bytes, image_base64, local_path
+
+
+async def _finalize_image(
+    encode, image: np.ndarray, name: str, with_base64: bool = True
+) -> tuple[bytes, Optional[str], str]:
+    """Run _finalize_image_sync on the image pool; returns (png bytes, base64, local path)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _image_executor, _finalize_image_sync, encode, image, name, with_base64
+    )
+
+
+def _binary_image_response(
+    image_bytes: bytes,
+    dna_dict: dict,
+    storage_result: dict,
+    local_path: str,
+    response: Optional[Response] = None,
+) -> Response:
+    """
+    format=binary: the PNG itself as the body, with the metadata a caller needs
+    to track it (DNA, project, upload) moved to X- headers.
+    """
+    headers = {
+        "X-DNA": json.dumps(dna_dict, separators=(",", ":")),
+        "X-Project-Id": storage_result["project_id"],
+        "X-Asset-Url": storage_result["url"] or "",
+        "X-Upload-Status": storage_result["upload_status"],
+        "X-Local-Path": local_path,
+    }
+    if response is not None:
+        # Headers set on the injected response (e.g. X-Cache-Hit) don't carry over on their own
+        headers.update((k, v) for k, v in response.headers.items() if k.startswith("x-"))
+    return Response(content=image_bytes, media_type="image/png", headers=headers)
+
+
+def _tileset_row(url: str, asset_type: str, dna: Union[BaseModel, dict]) -> dict:
+    """Project row for a saved tileset image."""
+    return {
+        "user_id": ANON_USER_ID,
+        "name": _asset_display_name(asset_type),
+        "description": f"Generated {asset_type}",
+        "status": "completed",
+        "latest_spritesheet_url": url,
+        "character_dna": dna,
+    }
+
+
 async def save_tileset_to_storage(
     project_id: str,
-    image_bytes: bytes,
+    image_bytes: Union[bytes, memoryview],
     asset_type: str,
-    dna: dict,
+    dna: Union[BaseModel, dict],
 ) -> dict:
-    """Save generated tileset to Supabase storage."""
+    """
+    Save generated tileset to Supabase storage. A DNA model is written as its
+    pydantic-core JSON without a dict round-trip.
+    """
     try:
         # Upload to storage
-        file_path = f"{project_id}/{asset_type}_{uuid.uuid4().hex[:8]}.png"
-        url = await supabase_service.upload_image(
-            "sprites", file_path, image_bytes, "image/png"
-        )
+        file_path = f"{project_id}/{asset_type}_{secrets.token_hex(4)}.png"
+        url = await supabase_service.upload_image("sprites", file_path, image_bytes, "image/png")
         
-        # Create/update project
-        fake_user_id = "00000000-0000-0000-0000-000000000000"
-        data = {
-            "user_id": fake_user_id,
-            "name": f"{asset_type.replace('_', ' ').title()}",
-            "description": f"Generated {asset_type}",
-            "status": "completed",
-            "latest_spritesheet_url": url,
-            "character_dna": dna,
-        }
+        # Create project
+        record = await supabase_service.insert_project(_tileset_row(url, asset_type, dna)) if url else None
+        if record:
+            project_id = record['id']
         
-        response = supabase_service.client.table("projects").insert(data).execute()
-        if response.data:
-            project_id = response.data[0]['id']
-        
-        return {
-            "project_id": project_id,
-            "url": url,
-        }
+        return {"project_id": project_id, "url": url or None}
     except Exception as e:
-        print(f"⚠️ Failed to save to storage: {e}")
+        logger.warning("Failed to save to storage: %s", e)
         return {"project_id": project_id, "url": None}
 
 
+def reserve_tileset_save(asset_type: str) -> tuple[str, str, str]:
+    """
+    Pre-assign (project_id, storage path, public URL) for a tileset saved after
+    the response; public URLs are derived from the path, so they're known upfront.
+    """
+    project_id = str(uuid.uuid4())
+    path = f"{project_id}/{asset_type}_{secrets.token_hex(4)}.png"
+    return project_id, path, supabase_service.get_public_url("sprites", path)
+
+
+async def save_reserved_tileset(
+    project_id: str,
+    path: str,
+    image_bytes: Union[bytes, memoryview],
+    asset_type: str,
+    dna: Union[BaseModel, dict],
+) -> None:
+    """Background half of reserve_tileset_save: upload, then insert the row under project_id."""
+    try:
+        url = await supabase_service.upload_image("sprites", path, image_bytes, "image/png")
+        if url:
+            await supabase_service.insert_project({"id": project_id, **_tileset_row(url, asset_type, dna)})
+    except Exception as e:
+        logger.warning("Background tileset save for %s failed: %s", project_id, e)
+
+
+async def _save_tileset(
+    background_tasks: BackgroundTasks,
+    wait_for_upload: bool,
+    image_bytes: Union[bytes, memoryview],
+    asset_type: str,
+    dna: Union[BaseModel, dict],
+) -> dict:
+    """
+    Save a generated tileset for an endpoint response. By default the upload runs
+    after the response is sent and the reserved id/URL come back as "pending";
+    wait_for_upload=True saves inline and reports the stored URL.
+    """
+    if wait_for_upload:
+        saved = await save_tileset_to_storage(str(uuid.uuid4()), image_bytes, asset_type, dna)
+        return {**saved, "upload_status": "completed" if saved["url"] else "failed"}
+    project_id, path, url = reserve_tileset_save(asset_type)
+    background_tasks.add_task(save_reserved_tileset, project_id, path, image_bytes, asset_type, dna)
+    return {"project_id": project_id, "url": url, "upload_status": "pending"}
+
+
 # ============================================================================
 # API Endpoints
 # ============================================================================
@@ -461,17 +734,18 @@ async def save_tileset_to_storage(
 @router.get("/tileset-presets")
 async def list_tileset_presets():
     """List all available tileset presets."""
-    return {
-        "terrain_presets": list(TERRAIN_PRESETS.keys()),
-        "platform_presets": list(PLATFORM_PRESETS.keys()),
-        "wall_presets": list(WALL_PRESETS.keys()),
-        "decoration_presets": list(DECORATION_PRESETS.keys()),
-        "animated_presets": list(ANIMATED_TILE_PRESETS.keys()),
-    }
+    return Response(content=PRESET_NAMES_BODY, media_type="application/json")
 
 
 @router.post("/generate-terrain-tileset")
-async def api_generate_terrain_tileset(request: TerrainTilesetRequest):
+async def api_generate_terrain_tileset(
+    request: TerrainTilesetRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    wait_for_upload: bool = False,
+    reuse_cached: bool = False,
+    response_format: Literal["json", "binary"] = Query("json", alias="format"),
+):
     """
     Generate a complete, game-ready terrain tileset.
     
@@ -484,44 +758,36 @@ async def api_generate_terrain_tileset(request: TerrainTilesetRequest):
     """
     try:
         # Build DNA from request
-        if request.preset and request.preset in TERRAIN_PRESETS:
-            dna = TERRAIN_PRESETS[request.preset]
+        if (preset := TERRAIN_PRESETS.get(request.preset)) is not None:
+            dna = preset
         elif request.prompt:
             # Use AI to extract DNA from description
-            dna_prompt = f"""Analyze this terrain description and extract terrain DNA.
-
-Terrain: {request.prompt}
-
-Extract:
-- terrain_type: grass, dirt, stone, brick, sand, snow, wood, cave, dungeon, castle
-- color_palette: 3-5 hex colors for this terrain type
-- texture_style: flat, smooth, noisy, detailed
-
-Return valid JSON only."""
+            dna_prompt = TERRAIN_DNA_PROMPT.format(prompt=request.prompt)
             
             result = await gemini_client.generate_text(
                 prompt=dna_prompt,
                 response_schema=TERRAIN_TILESET_DNA_SCHEMA,
                 temperature=0.3,
+                attempt_timeout=get_settings().gemini_dna_timeout_seconds,
             )
             
             dna = TerrainTilesetDNA(
                 terrain_type=TerrainType(result.get("terrain_type", "grass")),
-                color_palette=result.get("color_palette", ["#4A7023", "#5D8A31", "#7CB342"]),
-                tileset_format=TilesetFormat(request.tileset_format),
+                color_palette=result.get("color_palette", TERRAIN_DEFAULT_PALETTE[:3]),
+                tileset_format=_enum(TilesetFormat, request.tileset_format),
                 tile_size=request.tile_size,
                 texture_style=TextureStyle(result.get("texture_style", "noisy")),
-                outline_style=OutlineStyle(request.outline_style),
+                outline_style=_enum(OutlineStyle, request.outline_style),
                 perspective=Perspective(request.perspective),
             )
         elif request.terrain_type:
             dna = TerrainTilesetDNA(
-                terrain_type=TerrainType(request.terrain_type),
-                color_palette=request.color_palette or ["#4A7023", "#5D8A31", "#7CB342", "#90A955"],
-                tileset_format=TilesetFormat(request.tileset_format),
+                terrain_type=_enum(TerrainType, request.terrain_type),
+                color_palette=request.color_palette or TERRAIN_DEFAULT_PALETTE,
+                tileset_format=_enum(TilesetFormat, request.tileset_format),
                 tile_size=request.tile_size,
-                texture_style=TextureStyle(request.texture_style),
-                outline_style=OutlineStyle(request.outline_style),
+                texture_style=_enum(TextureStyle, request.texture_style),
+                outline_style=_enum(OutlineStyle, request.outline_style),
                 perspective=Perspective(request.perspective),
             )
         else:
@@ -530,33 +796,37 @@ Return valid JSON only."""
                 detail="Provide preset, prompt, or terrain_type"
             )
         
-        # Generate tileset
-        result = await generate_terrain_tileset(dna, use_difference_matte=request.use_difference_matte)
+        dna = intern_dna(dna)
         
-        # Encode PNG
-        image_bytes = encode_tileset_png(result.tileset_image)
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        # Generate tileset
+        result, cache_hit = await _generate_preset_cached(
+            generate_terrain_tileset, dna, preset is not None and reuse_cached, use_difference_matte=request.use_difference_matte
+        )
+        response.headers["X-Cache-Hit"] = "1" if cache_hit else "0"
         
-        # Save locally
-        output_dir = "/tmp/spritemancer_generated"
-        os.makedirs(output_dir, exist_ok=True)
-        local_path = f"{output_dir}/terrain_{dna.terrain_type.value}_{uuid.uuid4().hex[:8]}.png"
-        with open(local_path, "wb") as f:
-            f.write(image_bytes)
+        # Encode PNG and save locally
+        image_bytes, image_base64, local_path = await _finalize_image(
+            encode_tileset_png, result.tileset_image, f"terrain_{dna.terrain_type.value}",
+            with_base64=response_format == "json"
+        )
         
-        # Save to cloud
-        project_id = str(uuid.uuid4())
-        storage_result = await save_tileset_to_storage(
-            project_id, image_bytes, "terrain_tileset", dna.dict()
+        # Save to cloud (after the response unless wait_for_upload)
+        storage_result = await _save_tileset(
+            background_tasks, wait_for_upload, image_bytes, "terrain_tileset", dna
         )
         
+        if response_format == "binary":
+            return _binary_image_response(
+                image_bytes, dna.json_dict, storage_result, local_path, response
+            )
+        
         return {
             "asset_type": "terrain_tileset",
             "terrain_type": dna.terrain_type.value,
             "tileset_format": dna.tileset_format.value,
             "tile_size": dna.tile_size,
             "tile_count": result.tile_count,
-            "dna": dna.dict(),
+            "dna": dna.json_dict,
             "validation_passed": result.validation_passed,
             "validation_message": result.validation_message,
             "background_removal_method": result.background_removal_method,
@@ -564,20 +834,26 @@ Return valid JSON only."""
             "local_path": local_path,
             "project_id": storage_result["project_id"],
             "tileset_url": storage_result["url"],
+            "upload_status": storage_result["upload_status"],
             "status": "generated",
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Terrain tileset generation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Terrain tileset generation failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-platform-tiles")
-async def api_generate_platform_tiles(request: PlatformTileRequest):
+async def api_generate_platform_tiles(
+    request: PlatformTileRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    wait_for_upload: bool = False,
+    reuse_cached: bool = False,
+    response_format: Literal["json", "binary"] = Query("json", alias="format"),
+):
     """
     Generate platformer-ready platform tiles.
     
@@ -589,43 +865,34 @@ async def api_generate_platform_tiles(request: PlatformTileRequest):
     """
     try:
         # Build DNA from request
-        if request.preset and request.preset in PLATFORM_PRESETS:
-            dna = PLATFORM_PRESETS[request.preset]
+        if (preset := PLATFORM_PRESETS.get(request.preset)) is not None:
+            dna = preset
         elif request.prompt:
             # Use AI to extract DNA
-            dna_prompt = f"""Analyze this platform description and extract platform DNA.
-
-Platform: {request.prompt}
-
-Extract:
-- platform_type: ground, floating, one_way, ice, bouncy
-- material: grass, stone, wood, metal, ice, brick, cloud
-- color_palette: 3-4 hex colors
-- has_grass_top: true if platform should have grass on top
-
-Return valid JSON only."""
+            dna_prompt = PLATFORM_DNA_PROMPT.format(prompt=request.prompt)
             
             result = await gemini_client.generate_text(
                 prompt=dna_prompt,
                 response_schema=PLATFORM_TILE_DNA_SCHEMA,
                 temperature=0.3,
+                attempt_timeout=get_settings().gemini_dna_timeout_seconds,
             )
             
             dna = PlatformTileDNA(
                 platform_type=PlatformType(result.get("platform_type", "ground")),
                 material=PlatformMaterial(result.get("material", "stone")),
-                color_palette=result.get("color_palette", ["#696969", "#808080", "#A9A9A9"]),
-                platform_style=PlatformStyle(request.platform_style),
+                color_palette=result.get("color_palette", PLATFORM_DEFAULT_PALETTE[:3]),
+                platform_style=_enum(PlatformStyle, request.platform_style),
                 tile_size=request.tile_size,
                 has_grass_top=result.get("has_grass_top", request.has_grass_top),
                 include_slopes=request.include_slopes,
             )
         elif request.material:
             dna = PlatformTileDNA(
-                platform_type=PlatformType(request.platform_type),
+                platform_type=_enum(PlatformType, request.platform_type),
                 material=PlatformMaterial(request.material),
-                color_palette=request.color_palette or ["#696969", "#808080", "#A9A9A9", "#505050"],
-                platform_style=PlatformStyle(request.platform_style),
+                color_palette=request.color_palette or PLATFORM_DEFAULT_PALETTE,
+                platform_style=_enum(PlatformStyle, request.platform_style),
                 tile_size=request.tile_size,
                 has_grass_top=request.has_grass_top,
                 include_slopes=request.include_slopes,
@@ -636,26 +903,28 @@ Return valid JSON only."""
                 detail="Provide preset, prompt, or material"
             )
         
-        # Generate tiles
-        result = await generate_platform_tiles(dna)
+        dna = intern_dna(dna)
         
-        # Encode PNG
-        image_bytes = encode_platform_strip_png(result.strip_image)
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        # Generate tiles
+        result, cache_hit = await _generate_preset_cached(generate_platform_tiles, dna, preset is not None and reuse_cached)
+        response.headers["X-Cache-Hit"] = "1" if cache_hit else "0"
         
-        # Save locally
-        output_dir = "/tmp/spritemancer_generated"
-        os.makedirs(output_dir, exist_ok=True)
-        local_path = f"{output_dir}/platform_{dna.material.value}_{uuid.uuid4().hex[:8]}.png"
-        with open(local_path, "wb") as f:
-            f.write(image_bytes)
+        # Encode PNG and save locally
+        image_bytes, image_base64, local_path = await _finalize_image(
+            encode_platform_strip_png, result.strip_image, f"platform_{dna.material.value}",
+            with_base64=response_format == "json"
+        )
         
-        # Save to cloud
-        project_id = str(uuid.uuid4())
-        storage_result = await save_tileset_to_storage(
-            project_id, image_bytes, "platform_tiles", dna.dict()
+        # Save to cloud (after the response unless wait_for_upload)
+        storage_result = await _save_tileset(
+            background_tasks, wait_for_upload, image_bytes, "platform_tiles", dna
         )
         
+        if response_format == "binary":
+            return _binary_image_response(
+                image_bytes, dna.json_dict, storage_result, local_path, response
+            )
+        
         return {
             "asset_type": "platform_tiles",
             "platform_type": dna.platform_type.value,
@@ -663,27 +932,33 @@ Return valid JSON only."""
             "tile_size": dna.tile_size,
             "tile_count": result.tile_count,
             "tile_names": list(result.tiles.keys()),
-            "dna": dna.dict(),
+            "dna": dna.json_dict,
             "validation_passed": result.validation_passed,
             "validation_message": result.validation_message,
             "image_base64": image_base64,
             "local_path": local_path,
             "project_id": storage_result["project_id"],
             "tileset_url": storage_result["url"],
+            "upload_status": storage_result["upload_status"],
             "status": "generated",
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Platform tile generation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Platform tile generation failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-animated-tile")
-async def api_generate_animated_tile(request: AnimatedTileRequest):
+async def api_generate_animated_tile(
+    request: AnimatedTileRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    wait_for_upload: bool = False,
+    reuse_cached: bool = False,
+    response_format: Literal["json", "binary"] = Query("json", alias="format"),
+):
     """
     Generate animated environmental tile.
     
@@ -696,41 +971,32 @@ async def api_generate_animated_tile(request: AnimatedTileRequest):
     """
     try:
         # Build DNA from request
-        if request.preset and request.preset in ANIMATED_TILE_PRESETS:
-            dna = ANIMATED_TILE_PRESETS[request.preset]
+        if (preset := ANIMATED_TILE_PRESETS.get(request.preset)) is not None:
+            dna = preset
         elif request.prompt:
             # Use AI to extract DNA
-            dna_prompt = f"""Analyze this animated tile description and extract DNA.
-
-Tile: {request.prompt}
-
-Extract:
-- tile_type: water, lava, fire, crystal, waterfall, smoke, electricity, torch, grass_wind
-- animation_style: wave, flicker, pulse, flow, bubble, sway, sparkle
-- color_palette: 3-4 hex colors
-- glow_intensity: 0-1 for glowing tiles
-
-Return valid JSON only."""
+            dna_prompt = ANIMATED_DNA_PROMPT.format(prompt=request.prompt)
             
             result = await gemini_client.generate_text(
                 prompt=dna_prompt,
                 response_schema=ANIMATED_TILE_DNA_SCHEMA,
                 temperature=0.3,
+                attempt_timeout=get_settings().gemini_dna_timeout_seconds,
             )
             
             dna = AnimatedTileDNA(
                 tile_type=AnimatedTileType(result.get("tile_type", "water")),
                 animation_style=AnimationStyle(result.get("animation_style", "wave")),
-                color_palette=result.get("color_palette", ["#1E90FF", "#4169E1", "#00BFFF"]),
+                color_palette=result.get("color_palette", ANIMATED_DEFAULT_PALETTE[:3]),
                 frame_count=request.frame_count,
                 tile_size=request.tile_size,
                 glow_intensity=result.get("glow_intensity", request.glow_intensity),
             )
         elif request.tile_type:
             dna = AnimatedTileDNA(
-                tile_type=AnimatedTileType(request.tile_type),
-                animation_style=AnimationStyle(request.animation_style or "wave"),
-                color_palette=request.color_palette or ["#1E90FF", "#4169E1", "#00BFFF", "#87CEEB"],
+                tile_type=_enum(AnimatedTileType, request.tile_type),
+                animation_style=_enum(AnimationStyle, request.animation_style or "wave"),
+                color_palette=request.color_palette or ANIMATED_DEFAULT_PALETTE,
                 frame_count=request.frame_count,
                 tile_size=request.tile_size,
                 glow_intensity=request.glow_intensity,
@@ -741,33 +1007,35 @@ Return valid JSON only."""
                 detail="Provide preset, prompt, or tile_type"
             )
         
-        # Generate tile
-        result = await generate_animated_tile(dna)
+        dna = intern_dna(dna)
         
-        # Encode PNG
-        image_bytes = encode_animation_strip_png(result.strip_image)
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        # Generate tile
+        result, cache_hit = await _generate_preset_cached(generate_animated_tile, dna, preset is not None and reuse_cached)
+        response.headers["X-Cache-Hit"] = "1" if cache_hit else "0"
         
-        # Save locally
-        output_dir = "/tmp/spritemancer_generated"
-        os.makedirs(output_dir, exist_ok=True)
-        local_path = f"{output_dir}/animated_{dna.tile_type.value}_{uuid.uuid4().hex[:8]}.png"
-        with open(local_path, "wb") as f:
-            f.write(image_bytes)
+        # Encode PNG and save locally
+        image_bytes, image_base64, local_path = await _finalize_image(
+            encode_animation_strip_png, result.strip_image, f"animated_{dna.tile_type.value}",
+            with_base64=response_format == "json"
+        )
         
-        # Save to cloud
-        project_id = str(uuid.uuid4())
-        storage_result = await save_tileset_to_storage(
-            project_id, image_bytes, "animated_tile", dna.dict()
+        # Save to cloud (after the response unless wait_for_upload)
+        storage_result = await _save_tileset(
+            background_tasks, wait_for_upload, image_bytes, "animated_tile", dna
         )
         
+        if response_format == "binary":
+            return _binary_image_response(
+                image_bytes, dna.json_dict, storage_result, local_path, response
+            )
+        
         return {
             "asset_type": "animated_tile",
             "tile_type": dna.tile_type.value,
             "animation_style": dna.animation_style.value,
             "tile_size": dna.tile_size,
             "frame_count": result.frame_count,
-            "dna": dna.dict(),
+            "dna": dna.json_dict,
             "is_seamless": result.is_seamless,
             "seamless_score": result.seamless_score,
             "validation_message": result.validation_message,
@@ -775,20 +1043,26 @@ Return valid JSON only."""
             "local_path": local_path,
             "project_id": storage_result["project_id"],
             "tileset_url": storage_result["url"],
+            "upload_status": storage_result["upload_status"],
             "status": "generated",
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Animated tile generation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Animated tile generation failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-wall-tileset")
-async def api_generate_wall_tileset(request: WallTilesetRequest):
+async def api_generate_wall_tileset(
+    request: WallTilesetRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    wait_for_upload: bool = False,
+    reuse_cached: bool = False,
+    response_format: Literal["json", "binary"] = Query("json", alias="format"),
+):
     """
     Generate a complete wall tileset for dungeons, caves, and buildings.
     
@@ -799,13 +1073,13 @@ async def api_generate_wall_tileset(request: WallTilesetRequest):
     """
     try:
         # Build DNA from request
-        if request.preset and request.preset in WALL_PRESETS:
-            dna = WALL_PRESETS[request.preset]
+        if (preset := WALL_PRESETS.get(request.preset)) is not None:
+            dna = preset
         elif request.wall_type:
             dna = WallTilesetDNA(
-                wall_type=WallType(request.wall_type),
-                wall_style=WallStyle(request.wall_style),
-                color_palette=request.color_palette or ["#404040", "#505050", "#606060", "#303030"],
+                wall_type=_enum(WallType, request.wall_type),
+                wall_style=_enum(WallStyle, request.wall_style),
+                color_palette=request.color_palette or WALL_DEFAULT_PALETTE,
                 tile_size=request.tile_size,
             )
         else:
@@ -814,32 +1088,36 @@ async def api_generate_wall_tileset(request: WallTilesetRequest):
                 detail="Provide preset or wall_type"
             )
         
-        # Generate tileset
-        result = await generate_wall_tileset(dna, use_difference_matte=request.use_difference_matte)
+        dna = intern_dna(dna)
         
-        # Encode PNG
-        image_bytes = encode_wall_tileset_png(result.tileset_image)
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        # Generate tileset
+        result, cache_hit = await _generate_preset_cached(
+            generate_wall_tileset, dna, preset is not None and reuse_cached, use_difference_matte=request.use_difference_matte
+        )
+        response.headers["X-Cache-Hit"] = "1" if cache_hit else "0"
         
-        # Save locally
-        output_dir = "/tmp/spritemancer_generated"
-        os.makedirs(output_dir, exist_ok=True)
-        local_path = f"{output_dir}/wall_{dna.wall_type.value}_{uuid.uuid4().hex[:8]}.png"
-        with open(local_path, "wb") as f:
-            f.write(image_bytes)
+        # Encode PNG and save locally
+        image_bytes, image_base64, local_path = await _finalize_image(
+            encode_wall_tileset_png, result.tileset_image, f"wall_{dna.wall_type.value}",
+            with_base64=response_format == "json"
+        )
         
-        # Save to cloud
-        project_id = str(uuid.uuid4())
-        storage_result = await save_tileset_to_storage(
-            project_id, image_bytes, "wall_tileset", dna.dict()
+        # Save to cloud (after the response unless wait_for_upload)
+        storage_result = await _save_tileset(
+            background_tasks, wait_for_upload, image_bytes, "wall_tileset", dna
         )
         
+        if response_format == "binary":
+            return _binary_image_response(
+                image_bytes, dna.json_dict, storage_result, local_path, response
+            )
+        
         return {
             "asset_type": "wall_tileset",
             "wall_type": dna.wall_type.value,
             "tile_size": dna.tile_size,
             "tile_count": result.tile_count,
-            "dna": dna.dict(),
+            "dna": dna.json_dict,
             "validation_passed": result.validation_passed,
             "validation_message": result.validation_message,
             "background_removal_method": result.background_removal_method,
@@ -847,20 +1125,26 @@ async def api_generate_wall_tileset(request: WallTilesetRequest):
             "local_path": local_path,
             "project_id": storage_result["project_id"],
             "tileset_url": storage_result["url"],
+            "upload_status": storage_result["upload_status"],
             "status": "generated",
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Wall tileset generation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Wall tileset generation failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-decoration")
-async def api_generate_decoration(request: DecorationRequest):
+async def api_generate_decoration(
+    request: DecorationRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    wait_for_upload: bool = False,
+    reuse_cached: bool = False,
+    response_format: Literal["json", "binary"] = Query("json", alias="format"),
+):
     """
     Generate decoration/prop sprites with optional variations.
     
@@ -872,12 +1156,12 @@ async def api_generate_decoration(request: DecorationRequest):
     """
     try:
         # Build DNA from request
-        if request.preset and request.preset in DECORATION_PRESETS:
-            dna = DECORATION_PRESETS[request.preset]
+        if (preset := DECORATION_PRESETS.get(request.preset)) is not None:
+            dna = preset
         elif request.decoration_type:
             dna = DecorationTileDNA(
-                decoration_type=DecorationType(request.decoration_type),
-                color_palette=request.color_palette or ["#808080", "#696969", "#A9A9A9", "#505050"],
+                decoration_type=_enum(DecorationType, request.decoration_type),
+                color_palette=request.color_palette or DECORATION_DEFAULT_PALETTE,
                 size=request.size,
                 variation_count=request.variation_count,
                 perspective=Perspective(request.perspective),
@@ -889,32 +1173,36 @@ async def api_generate_decoration(request: DecorationRequest):
                 detail="Provide preset or decoration_type"
             )
         
-        # Generate decoration
-        result = await generate_decoration(dna, use_difference_matte=request.use_difference_matte)
+        dna = intern_dna(dna)
         
-        # Encode PNG
-        image_bytes = encode_decoration_png(result.sprite_image)
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        # Generate decoration
+        result, cache_hit = await _generate_preset_cached(
+            generate_decoration, dna, preset is not None and reuse_cached, use_difference_matte=request.use_difference_matte
+        )
+        response.headers["X-Cache-Hit"] = "1" if cache_hit else "0"
         
-        # Save locally
-        output_dir = "/tmp/spritemancer_generated"
-        os.makedirs(output_dir, exist_ok=True)
-        local_path = f"{output_dir}/decoration_{dna.decoration_type.value}_{uuid.uuid4().hex[:8]}.png"
-        with open(local_path, "wb") as f:
-            f.write(image_bytes)
+        # Encode PNG and save locally
+        image_bytes, image_base64, local_path = await _finalize_image(
+            encode_decoration_png, result.sprite_image, f"decoration_{dna.decoration_type.value}",
+            with_base64=response_format == "json"
+        )
         
-        # Save to cloud
-        project_id = str(uuid.uuid4())
-        storage_result = await save_tileset_to_storage(
-            project_id, image_bytes, "decoration", dna.dict()
+        # Save to cloud (after the response unless wait_for_upload)
+        storage_result = await _save_tileset(
+            background_tasks, wait_for_upload, image_bytes, "decoration", dna
         )
         
+        if response_format == "binary":
+            return _binary_image_response(
+                image_bytes, dna.json_dict, storage_result, local_path, response
+            )
+        
         return {
             "asset_type": "decoration",
             "decoration_type": dna.decoration_type.value,
             "sprite_size": result.sprite_size,
             "variation_count": result.variation_count,
-            "dna": dna.dict(),
+            "dna": dna.json_dict,
             "validation_passed": result.validation_passed,
             "validation_message": result.validation_message,
             "background_removal_method": result.background_removal_method,
@@ -922,20 +1210,24 @@ async def api_generate_decoration(request: DecorationRequest):
             "local_path": local_path,
             "project_id": storage_result["project_id"],
             "sprite_url": storage_result["url"],
+            "upload_status": storage_result["upload_status"],
             "status": "generated",
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Decoration generation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Decoration generation failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-transition-tiles")
-async def api_generate_transition_tiles(request: TransitionTileRequest):
+async def api_generate_transition_tiles(
+    request: TransitionTileRequest,
+    background_tasks: BackgroundTasks,
+    wait_for_upload: bool = False,
+    response_format: Literal["json", "binary"] = Query("json", alias="format"),
+):
     """
     Generate terrain transition tiles for blending between two terrain types.
     
@@ -944,21 +1236,11 @@ async def api_generate_transition_tiles(request: TransitionTileRequest):
     - 4 corner transitions (TL, TR, BL, BR)
     """
     try:
-        # Default palettes based on terrain types
-        default_palettes = {
-            "grass": ["#4A7023", "#5D8A31", "#7CB342", "#90A955"],
-            "dirt": ["#8B4513", "#A0522D", "#CD853F", "#D2B48C"],
-            "stone": ["#696969", "#808080", "#A9A9A9", "#C0C0C0"],
-            "sand": ["#EDC9AF", "#D4A574", "#C49A6B", "#B08B5D"],
-            "snow": ["#FFFFFF", "#E8E8E8", "#D0D0D0", "#B0E0E6"],
-            "water": ["#1E90FF", "#4169E1", "#00BFFF", "#87CEEB"],
-        }
-        
-        from_palette = request.from_palette or default_palettes.get(
-            request.from_terrain.lower(), ["#808080", "#707070", "#909090", "#606060"]
+        from_palette = request.from_palette or TRANSITION_PALETTES.get(
+            request.from_terrain.lower(), NEUTRAL_PALETTE
         )
-        to_palette = request.to_palette or default_palettes.get(
-            request.to_terrain.lower(), ["#505050", "#404040", "#606060", "#303030"]
+        to_palette = request.to_palette or TRANSITION_PALETTES.get(
+            request.to_terrain.lower(), DARK_NEUTRAL_PALETTE
         )
         
         dna = TransitionTileDNA(
@@ -967,29 +1249,28 @@ async def api_generate_transition_tiles(request: TransitionTileRequest):
             from_palette=from_palette,
             to_palette=to_palette,
             tile_size=request.tile_size,
-            transition_style=TransitionStyle(request.transition_style),
+            transition_style=_enum(TransitionStyle, request.transition_style),
         )
         
         # Generate transition tiles
         result = await generate_transition_tiles(dna)
         
-        # Encode PNG
-        image_bytes = encode_transition_tileset_png(result.tileset_image)
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-        
-        # Save locally
-        output_dir = "/tmp/spritemancer_generated"
-        os.makedirs(output_dir, exist_ok=True)
-        local_path = f"{output_dir}/transition_{dna.from_terrain}_{dna.to_terrain}_{uuid.uuid4().hex[:8]}.png"
-        with open(local_path, "wb") as f:
-            f.write(image_bytes)
+        # Encode PNG and save locally
+        image_bytes, image_base64, local_path = await _finalize_image(
+            encode_transition_tileset_png, result.tileset_image, f"transition_{dna.from_terrain}_{dna.to_terrain}",
+            with_base64=response_format == "json"
+        )
         
-        # Save to cloud
-        project_id = str(uuid.uuid4())
-        storage_result = await save_tileset_to_storage(
-            project_id, image_bytes, "transition_tiles", dna.dict()
+        # Save to cloud (after the response unless wait_for_upload)
+        storage_result = await _save_tileset(
+            background_tasks, wait_for_upload, image_bytes, "transition_tiles", dna
         )
         
+        if response_format == "binary":
+            return _binary_image_response(
+                image_bytes, dna.model_dump(mode="json"), storage_result, local_path
+            )
+        
         return {
             "asset_type": "transition_tiles",
             "from_terrain": dna.from_terrain,
@@ -997,22 +1278,21 @@ async def api_generate_transition_tiles(request: TransitionTileRequest):
             "tile_size": dna.tile_size,
             "tile_count": result.tile_count,
             "tile_names": result.tile_names,
-            "dna": dna.dict(),
+            "dna": dna.model_dump(mode="json"),
             "validation_passed": result.validation_passed,
             "validation_message": result.validation_message,
             "image_base64": image_base64,
             "local_path": local_path,
             "project_id": storage_result["project_id"],
             "tileset_url": storage_result["url"],
+            "upload_status": storage_result["upload_status"],
             "status": "generated",
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Transition tile generation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Transition tile generation failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -1029,12 +1309,10 @@ async def api_export_tileset_resource(request: TileSetExportRequest):
     Returns both the .tres file content and the original image for saving.
     """
     try:
-        # Decode the tileset image
-        image_bytes = base64.b64decode(request.tileset_image_base64)
-        np_array = np.frombuffer(image_bytes, np.uint8)
-        tileset_image = cv2.imdecode(np_array, cv2.IMREAD_UNCHANGED)
-        
-        if tileset_image is None:
+        # Only the image size is needed; PNGs are sized from their header after
+        # a CRC walk of their chunks, so truncated uploads are still rejected
+        image_bytes = b64decode(request.tileset_image_base64)
+        if image_dimensions(image_bytes, verify=True) is None:
             raise HTTPException(
                 status_code=400,
                 detail="Failed to decode tileset image"
@@ -1055,7 +1333,7 @@ async def api_export_tileset_resource(request: TileSetExportRequest):
         
         # Export as .tres
         result = export_tileset_tres(
-            tileset_image=tileset_image,
+            tileset_image=image_bytes,
             tile_size=request.tile_size,
             texture_path=request.texture_path,
             tileset_type=tileset_type,
@@ -1066,27 +1344,21 @@ async def api_export_tileset_resource(request: TileSetExportRequest):
         # Encode .tres content as base64
         tres_base64 = encode_tres_base64(result.tres_content)
         
-        # Save locally
-        output_dir = "/tmp/spritemancer_generated"
-        os.makedirs(output_dir, exist_ok=True)
-        
         # Generate filenames
         safe_name = request.terrain_name.replace(" ", "_").lower()[:20]
-        timestamp = uuid.uuid4().hex[:8]
+        timestamp = secrets.token_hex(4)
         tres_filename = f"{safe_name}_{timestamp}.tres"
         png_filename = f"{safe_name}_{timestamp}.png"
+        tres_path = f"{GENERATED_DIR}/{tres_filename}"
+        png_path = f"{GENERATED_DIR}/{png_filename}"
         
-        # Save .tres file
-        tres_path = f"{output_dir}/{tres_filename}"
-        with open(tres_path, "w") as f:
-            f.write(result.tres_content)
-        
-        # Save PNG file
-        png_path = f"{output_dir}/{png_filename}"
-        with open(png_path, "wb") as f:
-            f.write(image_bytes)
+        # Save .tres and PNG locally in one pool job
+        await asyncio.get_running_loop().run_in_executor(
+            _image_executor, _write_generated_files,
+            ((tres_path, result.tres_content), (png_path, image_bytes)),
+        )
         
-        print(f"✅ Exported TileSet: {tres_path}")
+        logger.info("Exported TileSet: %s", tres_path)
         
         return {
             "success": True,
@@ -1108,14 +1380,18 @@ async def api_export_tileset_resource(request: TileSetExportRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ TileSet export failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("TileSet export failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate-and-export-terrain")
-async def api_generate_and_export_terrain(request: TerrainTilesetRequest):
+async def api_generate_and_export_terrain(
+    request: TerrainTilesetRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    wait_for_upload: bool = False,
+    reuse_cached: bool = False,
+):
     """
     Combined endpoint: Generate terrain tileset AND export as Godot .tres resource.
     
@@ -1126,16 +1402,16 @@ async def api_generate_and_export_terrain(request: TerrainTilesetRequest):
     """
     try:
         # Step 1: Generate terrain tileset
-        if request.preset and request.preset in TERRAIN_PRESETS:
-            dna = TERRAIN_PRESETS[request.preset]
+        if (preset := TERRAIN_PRESETS.get(request.preset)) is not None:
+            dna = preset
         elif request.terrain_type:
             dna = TerrainTilesetDNA(
-                terrain_type=TerrainType(request.terrain_type),
-                color_palette=request.color_palette or ["#808080", "#707070", "#909090", "#606060"],
-                tileset_format=TilesetFormat(request.tileset_format),
+                terrain_type=_enum(TerrainType, request.terrain_type),
+                color_palette=request.color_palette or NEUTRAL_PALETTE,
+                tileset_format=_enum(TilesetFormat, request.tileset_format),
                 tile_size=request.tile_size,
-                texture_style=TextureStyle(request.texture_style),
-                outline_style=OutlineStyle(request.outline_style),
+                texture_style=_enum(TextureStyle, request.texture_style),
+                outline_style=_enum(OutlineStyle, request.outline_style),
                 perspective=Perspective(request.perspective),
             )
         else:
@@ -1144,13 +1420,14 @@ async def api_generate_and_export_terrain(request: TerrainTilesetRequest):
                 detail="Provide preset or terrain_type"
             )
         
-        result = await generate_terrain_tileset(dna, use_difference_matte=request.use_difference_matte)
-        
-        # Step 2: Encode the tileset image
-        image_bytes = encode_tileset_png(result.tileset_image)
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        dna = intern_dna(dna)
+        result, cache_hit = await _generate_preset_cached(
+            generate_terrain_tileset, dna, preset is not None and reuse_cached, use_difference_matte=request.use_difference_matte
+        )
+        response.headers["X-Cache-Hit"] = "1" if cache_hit else "0"
         
-        # Step 3: Export as .tres
+        # Steps 2-3 are independent once the image exists: PNG encode -> cloud
+        # upload runs alongside the .tres export
         terrain_name = request.preset or request.terrain_type or "terrain"
         texture_path = f"res://sprites/tilesets/{terrain_name}_tileset.png"
         
@@ -1161,34 +1438,41 @@ async def api_generate_and_export_terrain(request: TerrainTilesetRequest):
             terrain_color=dna.color_palette[0].lstrip('#') if dna.color_palette else "4a7023",
         )
         
-        export_result = export_tileset_tres(
-            tileset_image=result.tileset_image,
-            tile_size=dna.tile_size,
-            texture_path=texture_path,
-            tileset_type=TileSetType.TERRAIN_3X3,
-            terrain_config=terrain_config,
-            include_physics=request.include_physics,
-        )
+        timestamp = secrets.token_hex(4)
+        png_path = f"{GENERATED_DIR}/{terrain_name}_{timestamp}.png"
+        tres_path = f"{GENERATED_DIR}/{terrain_name}_{timestamp}.tres"
+        loop = asyncio.get_running_loop()
         
+        async def encode_and_upload():
+            image_bytes, image_base64 = await loop.run_in_executor(
+                _image_executor, _encode_png_base64, encode_tileset_png, result.tileset_image
+            )
+            storage_result = await _save_tileset(
+                background_tasks, wait_for_upload, image_bytes, "terrain_tileset", dna
+            )
+            return image_bytes, image_base64, storage_result
+        
+        (image_bytes, image_base64, storage_result), export_result = await asyncio.gather(
+            encode_and_upload(),
+            loop.run_in_executor(
+                _image_executor,
+                partial(
+                    export_tileset_tres,
+                    tileset_image=result.tileset_image,
+                    tile_size=dna.tile_size,
+                    texture_path=texture_path,
+                    tileset_type=TileSetType.TERRAIN_3X3,
+                    terrain_config=terrain_config,
+                    include_physics=request.include_physics,
+                ),
+            ),
+        )
         tres_base64 = encode_tres_base64(export_result.tres_content)
         
-        # Save files locally
-        output_dir = "/tmp/spritemancer_generated"
-        os.makedirs(output_dir, exist_ok=True)
-        timestamp = uuid.uuid4().hex[:8]
-        
-        png_path = f"{output_dir}/{terrain_name}_{timestamp}.png"
-        tres_path = f"{output_dir}/{terrain_name}_{timestamp}.tres"
-        
-        with open(png_path, "wb") as f:
-            f.write(image_bytes)
-        with open(tres_path, "w") as f:
-            f.write(export_result.tres_content)
-        
-        # Save to cloud storage
-        project_id = str(uuid.uuid4())
-        storage_result = await save_tileset_to_storage(
-            project_id, image_bytes, "terrain_tileset", dna.dict()
+        # Save PNG and .tres locally in one pool job
+        await loop.run_in_executor(
+            _image_executor, _write_generated_files,
+            ((png_path, image_bytes), (tres_path, export_result.tres_content)),
         )
         
         return {
@@ -1198,7 +1482,7 @@ async def api_generate_and_export_terrain(request: TerrainTilesetRequest):
             "tile_size": dna.tile_size,
             "tile_count": export_result.tile_count,
             "terrain_configured": True,
-            "dna": dna.dict(),
+            "dna": dna.json_dict,
             "validation_passed": result.validation_passed,
             "validation_message": result.validation_message,
             "background_removal_method": result.background_removal_method,
@@ -1214,6 +1498,7 @@ async def api_generate_and_export_terrain(request: TerrainTilesetRequest):
             # Cloud
             "project_id": storage_result["project_id"],
             "tileset_url": storage_result["url"],
+            "upload_status": storage_result["upload_status"],
             "status": "generated",
             "message": f"✅ Generated and exported terrain tileset with {export_result.tile_count} tiles",
         }
@@ -1221,7 +1506,5 @@ async def api_generate_and_export_terrain(request: TerrainTilesetRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Generate and export failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Generate and export failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,9 +4,18 @@ VFX Router - AI-powered visual effects generation.
 Endpoints for generating particle sprites and motion smear frames using Gemini.
 """
 
-import base64
-from typing import Optional
-from fastapi import APIRouter, HTTPException
+import asyncio
+try:
+    import pybase64 as _b64  # SIMD codec; same API and output as the stdlib
+    # pybase64 drops the GIL while it works, so a worker thread really overlaps
+    _B64_OFFLOAD = True
+except ImportError:
+    import base64 as _b64
+    # CPython's binascii holds the GIL throughout; a thread would only add a hop
+    _B64_OFFLOAD = False
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 from app.services.gemini_client import gemini_client, GeminiError
@@ -77,16 +86,78 @@ PARTICLE_PROMPTS = {
 }
 
 
+# ============================================================================
+# Prompt Templates
+# ============================================================================
+
+# Static particle-sheet scaffold; only the size/effect/palette slots vary per request
+PARTICLE_PROMPT_TEMPLATE = """Generate a pixel art particle sprite sheet.
+
+REQUIREMENTS:
+- Style: Retro pixel art, clean and crisp pixels
+- Size: {size}x{size} pixels per frame
+- Frames: {frame_count} animation frames in a HORIZONTAL strip
+- Total image size: {total_width}x{size} pixels
+- Background: Completely transparent (alpha channel)
+- Effect: {effect}
+{palette}
+
+IMPORTANT:
+- Each frame shows the particle at a different stage of its animation
+- Frame 1: Particle appears (spawn)
+- Middle frames: Particle expands/moves
+- Last frame: Particle fades/dissipates
+- Keep pixel art style consistent across all frames
+- No anti-aliasing, use clean hard pixels"""
+
+SMEAR_PROMPT_TEMPLATE = """Create a motion smear frame between these two animation poses.
+
+REQUIREMENTS:
+- Analyze the motion direction between Frame 1 and Frame 2
+- Generate an intermediate frame with {intensity} motion blur effect
+- Stretch pixels in the direction of movement
+- Maintain the exact pixel art style of the original frames
+- Keep colors consistent with the source frames
+- Smear trails should be semi-transparent
+- Output a single frame that shows the in-between motion
+
+STYLE:
+- Pixel art motion blur, similar to fighting game smear frames
+- Clean shapes with stretched motion trails
+- No anti-aliasing, maintain crisp pixels where possible"""
+
+# The smear prompt only varies by intensity band, so all three are built once
+SMEAR_PROMPTS = {
+    band: SMEAR_PROMPT_TEMPLATE.format(intensity=band)
+    for band in ("subtle", "moderate", "strong")
+}
+
+
+async def _b64_call(func, data):
+    """Run a base64 codec call, in a worker thread only when that can overlap."""
+    if _B64_OFFLOAD:
+        return await asyncio.to_thread(func, data)
+    return func(data)
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
 
-@router.post("/generate-particles", response_model=GenerateParticlesResponse)
-async def generate_particles(request: GenerateParticlesRequest):
+@router.post(
+    "/generate-particles",
+    responses={200: {"model": GenerateParticlesResponse, "content": {"image/png": {}}}},
+)
+async def generate_particles(
+    request: GenerateParticlesRequest,
+    response_format: Literal["json", "binary"] = Query("json", alias="format"),
+):
     """
     Generate particle sprite sheet using Gemini AI.
     
-    Returns a horizontal spritesheet with animated particle frames.
+    Returns a horizontal spritesheet with animated particle frames. With
+    ?format=binary the body is the PNG itself and the dimensions move to
+    X-Width / X-Height / X-Frame-Count headers.
     """
     particle_type = request.particle_type.lower()
     
@@ -102,25 +173,13 @@ async def generate_particles(request: GenerateParticlesRequest):
         colors = ", ".join(request.palette)
         palette_instruction = f"Use ONLY these colors: {colors}. "
     
-    # Construct the prompt
-    prompt = f"""Generate a pixel art particle sprite sheet.
-
-REQUIREMENTS:
-- Style: Retro pixel art, clean and crisp pixels
-- Size: {request.size}x{request.size} pixels per frame
-- Frames: {request.frame_count} animation frames in a HORIZONTAL strip
-- Total image size: {request.size * request.frame_count}x{request.size} pixels
-- Background: Completely transparent (alpha channel)
-- Effect: {base_description}
-{palette_instruction}
-
-IMPORTANT:
-- Each frame shows the particle at a different stage of its animation
-- Frame 1: Particle appears (spawn)
-- Middle frames: Particle expands/moves
-- Last frame: Particle fades/dissipates
-- Keep pixel art style consistent across all frames
-- No anti-aliasing, use clean hard pixels"""
+    prompt = PARTICLE_PROMPT_TEMPLATE.format(
+        size=request.size,
+        frame_count=request.frame_count,
+        total_width=request.size * request.frame_count,
+        effect=base_description,
+        palette=palette_instruction,
+    )
 
     try:
         # Generate the particle spritesheet
@@ -129,15 +188,28 @@ IMPORTANT:
             aspect_ratio="4:1" if request.frame_count == 4 else "1:1"
         )
         
+        if response_format == "binary":
+            return Response(
+                content=image_bytes,
+                media_type="image/png",
+                headers={
+                    "X-Width": str(request.size * request.frame_count),
+                    "X-Height": str(request.size),
+                    "X-Frame-Count": str(request.frame_count),
+                },
+            )
+        
         # Encode as base64
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+        image_base64 = (await _b64_call(_b64.b64encode, image_bytes)).decode("ascii")
         
-        return GenerateParticlesResponse(
-            image_base64=image_base64,
-            width=request.size * request.frame_count,
-            height=request.size,
-            frame_count=request.frame_count
-        )
+        # Returned as a ready Response: no model validation or jsonable_encoder pass
+        # over the large base64 string (the model only documents the shape)
+        return ORJSONResponse({
+            "image_base64": image_base64,
+            "width": request.size * request.frame_count,
+            "height": request.size,
+            "frame_count": request.frame_count,
+        })
         
     except GeminiError as e:
         raise HTTPException(
@@ -151,7 +223,7 @@ IMPORTANT:
         )
 
 
-@router.post("/generate-smear", response_model=GenerateSmearResponse)
+@router.post("/generate-smear", responses={200: {"model": GenerateSmearResponse}})
 async def generate_smear(request: GenerateSmearRequest):
     """
     Generate a motion smear frame between two animation frames.
@@ -160,27 +232,14 @@ async def generate_smear(request: GenerateSmearRequest):
     """
     try:
         # Decode the frames
-        frame_before = base64.b64decode(request.frame_before_base64)
-        frame_after = base64.b64decode(request.frame_after_base64)
-        
-        # Create prompt for smear generation
-        intensity_desc = "subtle" if request.intensity < 0.3 else "moderate" if request.intensity < 0.7 else "strong"
+        frame_before, frame_after = await asyncio.gather(
+            _b64_call(_b64.b64decode, request.frame_before_base64),
+            _b64_call(_b64.b64decode, request.frame_after_base64),
+        )
         
-        prompt = f"""Create a motion smear frame between these two animation poses.
-
-REQUIREMENTS:
-- Analyze the motion direction between Frame 1 and Frame 2
-- Generate an intermediate frame with {intensity_desc} motion blur effect
-- Stretch pixels in the direction of movement
-- Maintain the exact pixel art style of the original frames
-- Keep colors consistent with the source frames
-- Smear trails should be semi-transparent
-- Output a single frame that shows the in-between motion
-
-STYLE:
-- Pixel art motion blur, similar to fighting game smear frames
-- Clean shapes with stretched motion trails
-- No anti-aliasing, maintain crisp pixels where possible"""
+        # Smear prompt for the intensity band
+        band = "subtle" if request.intensity < 0.3 else "moderate" if request.intensity < 0.7 else "strong"
+        prompt = SMEAR_PROMPTS[band]
 
         # Use edit_image with both frames as reference
         smear_bytes = await gemini_client.generate_image(
@@ -188,9 +247,9 @@ STYLE:
             reference_images=[frame_before, frame_after]
         )
         
-        smear_base64 = base64.b64encode(smear_bytes).decode("utf-8")
+        smear_base64 = (await _b64_call(_b64.b64encode, smear_bytes)).decode("ascii")
         
-        return GenerateSmearResponse(smear_frame_base64=smear_base64)
+        return ORJSONResponse({"smear_frame_base64": smear_base64})
         
     except GeminiError as e:
         raise HTTPException(
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import Dict, Set
-import json
+import asyncio
+
+import orjson
 
 router = APIRouter()
 
 # Active WebSocket connections per project (supports multiple connections)
 connections: Dict[str, Set[WebSocket]] = {}
 
+# A client that can't take a frame within this long is treated as disconnected
+SEND_TIMEOUT_SECONDS = 5.0
+
 
 @router.websocket("/{project_id}")
 async def pipeline_websocket(websocket: WebSocket, project_id: str):
@@ -47,7 +52,7 @@ async def pipeline_websocket(websocket: WebSocket, project_id: str):
         # Keep connection alive and handle incoming messages
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             # Handle client messages (e.g., cancel, pause)
             if message.get("type") == "cancel":
@@ -68,6 +73,38 @@ async def pipeline_websocket(websocket: WebSocket, project_id: str):
                 del connections[project_id]
 
 
+async def _broadcast(project_id: str, message: dict) -> None:
+    """
+    Encode message once and send it to every client of the project concurrently,
+    dropping clients whose send fails or exceeds SEND_TIMEOUT_SECONDS, so one
+    stalled client can't hold up the pipeline. Sent as text frames, like send_json.
+    Dropped clients are closed too: a timeout may cut a frame off mid-write, and
+    closing ends that client's receive loop instead of leaving it half-alive.
+    """
+    clients = list(connections.get(project_id, ()))
+    if not clients:
+        return
+    payload = orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+    results = await asyncio.gather(
+        *(asyncio.wait_for(websocket.send_text(payload), SEND_TIMEOUT_SECONDS) for websocket in clients),
+        return_exceptions=True,
+    )
+    disconnected = {websocket for websocket, result in zip(clients, results) if isinstance(result, Exception)}
+    if not disconnected:
+        return
+    if project_id in connections:
+        connections[project_id] -= disconnected
+    await asyncio.gather(*(_close_quietly(websocket) for websocket in disconnected))
+
+
+async def _close_quietly(websocket: WebSocket) -> None:
+    """Best-effort close of a dropped client, bounded like a send."""
+    try:
+        await asyncio.wait_for(websocket.close(), SEND_TIMEOUT_SECONDS)
+    except Exception:
+        pass
+
+
 async def send_stage_update(project_id: str, stage: int, stage_name: str, status: str, data: dict = None):
     """Send a stage update to all connected WebSocket clients for a project."""
     if project_id not in connections:
@@ -81,16 +118,7 @@ async def send_stage_update(project_id: str, stage: int, stage_name: str, status
         "data": data or {},
     }
     
-    # Send to all connected clients
-    disconnected = set()
-    for websocket in connections[project_id]:
-        try:
-            await websocket.send_json(message)
-        except Exception:
-            disconnected.add(websocket)
-    
-    # Clean up disconnected clients
-    connections[project_id] -= disconnected
+    await _broadcast(project_id, message)
 
 
 async def send_pipeline_complete(project_id: str, spritesheet_url: str, frames: list, animation_type: str = None):
@@ -106,16 +134,7 @@ async def send_pipeline_complete(project_id: str, spritesheet_url: str, frames:
         "animation_type": animation_type,
     }
     
-    # Send to all connected clients
-    disconnected = set()
-    for websocket in connections[project_id]:
-        try:
-            await websocket.send_json(message)
-        except Exception:
-            disconnected.add(websocket)
-    
-    # Clean up disconnected clients
-    connections[project_id] -= disconnected
+    await _broadcast(project_id, message)
 
 
 async def send_dna_extracted(project_id: str, dna: dict):
@@ -129,14 +148,7 @@ async def send_dna_extracted(project_id: str, dna: dict):
         "dna": dna,
     }
     
-    disconnected = set()
-    for websocket in connections[project_id]:
-        try:
-            await websocket.send_json(message)
-        except Exception:
-            disconnected.add(websocket)
-    
-    connections[project_id] -= disconnected
+    await _broadcast(project_id, message)
 
 
 async def send_project_updated(project_id: str, update_type: str = "general"):
@@ -150,11 +162,4 @@ async def send_project_updated(project_id: str, update_type: str = "general"):
         "update_type": update_type,  # "dna", "animation", "frames", etc.
     }
     
-    disconnected = set()
-    for websocket in connections[project_id]:
-        try:
-            await websocket.send_json(message)
-        except Exception:
-            disconnected.add(websocket)
-    
-    connections[project_id] -= disconnected
+    await _broadcast(project_id, message)
@@ -0,0 +1,103 @@
+"""
+Sprite Bounding Box Kernel
+
+Computes the bounding box of non-zero pixels in a 2D uint8 mask (usually the
+alpha channel of a frame) in a single pass, without materializing the list of
+non-zero coordinates that cv2.findNonZero + cv2.boundingRect would allocate.
+
+Rows are scanned in parallel, 8 pixels per compare; each row only walks inward
+from both edges until it hits the first opaque pixel.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, parallel=True)
+def _row_extents(a: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-row first/last non-zero column (w / -1 for empty rows).
+
+    SWAR scan: each row is viewed as uint64 words so one compare tests 8 pixels;
+    bytes are only inspected inside the first/last non-zero word. Sprite frames
+    are mostly transparent, so most words are skipped in a single test.
+    """
+    h, w = a.shape
+    n_words = w // 8
+    tail = n_words * 8
+    row_min = np.full(h, w, np.int64)
+    row_max = np.full(h, -1, np.int64)
+    for y in prange(h):
+        row = a[y]
+        words = row[:tail].view(np.uint64)
+
+        # Left edge: first non-zero word, then refine to the byte
+        for i in range(n_words):
+            if words[i] != 0:
+                for x in range(i * 8, i * 8 + 8):
+                    if row[x] != 0:
+                        row_min[y] = x
+                        break
+                break
+        if row_min[y] == w:
+            for x in range(tail, w):
+                if row[x] != 0:
+                    row_min[y] = x
+                    break
+        if row_min[y] == w:
+            continue
+
+        # Right edge: unaligned tail bytes first, then words from the end
+        for x in range(w - 1, tail - 1, -1):
+            if row[x] != 0:
+                row_max[y] = x
+                break
+        if row_max[y] < 0:
+            for i in range(n_words - 1, -1, -1):
+                if words[i] != 0:
+                    for x in range(i * 8 + 7, i * 8 - 1, -1):
+                        if row[x] != 0:
+                            row_max[y] = x
+                            break
+                    break
+    return row_min, row_max
+
+
+@njit(cache=True)
+def _reduce_extents(row_min: np.ndarray, row_max: np.ndarray, w: int) -> Tuple[int, int, int, int]:
+    """Collapse per-row extents into (xmin, ymin, xmax, ymax); xmax == -1 if empty."""
+    xmin, ymin, xmax, ymax = w, -1, -1, -1
+    for y in range(row_min.shape[0]):
+        if row_max[y] >= 0:
+            if ymin < 0:
+                ymin = y
+            ymax = y
+            if row_min[y] < xmin:
+                xmin = row_min[y]
+            if row_max[y] > xmax:
+                xmax = row_max[y]
+    return xmin, ymin, xmax, ymax
+
+
+def alpha_bbox(a: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Get bounding box of non-zero pixels.
+
+    Args:
+        a: 2D uint8 array (alpha channel or binary mask)
+
+    Returns:
+        (x, y, w, h) like cv2.boundingRect, or None if the mask is empty
+    """
+    a = np.ascontiguousarray(a)
+    row_min, row_max = _row_extents(a)
+    xmin, ymin, xmax, ymax = _reduce_extents(row_min, row_max, a.shape[1])
+    if xmax < 0:
+        return None
+    return int(xmin), int(ymin), int(xmax - xmin + 1), int(ymax - ymin + 1)
+
+
+# Warm-compile at import so the JIT cost is paid once per process, not per request
+alpha_bbox(np.zeros((2, 2), np.uint8))
@@ -5,10 +5,12 @@ Coordinates dual-character relational animation generation.
 Extends PipelineOrchestrator with responder-specific stages.
 """
 from typing import Literal, Optional
+import asyncio
 import uuid
 from datetime import datetime
 
 from app.models import (
+    DualPipelineErrorCode,
     CharacterDNA,
     AnimationScript,
     FrameBudget,
@@ -33,6 +35,14 @@ from app.services.stages import (
 )
 
 
+class DualPipelineError(Exception):
+    """Dual pipeline failure tagged with the character-specific error code."""
+    
+    def __init__(self, code: DualPipelineErrorCode, message: str):
+        self.code = code
+        super().__init__(f"{code.value}: {message}")
+
+
 DUAL_STAGE_NAMES = {
     1: "Dual DNA Extraction",
     2: "DNA Verification",
@@ -408,86 +418,29 @@ class DualPipelineOrchestrator:
         await self._update_stage(10, "running")
         
         try:
-            import cv2
-            import numpy as np
-            from app.services.stages.stage_7_post_processing import detect_grid_layout_with_gemini
-            
             expected_count = self.state.frame_budget.final_frame_count
-            default_grid_dim = self.state.frame_budget.grid_dim
-            
-            # Process instigator - detect grid with Gemini Flash + hybrid extraction
-            from app.services.stages.stage_7_post_processing import extract_frames_hybrid
             
-            ins_rows, ins_cols, ins_gemini_count = await detect_grid_layout_with_gemini(
-                spritesheet_bytes=instigator_spritesheet
+            # Both characters are independent - run them concurrently. return_exceptions
+            # keeps a responder failure from cancelling the instigator branch.
+            ins_result, resp_result = await asyncio.gather(
+                self._post_process_character("instigator", instigator_spritesheet, expected_count),
+                self._post_process_character("responder", responder_spritesheet, expected_count),
+                return_exceptions=True,
             )
+            for branch_result, code in (
+                (ins_result, DualPipelineErrorCode.INSTIGATOR_SPRITE_FAILED),
+                (resp_result, DualPipelineErrorCode.RESPONDER_SPRITE_FAILED),
+            ):
+                if isinstance(branch_result, BaseException):
+                    raise DualPipelineError(code, str(branch_result)) from branch_result
             
-            nparr = np.frombuffer(instigator_spritesheet, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            result_ins = extract_frames_hybrid(
-                grid_image=img,
-                expected_count=expected_count,
-                gemini_rows=ins_rows,
-                gemini_cols=ins_cols,
-                gemini_frame_count=ins_gemini_count,
-                is_grounded=True,
-            )
-            
-            normalized_ins = normalize_frames(
-                result_ins.frames,
-                result_ins.frame_width,
-                result_ins.frame_height,
-            )
-            
-            # Upload instigator frames
-            instigator_urls = []
-            for i, frame in enumerate(normalized_ins):
-                frame_bytes = encode_frame_png(frame)
-                path = f"{self.project_id}/{self.pipeline_id}/instigator_frame_{i:02d}.png"
-                url = await supabase_service.upload_image(
-                    bucket="sprites", path=path, file_bytes=frame_bytes
-                )
-                instigator_urls.append(url)
+            instigator_urls, ins_pivots = ins_result
+            responder_urls, resp_pivots = resp_result
             
             self.state.frame_urls = instigator_urls
-            self.state.pivots = [{"x": p[0], "y": p[1]} for p in result_ins.pivots]
-            
-            # Process responder - detect grid with Gemini Flash + hybrid extraction
-            resp_rows, resp_cols, resp_gemini_count = await detect_grid_layout_with_gemini(
-                spritesheet_bytes=responder_spritesheet
-            )
-            
-            nparr = np.frombuffer(responder_spritesheet, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            result_resp = extract_frames_hybrid(
-                grid_image=img,
-                expected_count=expected_count,
-                gemini_rows=resp_rows,
-                gemini_cols=resp_cols,
-                gemini_frame_count=resp_gemini_count,
-                is_grounded=True,
-            )
-            
-            normalized_resp = normalize_frames(
-                result_resp.frames,
-                result_resp.frame_width,
-                result_resp.frame_height,
-            )
-            
-            # Upload responder frames
-            responder_urls = []
-            for i, frame in enumerate(normalized_resp):
-                frame_bytes = encode_frame_png(frame)
-                path = f"{self.project_id}/{self.pipeline_id}/responder_frame_{i:02d}.png"
-                url = await supabase_service.upload_image(
-                    bucket="sprites", path=path, file_bytes=frame_bytes
-                )
-                responder_urls.append(url)
-            
+            self.state.pivots = ins_pivots
             self.state.responder_frame_urls = responder_urls
-            self.state.responder_pivots = [{"x": p[0], "y": p[1]} for p in result_resp.pivots]
+            self.state.responder_pivots = resp_pivots
             
             stage_result = {
                 "instigator_frame_count": len(instigator_urls),
@@ -504,6 +457,55 @@ class DualPipelineOrchestrator:
             await self._update_stage(10, "failed", error=str(e))
             await self._notify_stage(10, "error", {"error": str(e)})
             raise
+    
+    async def _post_process_character(
+        self,
+        character: Literal["instigator", "responder"],
+        spritesheet: bytes,
+        expected_count: int,
+    ) -> tuple[list[str], list[dict]]:
+        """Detect grid, extract/normalize frames and upload them for one character."""
+        import cv2
+        import numpy as np
+        from app.services.stages.stage_7_post_processing import (
+            detect_grid_layout_with_gemini,
+            extract_frames_hybrid,
+        )
+        
+        # Detect grid with Gemini Flash + hybrid extraction
+        rows, cols, gemini_count = await detect_grid_layout_with_gemini(
+            spritesheet_bytes=spritesheet
+        )
+        
+        nparr = np.frombuffer(spritesheet, np.uint8)
+        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        
+        result = extract_frames_hybrid(
+            grid_image=img,
+            expected_count=expected_count,
+            gemini_rows=rows,
+            gemini_cols=cols,
+            gemini_frame_count=gemini_count,
+            is_grounded=True,
+        )
+        
+        normalized = normalize_frames(
+            result.frames,
+            result.frame_width,
+            result.frame_height,
+        )
+        
+        urls = []
+        for i, frame in enumerate(normalized):
+            frame_bytes = encode_frame_png(frame)
+            path = f"{self.project_id}/{self.pipeline_id}/{character}_frame_{i:02d}.png"
+            url = await supabase_service.upload_image(
+                bucket="sprites", path=path, file_bytes=frame_bytes
+            )
+            urls.append(url)
+        
+        pivots = [{"x": p[0], "y": p[1]} for p in result.pivots]
+        return urls, pivots
 
 
 def create_dual_pipeline(project_id: str, on_stage_update=None) -> DualPipelineOrchestrator:
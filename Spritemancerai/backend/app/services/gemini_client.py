@@ -17,6 +17,12 @@ from google.genai.errors import ServerError, ClientError
 from app.config import get_settings
 
 
+def _image_part(data: bytes) -> types.Part:
+    """Wrap image bytes as a Part, labelled WebP or PNG from the file signature."""
+    mime_type = "image/webp" if data[:4] == b"RIFF" and data[8:12] == b"WEBP" else "image/png"
+    return types.Part.from_bytes(data=data, mime_type=mime_type)
+
+
 class GeminiError(Exception):
     """Custom exception for Gemini API errors."""
     def __init__(self, message: str, retryable: bool = False, original_error: Exception = None):
@@ -95,13 +101,15 @@ class GeminiClient:
             print(f"⚠️ Stage instruction not found: {stage_path}, using default")
             return self.system_instruction
     
-    async def _retry_with_backoff(self, func, operation_name: str):
+    async def _retry_with_backoff(self, func, operation_name: str, attempt_timeout: Optional[float] = None):
         """
         Retry an async function with exponential backoff.
         
         Args:
             func: Async function to call
             operation_name: Name for logging
+            attempt_timeout: Optional per-attempt limit in seconds; an attempt
+                that runs over is abandoned and retried like a 503
         
         Returns:
             Result from the function
@@ -114,8 +122,10 @@ class GeminiClient:
         
         for attempt in range(1, self.MAX_RETRIES + 1):
             try:
-                return await func()
-            except ServerError as e:
+                if attempt_timeout is None:
+                    return await func()
+                return await asyncio.wait_for(func(), attempt_timeout)
+            except (ServerError, asyncio.TimeoutError) as e:
                 last_error = e
                 error_code = getattr(e, 'status_code', 500)
                 
@@ -162,6 +172,7 @@ class GeminiClient:
         temperature: float = 0.3,
         response_schema: Optional[dict] = None,
         stage: Optional[str] = None,
+        attempt_timeout: Optional[float] = None,
     ) -> dict:
         """
         Generate text using gemini-3-pro-preview with automatic retry.
@@ -172,6 +183,7 @@ class GeminiClient:
             temperature: Sampling temperature
             response_schema: Optional JSON schema for response
             stage: Stage identifier for stage-specific system instruction
+            attempt_timeout: Optional per-attempt limit in seconds (timeouts are retried)
         """
         print(f"✨ Gemini Request (Text): {prompt[:50]}...")
         
@@ -195,7 +207,7 @@ class GeminiClient:
             )
             return response
         
-        response = await self._retry_with_backoff(_call, "Text generation")
+        response = await self._retry_with_backoff(_call, "Text generation", attempt_timeout)
         print("✅ Gemini Response received")
         
         # Extract text from response, handling various response formats
@@ -324,7 +336,7 @@ class GeminiClient:
         if response_schema:
             config.response_schema = response_schema
         
-        image_part = types.Part.from_bytes(data=image_bytes, mime_type="image/png")
+        image_part = _image_part(image_bytes)
         
         async def _call():
             response = await self.client.aio.models.generate_content(
@@ -356,7 +368,7 @@ class GeminiClient:
         # Add reference images for character consistency
         if reference_images:
             for img_bytes in reference_images[:14]:  # Max 14 references
-                contents.append(types.Part.from_bytes(data=img_bytes, mime_type="image/png"))
+                contents.append(_image_part(img_bytes))
         
         contents.append(prompt)
         
@@ -401,7 +413,7 @@ class GeminiClient:
         print(f"🎨 Gemini Request (Simple Edit): {edit_prompt[:50]}...")
         
         contents = [
-            types.Part.from_bytes(data=image_bytes, mime_type="image/png"),
+            _image_part(image_bytes),
             edit_prompt,
         ]
         
@@ -444,17 +456,17 @@ class GeminiClient:
         """
         print(f"🎨 Gemini Request (Edit): {edit_prompt[:50]}...")
         contents = [
-            types.Part.from_bytes(data=image_bytes, mime_type="image/png"),
-            types.Part.from_bytes(data=mask_bytes, mime_type="image/png"),
+            _image_part(image_bytes),
+            _image_part(mask_bytes),
         ]
         
         if reference_image:
-            contents.append(types.Part.from_bytes(data=reference_image, mime_type="image/png"))
+            contents.append(_image_part(reference_image))
         
         # Add context images (previous frames) for animation continuity
         if context_images:
             for i, ctx_img in enumerate(context_images[:2]):  # Max 2 context frames
-                contents.append(types.Part.from_bytes(data=ctx_img, mime_type="image/png"))
+                contents.append(_image_part(ctx_img))
             print(f"  ↳ Added {len(context_images[:2])} context frames for animation continuity")
         
         contents.append(edit_prompt)
@@ -13,7 +13,9 @@ from .stage_7_post_processing import (
     extract_frames_by_contour,
     count_sprites_by_contour,
     normalize_frames,
+    encode_frame,
     encode_frame_png,
+    IMAGE_CONTENT_TYPES,
     detect_grid_layout_with_gemini,
     detect_grid_layout_sync,
     ExtractedFrame,
@@ -22,6 +24,9 @@ from .stage_7_post_processing import (
 from .stage_7b_generate_maps import (
     generate_lighting_maps,
     generate_lighting_maps_for_frame,
+    generate_lighting_maps_stacked,
+    stack_frames,
+    encode_lighting_map,
     encode_lighting_map_png,
     LightingMaps,
     LightingMapsResult,
@@ -68,7 +73,9 @@ __all__ = [
     "extract_frames_by_contour",
     "count_sprites_by_contour",
     "normalize_frames",
+    "encode_frame",
     "encode_frame_png",
+    "IMAGE_CONTENT_TYPES",
     "detect_grid_layout_with_gemini",
     "detect_grid_layout_sync",
     "ExtractedFrame",
@@ -76,6 +83,9 @@ __all__ = [
     # Stage 7b (Lighting Maps)
     "generate_lighting_maps",
     "generate_lighting_maps_for_frame",
+    "generate_lighting_maps_stacked",
+    "stack_frames",
+    "encode_lighting_map",
     "encode_lighting_map_png",
     "LightingMaps",
     "LightingMapsResult",
@@ -11,7 +11,8 @@ from typing import Optional
 import io
 import base64
 
-from .stage_7_post_processing import ExtractedFrame
+from .stage_7_post_processing import ExtractedFrame, IMAGE_ENCODE_PARAMS
+from .stage_7b_kernels import compute_maps
 
 
 @dataclass
@@ -130,6 +131,16 @@ def generate_specular_map(
         gray = sprite
         alpha = np.ones_like(gray) * 255
     
+    return _specular_from_gray(gray, alpha, metallic_threshold, specular_boost)
+
+
+def _specular_from_gray(
+    gray: np.ndarray,
+    alpha: np.ndarray,
+    metallic_threshold: int = 200,
+    specular_boost: float = 1.2
+) -> np.ndarray:
+    """Specular map from precomputed luminance and alpha planes."""
     # Calculate local contrast (edge strength = specularity hint)
     laplacian = cv2.Laplacian(gray, cv2.CV_64F)
     contrast = np.abs(laplacian).astype(np.float32)
@@ -267,9 +278,104 @@ def generate_lighting_maps(
     )
 
 
-def encode_lighting_map_png(image: np.ndarray) -> bytes:
-    """Encode lighting map as PNG bytes."""
-    success, buffer = cv2.imencode('.png', image)
+def stack_frames(images: list[np.ndarray], frame_width: int, frame_height: int) -> np.ndarray:
+    """
+    Copy frames into one contiguous (N, H, W, 4) BGRA tensor.
+    Smaller frames are top-left aligned and zero-padded (transparent).
+    """
+    stack = np.zeros((len(images), frame_height, frame_width, 4), dtype=np.uint8)
+    for i, img in enumerate(images):
+        h, w = img.shape[:2]
+        if img.ndim == 2:
+            stack[i, :h, :w] = cv2.cvtColor(img, cv2.COLOR_GRAY2BGRA)
+        elif img.shape[2] == 3:
+            stack[i, :h, :w] = cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)
+        else:
+            stack[i, :h, :w] = img
+    return stack
+
+
+def generate_lighting_maps_stacked(
+    stack: np.ndarray,
+    indices: list[int],
+    grid_dim: int = 4,
+    normal_strength: float = 1.0,
+    out: Optional[tuple[np.ndarray, np.ndarray]] = None,
+) -> LightingMapsResult:
+    """
+    Generate lighting maps from a (N, H, W, 4) BGRA frame tensor.
+    
+    All per-pixel math runs in the fused Numba kernel (stage_7b_kernels),
+    one frame per core, with byte-identical output to the per-frame OpenCV
+    path. Maps are then placed into the spritesheets and frame_maps are views
+    into them.
+    
+    Args:
+        stack: Frames from stack_frames
+        indices: Grid index of each frame in the stack
+        grid_dim: Grid dimension for spritesheet
+        normal_strength: Strength of normal map effect
+        out: Optional reusable (normal, specular) sheet buffers of shape
+            (S, S, 3) and (S, S) with S = grid_dim * max(W, H); they are
+            reset in place instead of allocating new sheets
+        
+    Returns:
+        LightingMapsResult with all maps and spritesheets
+    """
+    n, frame_height, frame_width = stack.shape[:3]
+    print(f"⚡ Generating lighting maps for {n} frames...")
+    
+    normal_maps = np.empty((n, frame_height, frame_width, 3), dtype=np.uint8)
+    specular_maps = np.empty((n, frame_height, frame_width), dtype=np.uint8)
+    compute_maps(np.ascontiguousarray(stack), normal_maps, specular_maps, normal_strength)
+    
+    sheet_size = grid_dim * max(frame_width, frame_height)
+    if out is None:
+        normal_sheet = np.full((sheet_size, sheet_size, 3), (255, 128, 128), dtype=np.uint8)  # Neutral normal
+        specular_sheet = np.zeros((sheet_size, sheet_size), dtype=np.uint8)
+    else:
+        normal_sheet, specular_sheet = out
+        normal_sheet[:] = (255, 128, 128)
+        specular_sheet.fill(0)
+    
+    frame_maps = []
+    for i, frame_index in enumerate(indices):
+        x = (frame_index % grid_dim) * frame_width
+        y = (frame_index // grid_dim) * frame_height
+        
+        # Ensure we don't exceed sheet bounds
+        if y + frame_height > sheet_size or x + frame_width > sheet_size:
+            continue
+        
+        normal_view = normal_sheet[y:y+frame_height, x:x+frame_width]
+        specular_view = specular_sheet[y:y+frame_height, x:x+frame_width]
+        
+        normal_view[:] = normal_maps[i]
+        specular_view[:] = specular_maps[i]
+        
+        frame_maps.append(LightingMaps(
+            frame_index=frame_index,
+            normal_map=normal_view,
+            specular_map=specular_view
+        ))
+    
+    print(f"📦 Created lighting spritesheets: {normal_sheet.shape}")
+    
+    return LightingMapsResult(
+        frame_maps=frame_maps,
+        normal_spritesheet=normal_sheet,
+        specular_spritesheet=specular_sheet
+    )
+
+
+def encode_lighting_map(image: np.ndarray, image_format: str = "png") -> bytes:
+    """Encode lighting map as PNG or lossless WebP bytes (normals must stay exact)."""
+    success, buffer = cv2.imencode(f".{image_format}", image, IMAGE_ENCODE_PARAMS[image_format])
     if not success:
         raise ValueError("Failed to encode lighting map")
     return buffer.tobytes()
+
+
+def encode_lighting_map_png(image: np.ndarray) -> bytes:
+    """Encode lighting map as PNG bytes."""
+    return encode_lighting_map(image, "png")
@@ -0,0 +1,167 @@
+"""
+Stage 7b Lighting Kernels
+
+Fused Numba implementation of the per-frame lighting-map math in
+stage_7b_generate_maps: luminance, alpha masking, 3x3 Gaussian depth blur,
+Sobel normals, Laplacian contrast and specular, for a whole (N, H, W, 4)
+BGRA stack in one call with frames spread across cores.
+
+Every step mirrors the OpenCV/NumPy reference (fixed-point BGR2GRAY, bit-exact
+8-bit blur, BORDER_REFLECT_101 borders, float32 arithmetic), so the maps are
+byte-identical to the per-frame path. fastmath is deliberately off: letting
+LLVM reassociate or contract the float32 math would change rounding.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+# cv2.COLOR_BGR2GRAY fixed-point weights (Q15)
+_GRAY_B = 3735
+_GRAY_G = 19235
+_GRAY_R = 9798
+
+ALPHA_THRESHOLD = 10
+METALLIC_THRESHOLD = 200
+SPECULAR_BOOST = 1.2
+
+
+@njit(cache=True, inline="always")
+def _reflect101(i: int, n: int) -> int:
+    """Border index like cv2.BORDER_REFLECT_101 (gfedcb|abcdefgh|gfedcba)."""
+    if n == 1:
+        return 0
+    # Loop like cv2.borderInterpolate: the 5x5 stencil can overshoot a 2px edge twice
+    while i < 0 or i >= n:
+        if i < 0:
+            i = -i
+        else:
+            i = 2 * n - 2 - i
+    return i
+
+
+@njit(cache=True)
+def _frame_maps(frame, normal_out, specular_out, strength):
+    """Normal (BGR) and specular maps for one (H, W, 4) BGRA frame."""
+    h, w = frame.shape[:2]
+    gray = np.empty((h, w), np.int32)
+    masked = np.empty((h, w), np.int32)
+    for y in range(h):
+        for x in range(w):
+            g = (
+                _GRAY_B * np.int32(frame[y, x, 0])
+                + _GRAY_G * np.int32(frame[y, x, 1])
+                + _GRAY_R * np.int32(frame[y, x, 2])
+                + 16384
+            ) >> 15
+            gray[y, x] = g
+            masked[y, x] = g if frame[y, x, 3] > ALPHA_THRESHOLD else 128
+
+    # Depth: 3x3 Gaussian ([1 2 1] x [1 2 1] / 16, rounded) of the masked luminance
+    row_blur = np.empty((h, w), np.int32)
+    for y in range(h):
+        for x in range(w):
+            row_blur[y, x] = (
+                masked[y, _reflect101(x - 1, w)] + 2 * masked[y, x] + masked[y, _reflect101(x + 1, w)]
+            )
+    depth = np.empty((h, w), np.int32)
+    for y in range(h):
+        up = _reflect101(y - 1, h)
+        down = _reflect101(y + 1, h)
+        for x in range(w):
+            depth[y, x] = (row_blur[up, x] + 2 * row_blur[y, x] + row_blur[down, x] + 8) >> 4
+
+    # Sobel gradients and Laplacian contrast, tracking per-frame maxima
+    f_strength = np.float32(strength)
+    grad_x = np.empty((h, w), np.float32)
+    grad_y = np.empty((h, w), np.float32)
+    lap = np.empty((h, w), np.float32)
+    max_gradient = np.float32(1.0)
+    for y in range(h):
+        up = _reflect101(y - 1, h)
+        down = _reflect101(y + 1, h)
+        for x in range(w):
+            left = _reflect101(x - 1, w)
+            right = _reflect101(x + 1, w)
+            gx = (
+                depth[up, right] + 2 * depth[y, right] + depth[down, right]
+                - depth[up, left] - 2 * depth[y, left] - depth[down, left]
+            )
+            gy = (
+                depth[down, left] + 2 * depth[down, x] + depth[down, right]
+                - depth[up, left] - 2 * depth[up, x] - depth[up, right]
+            )
+            fx = np.float32(gx) * f_strength
+            fy = np.float32(gy) * f_strength
+            grad_x[y, x] = fx
+            grad_y[y, x] = fy
+            max_gradient = max(max_gradient, abs(fx), abs(fy))
+            lap[y, x] = np.float32(abs(
+                gray[up, x] + gray[down, x] + gray[y, left] + gray[y, right] - 4 * gray[y, x]
+            ))
+
+    # Contrast: 5x5 Gaussian ([1 4 6 4 1] / 16 per axis); dyadic weights keep float32 exact
+    w0 = np.float32(0.0625)
+    w1 = np.float32(0.25)
+    w2 = np.float32(0.375)
+    row_contrast = np.empty((h, w), np.float32)
+    for y in range(h):
+        for x in range(w):
+            row_contrast[y, x] = (
+                w0 * lap[y, _reflect101(x - 2, w)] + w1 * lap[y, _reflect101(x - 1, w)]
+                + w2 * lap[y, x]
+                + w1 * lap[y, _reflect101(x + 1, w)] + w0 * lap[y, _reflect101(x + 2, w)]
+            )
+    contrast = np.empty((h, w), np.float32)
+    max_contrast = np.float32(0.0)
+    for y in range(h):
+        for x in range(w):
+            c = (
+                w0 * row_contrast[_reflect101(y - 2, h), x] + w1 * row_contrast[_reflect101(y - 1, h), x]
+                + w2 * row_contrast[y, x]
+                + w1 * row_contrast[_reflect101(y + 1, h), x] + w0 * row_contrast[_reflect101(y + 2, h), x]
+            )
+            contrast[y, x] = c
+            max_contrast = max(max_contrast, c)
+
+    one = np.float32(1.0)
+    half = np.float32(0.5)
+    full = np.float32(255.0)
+    metallic = np.float32(METALLIC_THRESHOLD)
+    boost = np.float32(SPECULAR_BOOST)
+    for y in range(h):
+        for x in range(w):
+            nx = grad_x[y, x] / max_gradient
+            ny = grad_y[y, x] / max_gradient
+            nz = np.sqrt(max(one - nx * nx - ny * ny, np.float32(0.0)))
+            normal_out[y, x, 0] = np.uint8((nz + one) * half * full)
+            normal_out[y, x, 1] = np.uint8((ny + one) * half * full)
+            normal_out[y, x, 2] = np.uint8((nx + one) * half * full)
+
+            if frame[y, x, 3] <= ALPHA_THRESHOLD:
+                specular_out[y, x] = 0
+                continue
+            c8 = np.float32(0.0)
+            if max_contrast > 0:
+                c8 = np.float32(np.uint8(contrast[y, x] / max_contrast * full))
+            brightness = min(max(np.float32(gray[y, x]) / metallic, np.float32(0.0)), one)
+            specular = min(max(c8 * brightness * boost, np.float32(0.0)), full)
+            specular_out[y, x] = np.uint8(specular)
+
+
+@njit(cache=True, parallel=True)
+def compute_maps(stack, normal_out, specular_out, strength):
+    """
+    Fill normal_out (N, H, W, 3) BGR and specular_out (N, H, W) from a
+    (N, H, W, 4) BGRA stack. Frames are independent, so they run in parallel.
+    """
+    for i in prange(stack.shape[0]):
+        _frame_maps(stack[i], normal_out[i], specular_out[i], strength)
+
+
+# Warm-compile at import so the JIT cost is paid once per process, not per request
+compute_maps(
+    np.zeros((1, 2, 2, 4), np.uint8),
+    np.empty((1, 2, 2, 3), np.uint8),
+    np.empty((1, 2, 2), np.uint8),
+    1.0,
+)
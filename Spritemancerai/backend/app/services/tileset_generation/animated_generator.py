@@ -16,9 +16,11 @@ Tile types:
 import cv2
 import numpy as np
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 from app.services.gemini_client import gemini_client
+from app.services.tileset_generation.png_codec import encode_png
 from app.services.seamless_validation import validate_and_fix_seamless
 from app.models.tileset_dna import (
     AnimatedTileDNA, AnimatedTileType, AnimationStyle, SeamlessMode,
@@ -91,6 +93,7 @@ def get_animation_description(tile_type: AnimatedTileType, style: AnimationStyle
     return type_desc.get(style, f"{tile_type.value} with {style.value} animation")
 
 
+@lru_cache(maxsize=256)
 def build_animated_tile_prompt(dna: AnimatedTileDNA) -> str:
     """Build prompt for animated tile generation."""
     tile_size = dna.tile_size
@@ -306,7 +309,4 @@ async def generate_animated_tile(
 
 def encode_animation_strip_png(strip: np.ndarray) -> bytes:
     """Encode animation strip as PNG bytes."""
-    success, buffer = cv2.imencode('.png', strip)
-    if not success:
-        raise ValueError("Failed to encode animation strip")
-    return buffer.tobytes()
+    return encode_png(strip)
@@ -12,9 +12,11 @@ Includes:
 import cv2
 import numpy as np
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 from app.services.gemini_client import gemini_client
+from app.services.tileset_generation.png_codec import encode_png
 from app.services.difference_matting import compute_difference_matte
 from app.models.tileset_dna import (
     DecorationTileDNA, DecorationType, Perspective,
@@ -55,6 +57,7 @@ def get_decoration_description(decoration_type: DecorationType) -> tuple[str, st
     return descriptions.get(decoration_type, ("decorative object", "prop"))
 
 
+@lru_cache(maxsize=256)
 def build_decoration_prompt(dna: DecorationTileDNA) -> str:
     """Build prompt for decoration sprite generation."""
     desc, shape = get_decoration_description(dna.decoration_type)
@@ -317,7 +320,4 @@ Only replace white pixels with black pixels."""
 
 def encode_decoration_png(sprite: np.ndarray) -> bytes:
     """Encode decoration sprite as PNG bytes."""
-    success, buffer = cv2.imencode('.png', sprite)
-    if not success:
-        raise ValueError("Failed to encode decoration")
-    return buffer.tobytes()
+    return encode_png(sprite)
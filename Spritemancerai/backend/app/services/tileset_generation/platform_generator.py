@@ -13,9 +13,11 @@ Designed for side-view 2D platformer games.
 import cv2
 import numpy as np
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 from app.services.gemini_client import gemini_client
+from app.services.tileset_generation.png_codec import encode_png
 from app.services.difference_matting import compute_difference_matte
 from app.models.tileset_dna import (
     PlatformTileDNA, PlatformType, PlatformMaterial,
@@ -39,6 +41,7 @@ class PlatformTileResult:
 # Prompt Builder
 # ============================================================================
 
+@lru_cache(maxsize=256)
 def build_platform_prompt(dna: PlatformTileDNA, background: str = "white") -> str:
     """Build prompt for platform tile generation."""
     tile_size = dna.tile_size
@@ -362,7 +365,4 @@ Only replace white (#FFFFFF) pixels with black (#000000) pixels."""
 
 def encode_platform_strip_png(strip: np.ndarray) -> bytes:
     """Encode platform strip as PNG bytes."""
-    success, buffer = cv2.imencode('.png', strip)
-    if not success:
-        raise ValueError("Failed to encode platform strip")
-    return buffer.tobytes()
+    return encode_png(strip)
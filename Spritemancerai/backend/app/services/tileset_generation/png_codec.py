@@ -0,0 +1,63 @@
+"""
+PNG and Base64 Encoding for Tileset Outputs
+
+Shared encoder behind the encode_*_png helpers. Uses pyspng (the
+pyspng-seunglab wheel, a thin binding over libspng) when it is installed and
+falls back to cv2.imencode otherwise. Images stay in OpenCV channel order
+(BGR/BGRA) at the call sites; the swap to RGB(A) for libspng happens here.
+
+API payloads are base64'd with pybase64 (SIMD) when installed, else the
+stdlib codec; both produce identical output.
+"""
+import base64
+
+import cv2
+import numpy as np
+
+try:
+    import pyspng
+except ImportError:  # optional speedup; OpenCV is always available
+    pyspng = None
+
+try:
+    import pybase64
+except ImportError:  # optional speedup; same output as the stdlib
+    pybase64 = None
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Encode a grayscale, BGR or BGRA uint8 image as PNG bytes."""
+    if pyspng is None:
+        success, buffer = cv2.imencode('.png', image)
+        if not success:
+            raise ValueError("Failed to encode PNG")
+        return buffer.tobytes()
+
+    if image.ndim == 3:
+        code = cv2.COLOR_BGRA2RGBA if image.shape[2] == 4 else cv2.COLOR_BGR2RGB
+        image = cv2.cvtColor(image, code)
+    return pyspng.encode(np.ascontiguousarray(image))
+
+
+def b64encode_str(data) -> str:
+    """Base64 of a bytes-like object as an ASCII str."""
+    if pybase64 is None:
+        return base64.b64encode(data).decode('ascii')
+    return pybase64.b64encode_as_string(data)
+
+
+def b64decode(data) -> bytes:
+    """Decode standard base64 (str or bytes)."""
+    if pybase64 is None:
+        return base64.b64decode(data)
+    return pybase64.b64decode(data)
+
+
+def warm_up_codecs() -> None:
+    """
+    Push a tiny image through encode, decode and base64 once (call at startup),
+    so codec/TLS setup in OpenCV and libspng isn't paid by the first request.
+    """
+    png = encode_png(np.zeros((4, 4, 4), np.uint8))
+    cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_UNCHANGED)
+    b64decode(b64encode_str(png))
@@ -16,10 +16,12 @@ Background Removal Options:
 import cv2
 import numpy as np
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Literal
 import io
 
 from app.services.gemini_client import gemini_client
+from app.services.tileset_generation.png_codec import encode_png
 from app.services.difference_matting import compute_difference_matte
 from app.models.tileset_dna import (
     TerrainTilesetDNA, TerrainType, TilesetFormat,
@@ -44,6 +46,7 @@ class TerrainTilesetResult:
 # Prompt Builders
 # ============================================================================
 
+@lru_cache(maxsize=256)
 def build_minimal_9_prompt(dna: TerrainTilesetDNA) -> str:
     """
     Build prompt for minimal 9-tile terrain tileset.
@@ -144,6 +147,7 @@ Generate a professional, game-ready terrain tileset. The terrain should look lik
     return prompt
 
 
+@lru_cache(maxsize=256)
 def build_wang_16_prompt(dna: TerrainTilesetDNA) -> str:
     """Build prompt for Wang 16-tile terrain tileset (4x4 grid)."""
     tile_size = dna.tile_size
@@ -545,7 +549,4 @@ async def generate_terrain_tileset(
 
 def encode_tileset_png(tileset: np.ndarray) -> bytes:
     """Encode tileset as PNG bytes."""
-    success, buffer = cv2.imencode('.png', tileset)
-    if not success:
-        raise ValueError("Failed to encode tileset")
-    return buffer.tobytes()
+    return encode_png(tileset)
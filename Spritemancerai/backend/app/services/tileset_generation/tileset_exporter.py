@@ -9,13 +9,17 @@ Exports generated tilesets as Godot 4.x .tres TileSet resources with:
 """
 
 import numpy as np
-import base64
 import io
 import cv2
+import struct
+import zlib
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from enum import Enum
 
+from app.models.tileset_dna import hex_to_rgb
+from app.services.tileset_generation.png_codec import b64encode_str
+
 
 class TileSetType(Enum):
     """Types of tilesets with different terrain configurations."""
@@ -296,15 +300,53 @@ def generate_main_resource(
 
 def _hex_to_color(hex_color: str) -> str:
     """Convert hex color to Godot Color format."""
-    hex_color = hex_color.lstrip('#')
-    r = int(hex_color[0:2], 16) / 255.0
-    g = int(hex_color[2:4], 16) / 255.0
-    b = int(hex_color[4:6], 16) / 255.0
-    return f'{r:.4f}, {g:.4f}, {b:.4f}, 1.0'
+    r, g, b = hex_to_rgb(hex_color)
+    return f'{r / 255.0:.4f}, {g / 255.0:.4f}, {b / 255.0:.4f}, 1.0'
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _png_chunks_intact(data: bytes) -> bool:
+    """Walk a PNG's chunks: every CRC must match and the stream must end at IEND."""
+    view = memoryview(data)
+    offset = len(PNG_SIGNATURE)
+    while offset + 12 <= len(data):
+        length, = struct.unpack_from(">I", data, offset)
+        end = offset + 12 + length
+        if end > len(data):
+            return False
+        crc, = struct.unpack_from(">I", data, end - 4)
+        if zlib.crc32(view[offset + 4:end - 4]) != crc:
+            return False
+        if data[offset + 4:offset + 8] == b"IEND":
+            return True
+        offset = end
+    return False
+
+
+def image_dimensions(image: Union[np.ndarray, bytes], verify: bool = False) -> Optional[Tuple[int, int]]:
+    """
+    (height, width) of an image array or encoded image bytes.
+    
+    PNG sizes are read straight from the IHDR chunk; other formats are decoded.
+    With verify, a PNG must also have intact chunk CRCs through IEND (catches
+    truncated or corrupted uploads without inflating the pixel data).
+    Returns None if the bytes are not a readable image.
+    """
+    if isinstance(image, np.ndarray):
+        return image.shape[:2]
+    if len(image) >= 24 and image[:8] == PNG_SIGNATURE and image[12:16] == b"IHDR":
+        if verify and not _png_chunks_intact(image):
+            return None
+        width, height = struct.unpack(">II", image[16:24])
+        return height, width
+    decoded = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_UNCHANGED)
+    return None if decoded is None else decoded.shape[:2]
 
 
 def export_tileset_tres(
-    tileset_image: np.ndarray,
+    tileset_image: Union[np.ndarray, bytes],
     tile_size: int,
     texture_path: str,
     tileset_type: TileSetType = TileSetType.TERRAIN_3X3,
@@ -315,7 +357,8 @@ def export_tileset_tres(
     Export a tileset image as a Godot 4.x .tres TileSet resource.
     
     Args:
-        tileset_image: NumPy array of the tileset image
+        tileset_image: NumPy array of the tileset image, or its encoded bytes
+            (only the dimensions are used, so PNGs are never decoded)
         tile_size: Size of each tile in pixels
         texture_path: Godot resource path for the texture (e.g., "res://sprites/terrain.png")
         tileset_type: Type of tileset for terrain configuration
@@ -325,7 +368,7 @@ def export_tileset_tres(
     Returns:
         TileSetExportResult with .tres content and metadata
     """
-    height, width = tileset_image.shape[:2]
+    height, width = image_dimensions(tileset_image)
     grid_width = width // tile_size
     grid_height = height // tile_size
     tile_count = grid_width * grid_height
@@ -386,4 +429,4 @@ def get_tileset_type_from_string(type_str: str) -> TileSetType:
 
 def encode_tres_base64(tres_content: str) -> str:
     """Encode .tres content as base64 for API transmission."""
-    return base64.b64encode(tres_content.encode('utf-8')).decode('utf-8')
+    return b64encode_str(tres_content.encode('utf-8'))
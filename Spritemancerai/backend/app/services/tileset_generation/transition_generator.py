@@ -14,6 +14,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 from app.services.gemini_client import gemini_client
+from app.services.tileset_generation.png_codec import encode_png
 from app.services.difference_matting import compute_difference_matte
 from app.models.tileset_dna import TransitionTileDNA, TransitionStyle
 
@@ -197,7 +198,4 @@ async def generate_transition_tiles(
 
 def encode_transition_tileset_png(tileset: np.ndarray) -> bytes:
     """Encode transition tileset as PNG bytes."""
-    success, buffer = cv2.imencode('.png', tileset)
-    if not success:
-        raise ValueError("Failed to encode transition tileset")
-    return buffer.tobytes()
+    return encode_png(tileset)
@@ -12,9 +12,11 @@ Includes:
 import cv2
 import numpy as np
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 from app.services.gemini_client import gemini_client
+from app.services.tileset_generation.png_codec import encode_png
 from app.services.difference_matting import compute_difference_matte
 from app.models.tileset_dna import (
     WallTilesetDNA, WallType, WallStyle, TextureStyle, Perspective,
@@ -33,6 +35,7 @@ class WallTilesetResult:
     background_removal_method: str = "white_removal"
 
 
+@lru_cache(maxsize=256)
 def build_wall_tileset_prompt(dna: WallTilesetDNA) -> str:
     """Build prompt for wall tileset generation (3x3 grid = 9 tiles)."""
     tile_size = dna.tile_size
@@ -308,7 +311,4 @@ Only replace white (#FFFFFF) pixels with black (#000000)."""
 
 def encode_wall_tileset_png(tileset: np.ndarray) -> bytes:
     """Encode wall tileset as PNG bytes."""
-    success, buffer = cv2.imencode('.png', tileset)
-    if not success:
-        raise ValueError("Failed to encode wall tileset")
-    return buffer.tobytes()
+    return encode_png(tileset)
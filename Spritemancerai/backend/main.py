@@ -1,10 +1,16 @@
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from app.config import get_settings
+from app.http_client import close_http_client
+from app.logging_setup import start_logging, stop_logging
 from app.routers import projects, pipeline, websocket, export, vfx, ai_generator, tileset_generator
-from app.db import redis_client
+from app.db import redis_client, supabase_service
+from app.services.tileset_generation.png_codec import warm_up_codecs
 
 
 @asynccontextmanager
@@ -12,24 +18,33 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler for startup/shutdown events."""
     # Startup
     print("🚀 SpriteMancer AI Backend starting...")
+    start_logging(logging.DEBUG if settings.debug else logging.INFO)
     
     # Connect to Redis (handles errors internally, app works without it)
     await redis_client.connect()
     
+    # Initialize image codecs now rather than on the first tileset request
+    warm_up_codecs()
+    
     yield
     
     # Shutdown
     print("👋 SpriteMancer AI Backend shutting down...")
     await redis_client.disconnect()
+    await supabase_service.close()
+    await close_http_client()
+    stop_logging()
 
 
 settings = get_settings()
+logger = logging.getLogger("app.main")
 
 app = FastAPI(
     title=settings.app_name,
     description="AI-powered 2D pixel art sprite generation system",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson: faster, compact JSON for large script/frame payloads
     redirect_slashes=False,  # Prevent redirects that break CORS preflight
 )
 
@@ -52,6 +67,13 @@ app.include_router(ai_generator.router, prefix="/api/ai", tags=["AI Generator"])
 app.include_router(tileset_generator.router, prefix="/api/tilesets", tags=["Tileset Generation"])
 
 
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Last-resort handler: log through the queued logger and return a JSON 500."""
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path)
+    return ORJSONResponse({"detail": str(exc)}, status_code=500)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -0,0 +1,38 @@
+"""
+Tests for the Numba sprite bounding-box kernel.
+Results must match cv2.findNonZero + cv2.boundingRect.
+"""
+import cv2
+import numpy as np
+
+from app.services.bbox_numba import alpha_bbox
+
+
+def test_alpha_bbox_matches_opencv():
+    """Verify bbox equals OpenCV's boundingRect on random sparse masks."""
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        h, w = rng.integers(1, 64, size=2)
+        mask = (rng.random((h, w)) > 0.97).astype(np.uint8) * 255
+        coords = cv2.findNonZero(mask)
+        expected = cv2.boundingRect(coords) if coords is not None else None
+        assert alpha_bbox(mask) == expected
+
+
+def test_alpha_bbox_empty_and_strided():
+    """Verify empty masks return None and non-contiguous views are handled."""
+    assert alpha_bbox(np.zeros((8, 8), np.uint8)) is None
+    
+    rgba = np.zeros((10, 12, 4), np.uint8)
+    rgba[2:5, 3:9, 3] = 255
+    assert alpha_bbox(rgba[:, :, 3]) == (3, 2, 6, 3)
+
+
+def test_alpha_bbox_word_boundaries():
+    """Verify edges inside, across and after the 8-pixel SWAR words."""
+    for w in (7, 8, 9, 16, 21):
+        for x0, x1 in ((0, 0), (w - 1, w - 1), (min(3, w - 1), w - 1), (0, min(8, w - 1))):
+            mask = np.zeros((3, w), np.uint8)
+            mask[1, x0] = 1
+            mask[1, x1] = 1
+            assert alpha_bbox(mask) == (x0, 1, x1 - x0 + 1, 1)
@@ -0,0 +1,23 @@
+"""
+Tests for GeminiClient retry handling.
+A per-attempt timeout must abandon a hung call and retry it in the same loop.
+"""
+import asyncio
+
+from app.services.gemini_client import gemini_client
+
+
+async def test_timed_out_attempt_is_retried(monkeypatch):
+    """Verify an attempt slower than attempt_timeout is abandoned and retried."""
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(1)
+        return "ok"
+
+    monkeypatch.setattr(gemini_client, "INITIAL_BACKOFF", 0.0)
+
+    assert await gemini_client._retry_with_backoff(call, "Test call", attempt_timeout=0.05) == "ok"
+    assert len(attempts) == 2
@@ -0,0 +1,56 @@
+"""
+Tests for tileset PNG/base64 encoding and header-only size reads.
+Whichever backend is installed, the PNG must decode back to the same BGR(A) pixels.
+"""
+import base64
+
+import cv2
+import numpy as np
+
+from app.services.tileset_generation import png_codec
+from app.services.tileset_generation.png_codec import b64decode, b64encode_str, encode_png
+from app.services.tileset_generation.tileset_exporter import image_dimensions
+
+
+def test_encode_png_round_trips_bgra_and_bgr():
+    """Verify channel order survives encoding for 4- and 3-channel images."""
+    rng = np.random.default_rng(0)
+    for channels in (4, 3):
+        image = rng.integers(0, 256, size=(17, 33, channels), dtype=np.uint8)
+        decoded = cv2.imdecode(np.frombuffer(encode_png(image), np.uint8), cv2.IMREAD_UNCHANGED)
+        np.testing.assert_array_equal(decoded, image)
+
+
+def test_encode_png_falls_back_to_opencv(monkeypatch):
+    """Verify the OpenCV path is used when pyspng is not installed."""
+    monkeypatch.setattr(png_codec, "pyspng", None)
+    image = np.zeros((4, 4, 4), np.uint8)
+    assert encode_png(image) == cv2.imencode('.png', image)[1].tobytes()
+
+
+def test_image_dimensions_reads_png_header():
+    """Verify PNG sizes come from IHDR and match the decoded array."""
+    image = np.zeros((48, 96, 4), np.uint8)
+    png = encode_png(image)
+    assert image_dimensions(png) == (48, 96)
+    assert image_dimensions(image) == (48, 96)
+    assert image_dimensions(b"not an image") is None
+
+
+def test_image_dimensions_verify_rejects_truncated_png():
+    """Verify a PNG cut off after IHDR only passes the header-only read."""
+    png = encode_png(np.zeros((48, 96, 4), np.uint8))
+    assert image_dimensions(png, verify=True) == (48, 96)
+    assert image_dimensions(png[:40]) == (48, 96)
+    assert image_dimensions(png[:40], verify=True) is None
+
+
+def test_base64_helpers_match_stdlib(monkeypatch):
+    """Verify both base64 backends agree with the stdlib codec."""
+    data = bytes(range(256)) * 3
+    expected = base64.b64encode(data).decode('ascii')
+    assert b64encode_str(data) == expected
+    assert b64decode(expected) == data
+    monkeypatch.setattr(png_codec, "pybase64", None)
+    assert b64encode_str(data) == expected
+    assert b64decode(expected) == data
@@ -0,0 +1,36 @@
+"""
+Tests for the Numba lighting-map kernel.
+Results must match the per-frame OpenCV path byte for byte.
+"""
+import numpy as np
+
+from app.services.stages.stage_7_post_processing import ExtractedFrame
+from app.services.stages.stage_7b_generate_maps import generate_lighting_maps_for_frame
+from app.services.stages.stage_7b_kernels import compute_maps
+
+
+def _reference(frame: np.ndarray, strength: float):
+    extracted = ExtractedFrame(
+        index=0, image=frame, x=0, y=0,
+        width=frame.shape[1], height=frame.shape[0], pivot_x=0.5, pivot_y=1.0,
+    )
+    maps = generate_lighting_maps_for_frame(extracted, normal_strength=strength)
+    return maps.normal_map, maps.specular_map
+
+
+def test_compute_maps_matches_opencv():
+    """Verify normal and specular maps on random sprites, including 1-2px edges."""
+    rng = np.random.default_rng(0)
+    sizes = [(1, 1), (2, 7), (5, 2), (16, 16), (23, 31)]
+    for h, w in sizes:
+        for strength in (1.0, 0.7, 2.3):
+            stack = rng.integers(0, 256, size=(3, h, w, 4), dtype=np.uint8)
+            stack[0, ..., 3] = 0  # fully transparent frame
+            stack[1, : h // 2, :, 3] = 0  # partially transparent frame
+            normal = np.empty((3, h, w, 3), np.uint8)
+            specular = np.empty((3, h, w), np.uint8)
+            compute_maps(stack, normal, specular, strength)
+            for i in range(3):
+                expected_normal, expected_specular = _reference(stack[i], strength)
+                np.testing.assert_array_equal(normal[i], expected_normal)
+                np.testing.assert_array_equal(specular[i], expected_specular)
@@ -0,0 +1,57 @@
+"""
+Tests for the websocket fan-out helpers.
+One encoded text frame goes to every client; clients that fail are dropped.
+"""
+import asyncio
+import json
+
+from app.routers import websocket as ws_module
+from app.routers.websocket import send_stage_update
+
+
+class FakeSocket:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sent = []
+        self.closed = False
+
+    async def send_text(self, text: str):
+        if self.fail:
+            raise RuntimeError("closed")
+        self.sent.append(text)
+
+    async def close(self):
+        self.closed = True
+
+
+async def test_broadcast_sends_text_and_drops_failed_clients(monkeypatch):
+    """Verify every live client gets the same JSON text and dead ones are removed."""
+    alive, other, dead = FakeSocket(), FakeSocket(), FakeSocket(fail=True)
+    monkeypatch.setattr(ws_module, "connections", {"p1": {alive, other, dead}})
+
+    await send_stage_update("p1", 2, "extract", "complete", {"frames": 4})
+
+    assert alive.sent == other.sent and len(alive.sent) == 1
+    assert json.loads(alive.sent[0]) == {
+        "type": "stage_complete", "project_id": "p1", "stage": 2,
+        "stage_name": "extract", "data": {"frames": 4},
+    }
+    assert ws_module.connections["p1"] == {alive, other}
+    assert dead.closed and not alive.closed
+
+
+async def test_broadcast_drops_stalled_clients(monkeypatch):
+    """Verify a client that never finishes a send is dropped and closed after the timeout."""
+    class StalledSocket(FakeSocket):
+        async def send_text(self, text: str):
+            await asyncio.sleep(1)
+
+    alive, stalled = FakeSocket(), StalledSocket()
+    monkeypatch.setattr(ws_module, "connections", {"p1": {alive, stalled}})
+    monkeypatch.setattr(ws_module, "SEND_TIMEOUT_SECONDS", 0.05)
+
+    await send_stage_update("p1", 1, "dna", "start")
+
+    assert len(alive.sent) == 1
+    assert ws_module.connections["p1"] == {alive}
+    assert stalled.closed and not alive.closed